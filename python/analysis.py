@@ -9,6 +9,9 @@ from collections import defaultdict
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, XSD, SKOS
 
+from phase_timer import mark
+from rdf_output import write_outputs
+
 # -----------------------------------------------------------------------
 # Pfade
 # -----------------------------------------------------------------------
@@ -108,6 +111,7 @@ def clean_label(s: str) -> str:
 # -----------------------------------------------------------------------
 # Quellgraph laden
 # -----------------------------------------------------------------------
+mark("Quellgraph laden")
 g_src = Graph()
 if WORKS_TTL.exists():
     g_src.parse(WORKS_TTL.as_posix(), format="turtle")
@@ -123,6 +127,7 @@ if FRAGMENTS_TTL.exists():
 # -----------------------------------------------------------------------
 # Vokabular laden + indexieren
 # -----------------------------------------------------------------------
+mark("Vokabular laden + indexieren")
 g_vocab = Graph()
 if VOCAB_TTL.exists():
     g_vocab.parse(VOCAB_TTL.as_posix(), format="turtle")
@@ -250,6 +255,7 @@ def get_en_label(voc: Optional[URIRef], fallback: str) -> str:
 # -----------------------------------------------------------------------
 # F2-Expressions-Index aufbauen
 # -----------------------------------------------------------------------
+mark("F2-Expressions-Index aufbauen")
 text_index = {}
 werk_index = {}
 
@@ -282,6 +288,7 @@ for s, _, otype in g_works_only.triples((None, RDF.type, None)):
 # -----------------------------------------------------------------------
 # Output-Graph
 # -----------------------------------------------------------------------
+mark("Output-Graph")
 g = Graph()
 g.bind("", BASENS)
 g.bind("lrmoo", LRMOO)
@@ -361,6 +368,7 @@ def add_actualization_common(
 # -----------------------------------------------------------------------
 # XML einlesen & Daten sammeln
 # -----------------------------------------------------------------------
+mark("XML einlesen & Daten sammeln")
 elements_per_text = {}
 distinct_value_to_id = {k: {} for k in ["motiv","stoff","thema","werk","ort","person"]}
 
@@ -482,6 +490,7 @@ def get_entity_uri_with_vocab(cat: str, label: str, fallback_id: str) -> Tuple[U
 # -----------------------------------------------------------------------
 # Instanzen erzeugen
 # -----------------------------------------------------------------------
+mark("Instanzen erzeugen")
 for text_id, cats in elements_per_text.items():
     txt = text_index.get(text_id)
     if not txt:
@@ -743,11 +752,5 @@ for text_id, cats in elements_per_text.items():
 # -----------------------------------------------------------------------
 # Schreiben
 # -----------------------------------------------------------------------
-OUT_TTL.parent.mkdir(parents=True, exist_ok=True)
-g.serialize(destination=OUT_TTL.as_posix(), format="turtle")
-
-OUT_RDF = OUT_TTL.with_suffix(".rdf")
-g.serialize(destination=OUT_RDF.as_posix(), format="pretty-xml", encoding="utf-8")
-
-OUT_JSONLD = OUT_TTL.with_suffix(".jsonld")
-g.serialize(destination=OUT_JSONLD.as_posix(), format="json-ld", encoding="utf-8")
\ No newline at end of file
+mark("Schreiben")
+write_outputs(g, OUT_TTL)
\ No newline at end of file
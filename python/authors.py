@@ -1,6 +1,6 @@
-import requests
-import time
-import uuid 
+import hashlib
+import json
+import sys
 import xml.etree.ElementTree as ET
 from lxml import etree
 from rdflib import Graph, Namespace, URIRef, Literal
@@ -9,11 +9,10 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
-SESSION = requests.Session()
-SESSION.headers.update({
-    "User-Agent": "SapphoDigital/1.0 (+mailto:laura.untner@fu-berlin.de)"
-})
-_WD_CACHE: dict[str, dict] = {}
+from harvest_state import STATE_DIR, HarvestState, file_digest
+from phase_timer import mark
+from rdf_output import write_outputs
+from wikidata import PROJECTION, fetch_wikidata, prefetch
 
 # Pfade
 INPUT_FILE = "../data/lists/sappho-rez_alle.xml"
@@ -93,41 +92,36 @@ def _load_pubplace_index(xml_path: str) -> dict[str, str]:
             idx.setdefault(ref, xml_id)
     return idx
 
-def _place_uri_from_index_or_random(pubplace_idx: dict[str, str], wikidata_qid: str):
+def _cached_pubplace_index(xml_path: str) -> dict[str, str]:
+    """_load_pubplace_index, zwischengespeichert je Inhalt der XML-Datei."""
+    cache_path = STATE_DIR / "pubplace_index.json"
+    digest = file_digest(xml_path)
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cached.get("source") == digest:
+            return cached["index"]
+    except (OSError, ValueError):
+        pass
+    idx = _load_pubplace_index(xml_path)
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"source": digest, "index": idx}, ensure_ascii=False),
+                          encoding="utf-8")
+    return idx
+
+def _place_uri_from_index_or_hash(pubplace_idx: dict[str, str], wikidata_qid: str):
+    # Orte ohne pubPlace im XML: ID aus der QID ableiten, damit jeder Lauf dieselbe URI erzeugt
     wd_uri = WD + wikidata_qid
     xml_id = pubplace_idx.get(wd_uri)
     if xml_id:
         return SD[f"place/{xml_id}"], wd_uri
-    return SD[f"place/place_{uuid.uuid4().hex[:8]}"], wd_uri
+    digest = hashlib.sha1(wikidata_qid.encode("utf-8")).hexdigest()[:8]
+    return SD[f"place/place_{digest}"], wd_uri
 
-_pubplace_idx = _load_pubplace_index(INPUT_FILE)
+_pubplace_idx = _cached_pubplace_index(INPUT_FILE)
 
 def normalize_id(name):
     return name.strip().lower().replace(" ", "_")
 
-def fetch_wikidata(qid: str) -> dict:
-    if not qid:
-        return {}
-    if qid in _WD_CACHE:
-        return _WD_CACHE[qid]
-    url = f"https://www.wikidata.org/wiki/Special:EntityData/{qid}.json"
-    for attempt in range(3):
-        try:
-            r = SESSION.get(url, timeout=15)
-            if r.status_code == 200:
-                data = r.json().get("entities", {}).get(qid, {})
-                if data:
-                    _WD_CACHE[qid] = data
-                    return data
-            if r.status_code in (429, 503):
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            break
-        except requests.RequestException:
-            time.sleep(1.0 * (attempt + 1))
-            continue
-    return {}
-
 def get_claim_val(entity, prop, val_type="id"):
     claims = entity.get("claims", {}).get(prop)
     if not claims:
@@ -200,6 +194,7 @@ def dbpedia_from_sitelinks(entity: dict) -> Optional[str]:
 # -----------------------------------------------------------------------
 # Autor_innen aus XML lesen
 # -----------------------------------------------------------------------
+mark("Autor_innen aus XML lesen")
 
 parser = etree.XMLParser(recover=True)
 tree = etree.parse(INPUT_FILE, parser=parser)
@@ -207,11 +202,37 @@ root = tree.getroot()
 authors = root.findall(".//tei:author", namespaces=NS)
 seen = set()
 
+# Inkrementell: nur neue oder geänderte Autor_innen (alle <author> einer xml:id) neu erzeugen
+harvest = HarvestState("authors", {"script": file_digest(__file__), "projection": PROJECTION,
+                                   "pubplaces": _pubplace_idx},
+                       full="--full" in sys.argv[1:])
+_entries: dict[str, list[bytes]] = {}
+for el in authors:
+    xml_id = el.get("{http://www.w3.org/XML/1998/namespace}id")
+    if xml_id:
+        _entries.setdefault(xml_id, []).append(etree.tostring(el, with_tail=False))
+changed = harvest.plan(_entries)
+
+# Wikidata vorab laden: erst die Autor_innen, dann ihre Orte und Gender
+mark("Wikidata vorab laden")
+author_qids = {el.get("ref").split("/")[-1] for el in authors
+               if el.get("ref") and "wikidata.org/entity/" in el.get("ref")
+               and el.get("{http://www.w3.org/XML/1998/namespace}id") in changed}
+prefetch(author_qids, refresh=harvest.full)
+prefetch((get_claim_val(fetch_wikidata(qid), p) for qid in author_qids for p in ("P19", "P20", "P21")),
+         refresh=harvest.full)
+mark("Autor_innen")
+
+g_base = g
 for el in authors:
     name = el.text.strip()
     xml_id = el.get("{http://www.w3.org/XML/1998/namespace}id")
     if not xml_id:
         continue
+    # Tripel dieser Autor_in in einem eigenen Graphen sammeln
+    g = harvest.graph(xml_id)
+    if g is None:
+        continue
     if (xml_id, el.text.strip()) in seen:
         continue
     seen.add((xml_id, el.text.strip()))
@@ -234,6 +255,8 @@ for el in authors:
     if wikidata_ref and "wikidata.org/entity/" in wikidata_ref:
         qid = wikidata_ref.split("/")[-1]
         entity = fetch_wikidata(qid)
+        if not entity:
+            harvest.mark_incomplete(xml_id)
 
         # Wikidata-Identifier
         wd_id_uri = SD[f"identifier/{qid}"]
@@ -344,7 +367,7 @@ for el in authors:
                               or birth_place_qid)
             place_label_en = (place_entity.get("labels", {}).get("en", {}).get("value")
                               or place_label_de)
-            place_uri, same_as = _place_uri_from_index_or_random(_pubplace_idx, birth_place_qid)
+            place_uri, same_as = _place_uri_from_index_or_hash(_pubplace_idx, birth_place_qid)
             g.add((place_uri, RDF.type, ECRM.E53_Place))
             add_bilingual(g, place_uri, place_label_de, place_label_en)
             g.add((place_uri, OWL.sameAs, URIRef(same_as)))
@@ -359,7 +382,7 @@ for el in authors:
                               or death_place_qid)
             place_label_en = (place_entity.get("labels", {}).get("en", {}).get("value")
                               or place_label_de)
-            place_uri, same_as = _place_uri_from_index_or_random(_pubplace_idx, death_place_qid)
+            place_uri, same_as = _place_uri_from_index_or_hash(_pubplace_idx, death_place_qid)
             g.add((place_uri, RDF.type, ECRM.E53_Place))
             add_bilingual(g, place_uri, place_label_de, place_label_en)
             g.add((place_uri, OWL.sameAs, URIRef(same_as)))
@@ -403,13 +426,13 @@ for el in authors:
             g.add((person_uri, ECRM.P138i_has_representation, vis_uri))
 
 # -----------------------------------------------------------------------
-# Speichern
+# Unveränderte und neu erzeugte Einträge zusammenführen
 # -----------------------------------------------------------------------
-Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
-g.serialize(destination=OUTPUT_FILE, format="turtle")
-
-xml_output = OUTPUT_FILE.replace(".ttl", ".rdf")
-g.serialize(destination=xml_output, format="pretty-xml")
+mark("Einträge zusammenführen")
+g = harvest.finish(g_base)
 
-jsonld_output = OUTPUT_FILE.replace(".ttl", ".jsonld")
-g.serialize(destination=jsonld_output, format="json-ld")
\ No newline at end of file
+# -----------------------------------------------------------------------
+# Speichern
+# -----------------------------------------------------------------------
+mark("Speichern")
+write_outputs(g, OUTPUT_FILE)
\ No newline at end of file
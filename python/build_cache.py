@@ -0,0 +1,261 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from functools import lru_cache
+from typing import Optional
+
+from rdf_output import ENV_FORMATS, ENV_WRITER, FORMATS, selected_formats
+from wikidata import ENV_DUMP
+
+# -----------------------------------------------------------------------
+# Build-Cache für die Update-Schritte (authors.py ... merge.py)
+#
+# Jeder Schritt erhält einen Schlüssel aus dem Inhalt seines Skripts, aller
+# (auch indirekt) importierten Module aus python/, aller Eingabedateien und
+# der Ausgabe-Optionen.
+# Gibt es zu dem Schlüssel schon einen Eintrag, werden die Ausgaben aus dem
+# Objektspeicher wiederhergestellt, statt das Skript auszuführen.
+#
+#   .cache/build/objects/ab/cdef...   Ausgabedateien, nach SHA-256 abgelegt
+#   .cache/build/steps/<key>.json     Ausgaben eines Schritts (Pfad -> Hash)
+#
+# Verwendung:
+#   python3 build_cache.py                 alle Schritte
+#   python3 build_cache.py works merge      nur diese Schritte
+#   python3 build_cache.py --force works    works neu ausführen (z. B. für
+#                                           frische Wikidata-Daten)
+# -----------------------------------------------------------------------
+
+HERE = Path(__file__).resolve().parent
+CACHE_DIR = (HERE / "../.cache/build").resolve()
+OBJECTS = CACHE_DIR / "objects"
+STEP_DIR = CACHE_DIR / "steps"
+
+RDF_DIR = "../data/rdf"
+XML_DIR = "../../doktorat/Diss/Sappho-Rezeption/XML"
+
+# Umgebungsvariablen, die die Ausgaben beeinflussen
+ENV_KEYS = [ENV_FORMATS, ENV_WRITER, ENV_DUMP]
+
+
+def rdf_outputs(stem: str) -> list[str]:
+    return [f"{RDF_DIR}/{stem}{ext}" for ext in (".ttl", ".rdf", ".jsonld")]
+
+
+# Reihenfolge = update_workflow.txt
+STEPS = {
+    "authors": {
+        "script": "authors.py",
+        "inputs": ["../data/lists/sappho-rez_alle.xml"],
+        "outputs": rdf_outputs("authors"),
+    },
+    "works": {
+        "script": "works.py",
+        "inputs": ["../data/lists/sappho-rez_alle.xml"],
+        "outputs": rdf_outputs("works"),
+    },
+    "fragments": {
+        "script": "fragments.py",
+        "inputs": ["../data/sappho_fragments_qids.csv"],
+        "outputs": rdf_outputs("fragments"),
+    },
+    "analysis": {
+        "script": "analysis.py",
+        "inputs": [
+            XML_DIR,
+            f"{RDF_DIR}/works.ttl",
+            f"{RDF_DIR}/fragments.ttl",
+            "../documentation/vocab/vocab.ttl",
+            "../documentation/vocab/vocab.rdf",
+        ],
+        "outputs": rdf_outputs("analysis"),
+    },
+    "relations": {
+        "script": "relations.py",
+        "inputs": [
+            XML_DIR,
+            f"{RDF_DIR}/works.ttl",
+            f"{RDF_DIR}/analysis.ttl",
+            f"{RDF_DIR}/fragments.ttl",
+        ],
+        "outputs": rdf_outputs("relations"),
+    },
+    "merge": {
+        "script": "merge.py",
+        "inputs": [f"{RDF_DIR}/{name}.ttl" for name in ("authors", "works", "fragments", "analysis", "relations")],
+        "outputs": rdf_outputs("sappho-reception") + [f"{RDF_DIR}/sappho-reception.snap"],
+    },
+}
+
+# ---------------- Hashing ----------------
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def input_digest(rel: str) -> str:
+    """Hash einer Eingabe: Datei, Verzeichnis (alle Dateien darin) oder "fehlt"."""
+    path = (HERE / rel).resolve()
+    if path.is_file():
+        return file_hash(path)
+    if path.is_dir():
+        h = hashlib.sha256()
+        for f in sorted(p for p in path.rglob("*") if p.is_file()):
+            h.update(f.relative_to(path).as_posix().encode("utf-8") + b"\0")
+            h.update(file_hash(f).encode("ascii"))
+        return h.hexdigest()
+    return "fehlt"
+
+@lru_cache(maxsize=None)
+def imported_modules(script: str) -> frozenset[str]:
+    """Alle Module aus python/, die script direkt oder indirekt importiert.
+
+    Auch Importe in Funktionen zählen (z. B. wikidata_dump nur mit SAPPHO_WD_DUMP).
+    """
+    found: set[str] = set()
+    todo = [script]
+    while todo:
+        tree = ast.parse((HERE / todo.pop()).read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = f"{name.split('.')[0]}.py"
+                if module != script and module not in found and (HERE / module).is_file():
+                    found.add(module)
+                    todo.append(module)
+    return frozenset(found)
+
+def step_key(name: str) -> tuple[str, dict]:
+    step = STEPS[name]
+    parts = {"step": name, "script": input_digest(step["script"])}
+    parts.update({f"module:{m}": input_digest(m) for m in sorted(imported_modules(step["script"]))})
+    parts.update({f"input:{rel}": input_digest(rel) for rel in step["inputs"]})
+    parts.update({f"env:{k}": os.environ.get(k, "") for k in ENV_KEYS})
+    key = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+    return key, parts
+
+# ---------------- Objektspeicher ----------------
+
+def object_path(digest: str) -> Path:
+    return OBJECTS / digest[:2] / digest[2:]
+
+def store_object(path: Path) -> str:
+    digest = file_hash(path)
+    target = object_path(digest)
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        shutil.copyfile(path, tmp)
+        tmp.replace(target)
+    return digest
+
+def load_entry(key: str) -> Optional[dict]:
+    try:
+        entry = json.loads((STEP_DIR / f"{key}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not all(object_path(o["sha256"]).exists() for o in entry["outputs"].values()):
+        return None
+    return entry
+
+def skipped_suffixes() -> set[str]:
+    """Endungen der per SAPPHO_RDF_FORMATS abgewählten Formate (ohne Turtle auch kein Snapshot)."""
+    selected = selected_formats()
+    skipped = {ext for fmt, (ext, _) in FORMATS.items() if fmt not in selected}
+    if "turtle" not in selected:
+        skipped.add(".snap")
+    return skipped
+
+def save_entry(key: str, name: str, parts: dict) -> dict:
+    outputs = {}
+    skipped = skipped_suffixes()
+    for rel in STEPS[name]["outputs"]:
+        path = (HERE / rel).resolve()
+        if Path(rel).suffix in skipped:
+            continue
+        if not path.exists():
+            print(f"[WARN] {name}: Ausgabe fehlt, nicht im Cache: {rel}")
+            continue
+        outputs[rel] = {"sha256": store_object(path), "mtime_ns": path.stat().st_mtime_ns}
+    entry = {"step": name, "created": time.strftime("%Y-%m-%d %H:%M:%S"), "inputs": parts, "outputs": outputs}
+    STEP_DIR.mkdir(parents=True, exist_ok=True)
+    (STEP_DIR / f"{key}.json").write_text(json.dumps(entry, indent=2), encoding="utf-8")
+    return entry
+
+def restore_entry(entry: dict) -> int:
+    """Stellt die Ausgaben eines Eintrags wieder her; liefert die Zahl geänderter Dateien."""
+    restored = 0
+    for rel, obj in entry["outputs"].items():
+        path = (HERE / rel).resolve()
+        if path.exists() and file_hash(path) == obj["sha256"]:
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.copyfile(object_path(obj["sha256"]), tmp)
+        tmp.replace(path)
+        # Original-mtime, damit Snapshots zu ihrer Turtle-Datei passen
+        os.utime(path, ns=(obj["mtime_ns"], obj["mtime_ns"]))
+        restored += 1
+    return restored
+
+# ---------------- Ausführen ----------------
+
+def run_step(name: str, force: bool = False, log=None) -> Optional[str]:
+    """Führt einen Schritt aus oder stellt ihn aus dem Cache her.
+
+    Liefert "cache" oder "ok", None bei Fehler; log nimmt optional die
+    Ausgabe des Skripts auf.
+    """
+    key, parts = step_key(name)
+    entry = None if force else load_entry(key)
+    if entry is not None:
+        n = restore_entry(entry)
+        state = f"{n} Ausgabe(n) wiederhergestellt" if n else "Ausgaben aktuell"
+        print(f"[CACHE] {name}: übersprungen, {state}")
+        return "cache"
+
+    print(f"[RUN] {name}: {STEPS[name]['script']}")
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, STEPS[name]["script"]], cwd=HERE,
+                            stdout=log, stderr=subprocess.STDOUT if log else None)
+    if result.returncode != 0:
+        print(f"[FEHLER] {name}: Exit-Code {result.returncode}")
+        return None
+    save_entry(key, name, parts)
+    print(f"[OK] {name}: {time.perf_counter() - t0:.1f}s, im Cache abgelegt")
+    return "ok"
+
+def main():
+    parser = argparse.ArgumentParser(description="Update-Schritte mit Build-Cache ausführen.")
+    parser.add_argument("steps", nargs="*", metavar="step",
+        help=f"Schritte ({', '.join(STEPS)}); Standard: alle")
+    parser.add_argument("--force", action="store_true",
+        help="Cache ignorieren und die gewählten Schritte neu ausführen")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.steps if s not in STEPS]
+    if unknown:
+        parser.error(f"unbekannte Schritte: {', '.join(unknown)}")
+
+    selected = args.steps or list(STEPS)
+    for name in STEPS:
+        if name in selected and run_step(name, args.force) is None:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from rdflib import Graph, URIRef
 from rdflib.namespace import SKOS, RDF
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 # Paths
 HERE = Path(__file__).resolve().parent
 data_dir = (HERE / "../data/rdf").resolve()
 vocabs_path = (HERE / "../documentation/vocab/vocab.ttl").resolve()
+CACHE_FILE = (HERE / "../.cache/triple-counts.json").resolve()
 
 files = [
     "authors",
@@ -47,6 +53,182 @@ def count_triples(file_path: Path) -> int:
     g.parse(file_path, format="turtle")
     return len(g)
 
+# ---------------- Streaming-Zählung ----------------
+
+_TOKEN = re.compile(r"""
+      \s+
+    | \#[^\n]*
+    | (?P<long>\"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"|'''(?:[^'\\]|\\.|'(?!''))*''')
+    | (?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | (?P<iri><[^>\s]*>)
+    | (?P<punct>[;,\[\]()])
+    | (?P<word>[^\s;,\[\]()"'<\#]+)
+""", re.X | re.S)
+
+def tokenize_turtle(file_path: Path) -> Iterator[str]:
+    """Zerlegt eine Turtle-Datei zeilenweise in Tokens (ohne Graph)."""
+    pending = ""
+    with open(file_path, encoding="utf-8") as fh:
+        for line in fh:
+            buf = pending + line
+            pending = ""
+            pos = 0
+            while pos < len(buf):
+                m = _TOKEN.match(buf, pos)
+                if m is None or (m.lastgroup == "str" and buf.startswith(('"""', "'''"), pos)):
+                    # mehrzeiliges Literal: weitere Zeilen sammeln
+                    pending = buf[pos:]
+                    break
+                pos = m.end()
+                kind = m.lastgroup
+                if kind is None:
+                    continue
+                tok = m.group(kind)
+                if kind == "word" and tok.endswith(".") and tok != ".":
+                    stripped = tok.rstrip(".")
+                    if stripped:
+                        yield stripped
+                    for _ in range(len(tok) - len(stripped)):
+                        yield "."
+                elif kind in ("long", "str"):
+                    yield '"'
+                else:
+                    yield tok
+    if pending.strip():
+        raise ValueError(f"Unvollständiges Literal am Dateiende: {pending[:40]!r}")
+
+class _Tokens:
+    def __init__(self, it: Iterator[str]):
+        self._it = it
+        self._peek: Optional[str] = None
+
+    def peek(self) -> Optional[str]:
+        if self._peek is None:
+            self._peek = next(self._it, None)
+        return self._peek
+
+    def next(self) -> Optional[str]:
+        tok = self.peek()
+        self._peek = None
+        return tok
+
+def _count_object(toks: _Tokens) -> int:
+    """Zählt die Tripel innerhalb eines Objekts (ohne das Objekt-Tripel selbst)."""
+    tok = toks.next()
+    if tok == "[":
+        return _count_blank_node(toks)
+    if tok == "(":
+        return _count_collection(toks)
+    if tok == '"':
+        nxt = toks.peek()
+        if nxt == "^^":
+            toks.next()
+            toks.next()
+        elif nxt is not None and (nxt.startswith("@") or nxt.startswith("^^")):
+            toks.next()
+    return 0
+
+def _count_blank_node(toks: _Tokens) -> int:
+    if toks.peek() == "]":
+        toks.next()
+        return 0
+    n = _count_predicate_objects(toks)
+    toks.next()  # "]"
+    return n
+
+def _count_collection(toks: _Tokens) -> int:
+    n = 0
+    while toks.peek() not in (")", None):
+        n += 2 + _count_object(toks)  # rdf:first + rdf:rest
+    toks.next()
+    return n
+
+def _count_predicate_objects(toks: _Tokens) -> int:
+    n = 0
+    while toks.peek() not in (".", "]", None):
+        if toks.peek() == ";":
+            toks.next()
+            continue
+        toks.next()  # Prädikat
+        n += 1 + _count_object(toks)
+        while toks.peek() == ",":
+            toks.next()
+            n += 1 + _count_object(toks)
+    return n
+
+def stream_count_triples(file_path: Path) -> int:
+    """Zählt Tripel in einer Turtle-Datei über einen Tokenizer, ohne Graph aufzubauen.
+
+    Doppelte Aussagen werden nicht zusammengefasst; rdflib-Serialisierungen
+    enthalten keine, daher stimmt das Ergebnis dort mit len(Graph) überein.
+    """
+    toks = _Tokens(tokenize_turtle(file_path))
+    n = 0
+    while toks.peek() is not None:
+        tok = toks.next()
+        if tok in ("@prefix", "@base"):
+            while toks.next() not in (".", None):
+                pass
+        elif tok.upper() == "PREFIX":
+            toks.next()
+            toks.next()
+        elif tok.upper() == "BASE":
+            toks.next()
+        else:
+            if tok == "[":
+                n += _count_blank_node(toks)
+            elif tok == "(":
+                n += _count_collection(toks)
+            n += _count_predicate_objects(toks)
+            toks.next()  # "."
+    return n
+
+def _count_worker(args: tuple) -> int:
+    path, exact = args
+    return count_triples(path) if exact else stream_count_triples(path)
+
+def count_files(paths: list[Path], exact: bool = False) -> dict:
+    """Zählt mehrere Dateien parallel; unveränderte Dateien kommen aus dem Cache.
+
+    Liefert pro Pfad die Tripelzahl oder die beim Zählen aufgetretene Exception.
+    """
+    mode = "exact" if exact else "stream"
+    try:
+        cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+
+    results: dict = {}
+    todo = []
+    for path in paths:
+        st = path.stat()
+        key = f"{mode}:{path}"
+        entry = cache.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            results[path] = entry["triples"]
+        else:
+            todo.append(path)
+
+    if todo:
+        workers = min(len(todo), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(_count_worker, (path, exact)) for path in todo}
+            for path, fut in futures.items():
+                try:
+                    n = fut.result()
+                except Exception as e:
+                    results[path] = e
+                    continue
+                st = path.stat()
+                results[path] = n
+                cache[f"{mode}:{path}"] = {
+                    "size": st.st_size, "mtime_ns": st.st_mtime_ns, "triples": n,
+                }
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_FILE.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+
+    return results
+
 def local_id(uri: URIRef) -> str:
     s = str(uri)
     if "#" in s:
@@ -135,7 +317,7 @@ def analyze_vocabs(vocabs_file: Path):
 
 # ---------------- Reasoner output counts ----------------
 
-def analyze_reasoner_outputs():
+def analyze_reasoner_outputs(counts: dict):
     print("\n=== Reasoner Outputs ===")
 
     inferred_n = None
@@ -143,45 +325,60 @@ def analyze_reasoner_outputs():
 
     # inferred only
     if INFERRED_TTL.exists():
-        inferred_n = count_triples(INFERRED_TTL)
-        print(f"Inferred only: {inferred_n} Tripel ({INFERRED_TTL.name})")
+        inferred_n = counts.get(INFERRED_TTL)
+        if isinstance(inferred_n, Exception):
+            print(f"❌ Fehler beim Parsen von {INFERRED_TTL}: {inferred_n}")
+            inferred_n = None
+        else:
+            print(f"Inferred only: {inferred_n} Tripel ({INFERRED_TTL.name})")
     else:
         print(f"⚠️ Datei nicht gefunden: {INFERRED_TTL}")
 
     # asserted + inferred
     if ASSERTED_INFERRED_TTL.exists():
-        asserted_inferred_n = count_triples(ASSERTED_INFERRED_TTL)
-        print(f"Asserted + Inferred: {asserted_inferred_n} Tripel ({ASSERTED_INFERRED_TTL.name})")
+        asserted_inferred_n = counts.get(ASSERTED_INFERRED_TTL)
+        if isinstance(asserted_inferred_n, Exception):
+            print(f"❌ Fehler beim Parsen von {ASSERTED_INFERRED_TTL}: {asserted_inferred_n}")
+            asserted_inferred_n = None
+        else:
+            print(f"Asserted + Inferred: {asserted_inferred_n} Tripel ({ASSERTED_INFERRED_TTL.name})")
     else:
         print(f"⚠️ Datei nicht gefunden: {ASSERTED_INFERRED_TTL}")
 
-    # delta = inferred only via subtraction
-    asserted_path = data_dir / "sappho-reception.ttl"
-    if asserted_inferred_n is not None and asserted_path.exists():
-        asserted_n = count_triples(asserted_path)
+    # delta = inferred only via subtraction (Zählung aus main wiederverwendet)
+    asserted_n = counts.get(data_dir / "sappho-reception.ttl")
+    if asserted_inferred_n is not None and isinstance(asserted_n, int):
         delta = asserted_inferred_n - asserted_n
         print(f"\nΔ Reine Inferenz (Asserted+Inferred − Asserted): {delta} Tripel")
 
 # ---------------- Main ----------------
 
 def main():
+    parser = argparse.ArgumentParser(description="Zählt die Tripel der RDF-Dateien.")
+    parser.add_argument("--exact", action="store_true",
+        help="Mit rdflib-Graph zählen (dedupliziert) statt mit dem Streaming-Tokenizer")
+    args = parser.parse_args()
+
+    instance_paths = [data_dir / f"{name}.ttl" for name in files]
+    candidates = instance_paths + [INFERRED_TTL, ASSERTED_INFERRED_TTL]
+    counts = count_files([p for p in candidates if p.exists()], exact=args.exact)
+
     total = 0
     print("=== Instanzen ===")
-    for name in files:
-        ttl_path = data_dir / f"{name}.ttl"
+    for name, ttl_path in zip(files, instance_paths):
         if ttl_path.exists():
-            try:
-                n = count_triples(ttl_path)
-                total += n
-                print(f"{name}.ttl: {n} Tripel")
-            except Exception as e:
-                print(f"❌ Fehler beim Parsen von {ttl_path}: {e}")
+            n = counts[ttl_path]
+            if isinstance(n, Exception):
+                print(f"❌ Fehler beim Parsen von {ttl_path}: {n}")
+                continue
+            total += n
+            print(f"{name}.ttl: {n} Tripel")
         else:
             print(f"⚠️ Datei nicht gefunden: {ttl_path}")
     print(f"\nGesamtanzahl der Tripel: {total}")
 
     # Reasoner outputs
-    analyze_reasoner_outputs()
+    analyze_reasoner_outputs(counts)
 
     # SKOS analysis
     if vocabs_path.exists():
@@ -1,40 +1,12 @@
 import csv
-import time
-import requests
 from pathlib import Path
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, XSD, OWL
 from typing import Optional
 
-# Wikidata
-SESSION = requests.Session()
-SESSION.headers.update({
-    "User-Agent": "SapphoDigital/1.0 (+mailto:laura.untner@fu-berlin.de)"
-})
-_WD_CACHE: dict[str, dict] = {}
-
-def fetch_wikidata(qid: str) -> dict:
-    if not qid:
-        return {}
-    if qid in _WD_CACHE:
-        return _WD_CACHE[qid]
-    url = f"https://www.wikidata.org/wiki/Special:EntityData/{qid}.json"
-    for attempt in range(3):
-        try:
-            r = SESSION.get(url, timeout=15)
-            if r.status_code == 200:
-                data = r.json().get("entities", {}).get(qid, {})
-                if data:
-                    _WD_CACHE[qid] = data
-                    return data
-            if r.status_code in (429, 503):
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            break
-        except requests.RequestException:
-            time.sleep(1.0 * (attempt + 1))
-            continue
-    return {}
+from phase_timer import mark
+from rdf_output import write_outputs
+from wikidata import fetch_wikidata, prefetch
 
 def get_claim_vals(entity, prop, expect="auto"):
     vals = []
@@ -120,6 +92,7 @@ def add_bilingual(g: Graph, uri: URIRef, label_de: str, label_en: str) -> None:
 # -----------------------------------------------------------------------
 # Einmalige Knoten / Typen
 # -----------------------------------------------------------------------
+mark("Einmalige Knoten / Typen")
 
 # ID-Typen
 g.add((SD["id_type/sappho-digital"], RDF.type, ECRM.E55_Type))
@@ -215,6 +188,7 @@ g.add((SD["work_creation/sappho-work"], LRMOO.R16_created, SD["work/sappho-work"
 # -----------------------------------------------------------------------
 # Andreas Bagordos Ausgabe
 # -----------------------------------------------------------------------
+mark("Andreas Bagordos Ausgabe")
 manifestation_uri         = SD["manifestation/sappho_bagordo"]
 manifestation_creation_uri = SD["manifestation_creation/sappho_bagordo"]
 title_uri                 = SD["title/manifestation/sappho_bagordo"]
@@ -261,9 +235,17 @@ g.add((time_span_uri, RDF.type, ECRM["E52_Time-Span"]))
 g.add((time_span_uri, RDFS.label, Literal("2009", datatype=XSD.gYear)))
 g.add((time_span_uri, ECRM["P4i_is_time-span_of"], manifestation_creation_uri))
 
+# -----------------------------------------------------------------------
+# Wikidata vorab laden
+# -----------------------------------------------------------------------
+mark("Wikidata vorab laden")
+with open(INPUT_FILE, newline='', encoding="utf-8") as f:
+    prefetch(row["Wikidata Link"].split("/")[-1] for row in csv.DictReader(f, delimiter=';'))
+
 # -----------------------------------------------------------------------
 # Fragmente einlesen
 # -----------------------------------------------------------------------
+mark("Fragmente einlesen")
 all_expressions = []
 all_fragments = []
 
@@ -391,11 +373,5 @@ for expr_uri in all_expressions:
 # -----------------------------------------------------------------------
 # Speichern
 # -----------------------------------------------------------------------
-Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
-g.serialize(destination=OUTPUT_FILE, format="turtle")
-
-xml_output = OUTPUT_FILE.replace(".ttl", ".rdf")
-g.serialize(destination=xml_output, format="pretty-xml")
-
-jsonld_output = OUTPUT_FILE.replace(".ttl", ".jsonld")
-g.serialize(destination=jsonld_output, format="json-ld")
\ No newline at end of file
+mark("Speichern")
+write_outputs(g, OUTPUT_FILE)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+from rdflib import Graph
+
+# -----------------------------------------------------------------------
+# Inkrementelles Harvesting für authors.py und works.py
+#
+# Jeder Eintrag (bibl bzw. Autor_in, Schlüssel = xml:id) erzeugt seine
+# Tripel in einem eigenen Graphen. Gespeichert werden je Eintrag der Hash
+# seines XML (samt referenzierter QIDs) und seine Tripel. Beim nächsten
+# Lauf werden nur neue oder geänderte Einträge neu erzeugt; die Ausgabe
+# ist immer die Vereinigung aus den globalen Tripeln des Skripts und den
+# Tripeln aller aktuellen Einträge – entfernte Einträge fallen so heraus,
+# gemeinsam genutzte Knoten (Orte, Typen, ...) bleiben erhalten, solange
+# ein Eintrag sie erzeugt.
+#
+# Ändert sich der Kontext (Skript, Wikidata-Projektion, ...), wird alles
+# neu erzeugt; ebenso mit "--full" auf der Kommandozeile. Wikidata-Daten
+# unveränderter Einträge werden erst mit --full aufgefrischt: die Skripte
+# reichen full als prefetch(..., refresh=True) weiter, der SQLite-Cache
+# wird dann für alle Einträge übergangen.
+# -----------------------------------------------------------------------
+
+STATE_DIR = (Path(__file__).resolve().parent / "../.cache/harvest").resolve()
+
+
+def content_hash(parts: Iterable[bytes]) -> str:
+    """Hash über die (sortierten, eindeutigen) Teile eines Eintrags."""
+    h = hashlib.sha256()
+    for part in sorted(set(parts)):
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def file_digest(path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class HarvestState:
+    def __init__(self, name: str, context: dict, full: bool = False):
+        self.path = STATE_DIR / f"{name}.pickle"
+        self.full = full
+        self.context = json.dumps(context, sort_keys=True)
+        self.hashes: dict[str, Optional[str]] = {}
+        self.graphs: dict[str, Graph] = {}
+        self.old_hashes: dict[str, Optional[str]] = {}
+        self.old_triples: dict[str, list] = {}
+        self.changed: set[str] = set()
+        self.incomplete: set[str] = set()
+        if not full:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as fh:
+                state = pickle.load(fh)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            # Abgebrochen geschrieben, andere Python-/rdflib-Version, ...
+            print(f"[INFO] Zustand {self.path} nicht lesbar ({type(e).__name__}: {e}) "
+                  "– alle Einträge werden neu erzeugt.")
+            return
+        if not isinstance(state, dict) or state.get("context") != self.context:
+            print("[INFO] Skript oder Kontext geändert – alle Einträge werden neu erzeugt.")
+            return
+        self.old_hashes = state["hashes"]
+        self.old_triples = state["triples"]
+
+    def plan(self, entries: dict[str, Iterable[bytes]]) -> set[str]:
+        """Legt die aktuellen Einträge fest; liefert die neu zu erzeugenden Schlüssel."""
+        self.hashes = {key: content_hash(parts) for key, parts in entries.items()}
+        changed = {key for key, h in self.hashes.items()
+                   if self.old_hashes.get(key) is None or self.old_hashes[key] != h}
+        removed = self.old_hashes.keys() - self.hashes.keys()
+        print(f"[INFO] Einträge: {len(self.hashes)}, davon neu/geändert {len(changed)}, "
+              f"entfernt {len(removed)}")
+        self.changed = changed
+        return changed
+
+    def graph(self, key: str) -> Optional[Graph]:
+        """Graph für die Tripel eines Eintrags; None, wenn der Eintrag unverändert ist."""
+        if key not in self.changed:
+            return None
+        if key not in self.graphs:
+            self.graphs[key] = Graph()
+        return self.graphs[key]
+
+    def mark_incomplete(self, key: str) -> None:
+        """Eintrag beim nächsten Lauf erneut erzeugen (z. B. Wikidata-Abruf fehlgeschlagen)."""
+        self.incomplete.add(key)
+
+    def finish(self, base: Graph) -> Graph:
+        """Fügt die Tripel aller aktuellen Einträge zu base hinzu und speichert den Zustand."""
+        t0 = time.perf_counter()
+        triples: dict[str, list] = {}
+        for key in self.hashes:
+            if key in self.changed:
+                g_entry = self.graphs.get(key)
+                triples[key] = list(g_entry) if g_entry is not None else []
+            else:
+                triples[key] = self.old_triples.get(key, [])
+            base.addN((s, p, o, base) for s, p, o in triples[key])
+
+        hashes = {key: (None if key in self.incomplete else h) for key, h in self.hashes.items()}
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        # Eindeutige Temp-Datei: parallele Läufe schreiben nicht in dieselbe Datei
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp, "wb") as fh:
+                pickle.dump({"context": self.context, "hashes": hashes, "triples": triples},
+                            fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        print(f"[OK] Einträge zusammengeführt: {len(base)} Tripel "
+              f"({len(self.changed)} neu erzeugt; {time.perf_counter() - t0:.2f}s)")
+        return base
@@ -2,9 +2,12 @@ import re
 import sys
 import xml.etree.ElementTree as ET
 from typing import Optional
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, RDFS
 
+from phase_timer import mark
+from triple_index import load_index
+
 LRMOO = Namespace("http://iflastandards.info/ns/lrm/lrmoo/")
 INTRO  = Namespace("https://w3id.org/lso/intro/currentbeta#")
 ECRM   = Namespace("http://erlangen-crm.org/current/")
@@ -12,12 +15,13 @@ ECRM   = Namespace("http://erlangen-crm.org/current/")
 
 def main(ttl_path: str, xml_out: str) -> None:
     print(f"Lese {ttl_path} ...", file=sys.stderr)
-    g = Graph()
-    g.parse(ttl_path, format="turtle")
+    mark("Laden")
+    g = load_index(ttl_path)
     n_triples = len(g)
     print(f"  {n_triples} Tripel geladen.", file=sys.stderr)
 
     # ── F2_Expressions aufteilen ──────────────────────────────────────────────
+    mark("F2_Expressions aufteilen")
     F2_Expression = LRMOO.F2_Expression
     sappho_f2    = set()
     reception_f2 = set()
@@ -31,12 +35,14 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  Rezeptionszeugnisse: {n_reception}", file=sys.stderr)
 
     # ── Autor_innen ───────────────────────────────────────────────────────────
+    mark("Autor_innen")
     E21_Person = ECRM["E21_Person"]
     n_authors = sum(1 for p in g.subjects(RDF.type, E21_Person)
                     if "/author_" in str(p))
     print(f"  Autor_innen: {n_authors}", file=sys.stderr)
 
     # ── Aktualisierungen aufbauen (für analysierte Texte) ─────────────────────
+    mark("Aktualisierungen aufbauen (für analysierte Texte)")
     R18 = INTRO.R18_showsActualization
     R17 = INTRO.R17_actualizesFeature
     act_to_feats: dict = {}
@@ -44,6 +50,7 @@ def main(ttl_path: str, xml_out: str) -> None:
         act_to_feats.setdefault(act, set()).add(feat)
 
     # ── Exemplarisch analysierte Texte ────────────────────────────────────────
+    mark("Exemplarisch analysierte Texte")
     reception_with_act: set = set()
     for f2 in reception_f2 | sappho_f2:
         for _, _, act in g.triples((f2, R18, None)):
@@ -54,11 +61,13 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  Exemplarisch analysierte Texte: {n_analysed}", file=sys.stderr)
 
     # ── INT31-Beziehungen ─────────────────────────────────────────────────────
+    mark("INT31-Beziehungen")
     INT31 = INTRO["INT31_IntertextualRelation"]
     n_int31 = sum(1 for _ in g.subjects(RDF.type, INT31))
     print(f"  INT31-Beziehungen: {n_int31}", file=sys.stderr)
 
     # ── Zeitspanne der Rezeptionszeugnisse ────────────────────────────────────
+    mark("Zeitspanne der Rezeptionszeugnisse")
     P4               = ECRM["P4_has_time-span"]
     R17i_cb          = LRMOO["R17i_was_created_by"]
     R4i_embodied     = LRMOO["R4i_is_embodied_in"]
@@ -94,6 +103,7 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  Zeitspanne: {year_min}–{year_max}", file=sys.stderr)
 
     # ── XML schreiben ─────────────────────────────────────────────────────────
+    mark("XML schreiben")
     root = ET.Element("homepage-counter")
     root.set("nTriples",   str(n_triples))
     root.set("nReception", str(n_reception))
@@ -1,9 +1,19 @@
 from pathlib import Path
+import argparse
+import hashlib
+import json
 import sys
 import re
+import time
+from typing import Iterable, Optional
 from rdflib import Graph, Namespace, URIRef, BNode, Literal, RDF, RDFS, OWL
 from rdflib.collection import Collection
 
+from phase_timer import mark, phase
+from rdf_output import FORMATS, selected_formats, write_outputs
+from rdf_snapshot import Snapshot, open_snapshot, write_snapshot
+from triple_index import TripleIndex
+
 # Namespaces
 
 ECRM = Namespace("http://erlangen-crm.org/current/")
@@ -12,48 +22,183 @@ INTRO = Namespace("https://w3id.org/lso/intro/currentbeta#")
 PROV = Namespace("http://www.w3.org/ns/prov#")
 SAPPHO = Namespace("https://sappho-digital.com/")
 
-# Helpers
+ORDER = [
+    "authors.ttl",
+    "works.ttl",
+    "fragments.ttl",
+    "analysis.ttl",
+    "relations.ttl",
+]
 
-def merge_with_precedence(base_dir: Path, out_path: Path) -> Graph:
-    order = [
-        "authors.ttl",
-        "works.ttl",
-        "fragments.ttl",
-        "analysis.ttl",
-        "relations.ttl",
-    ]
+# Cache für den inkrementellen Merge: Manifest + ein Snapshot je Eingabe
+CACHE_DIR = (Path(__file__).resolve().parent / "../.cache/merge").resolve()
+MANIFEST = CACHE_DIR / "manifest.json"
 
+# Helpers
+
+def input_files(base_dir: Path, out_path: Path) -> list[Path]:
     files = []
-    for name in order:
+    for name in ORDER:
         p = (base_dir / name).resolve()
         if not p.exists():
             raise FileNotFoundError(f"{name} fehlt im Eingabeordner {base_dir}")
         if p == out_path:
             continue
         files.append(p)
-
+    return files
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def input_cache_path(path: Path) -> Path:
+    return CACHE_DIR / f"{path.stem}.snap"
+
+def parse_input(path: Path) -> Optional[Graph]:
+    t0 = time.perf_counter()
+    g_tmp = Graph()
+    try:
+        with phase(path.name):
+            g_tmp.parse(path.as_posix(), format="turtle")
+    except Exception as e:
+        print(f"[WARN] Konnte {path.name} nicht parsen: {e}")
+        return None
+    print(f"[OK] Gelesen: {path.name} ({len(g_tmp)} Tripel; {time.perf_counter() - t0:.2f}s)")
+    return g_tmp
+
+def resolve_precedence(sources: Iterable[tuple[str, Iterable[tuple]]]) -> tuple[dict, list]:
+    """Spätere Quelle gewinnt je (Subjekt, Prädikat); Blank-Node-Subjekte werden nie ersetzt."""
+    # (s, p) -> Objekte aus der letzten Quelle, die (s, p) enthält
+    owned: dict[tuple, list] = {}
+    unowned: list[tuple] = []
+    for name, triples in sources:
+        t0 = time.perf_counter()
+        local: dict[tuple, list] = {}
+        for s, p, o in triples:
+            if isinstance(s, URIRef):
+                local.setdefault((s, p), []).append(o)
+            else:
+                unowned.append((s, p, o))
+        owned.update(local)
+        print(f"[OK] Gemerged: {name} ({sum(map(len, local.values()))} Tripel; "
+              f"Index {time.perf_counter() - t0:.2f}s)")
+    return owned, unowned
+
+def materialize(owned: dict, unowned: list, base: Iterable[tuple] = ()) -> Graph:
+    t0 = time.perf_counter()
     g_merged = Graph()
     bind_namespaces(g_merged)
+    g_merged.addN((s, p, o, g_merged) for s, p, o in base)
+    g_merged.addN((s, p, o, g_merged) for (s, p), objs in owned.items() for o in objs)
+    g_merged.addN((s, p, o, g_merged) for s, p, o in unowned)
+    print(f"[OK] Materialisiert: {len(g_merged)} Tripel ({time.perf_counter() - t0:.2f}s)")
+    return g_merged
 
+def merge_with_precedence(base_dir: Path, out_path: Path) -> tuple[Graph, dict]:
+    """Vollständiger Merge; liefert den Graphen und die zu speichernden Eingabe-Snapshots."""
+    graphs = []
+    pending: dict[Path, Optional[Graph]] = {}
+    for path in input_files(base_dir, out_path):
+        g_tmp = parse_input(path)
+        pending[path] = g_tmp
+        if g_tmp is not None:
+            graphs.append((path, g_tmp))
+
+    owned, unowned = resolve_precedence((path.name, g_tmp) for path, g_tmp in graphs)
+    return materialize(owned, unowned), pending
+
+def merge_incremental(files: list[Path], hashes: dict, manifest: dict,
+                      out_path: Path) -> Optional[tuple[Graph, dict]]:
+    """Mischt nur die Subjekte neu, die in geänderten Eingaben vorkommen.
+
+    Liefert den Graphen und die zu speichernden Eingabe-Snapshots, oder None,
+    wenn ein vollständiger Neuaufbau nötig ist.
+    """
+    if manifest.get("order") != [p.name for p in files]:
+        return None
+    if not all(input_cache_path(p).exists() for p in files):
+        return None
+    if not out_path.exists() or manifest.get("output") != file_hash(out_path):
+        print("[INFO] Vorheriges Merge-Ergebnis fehlt oder wurde verändert.")
+        return None
+    prev = open_snapshot(out_path)
+    if prev is None:
+        return None
+
+    changed = [p for p in files if manifest["inputs"].get(p.name) != hashes[p.name]]
+    print(f"[INFO] Geänderte Eingaben: {', '.join(p.name for p in changed)}")
+
+    sources: dict[Path, object] = {}
+    affected: set = set()
     for path in files:
-        g_tmp = Graph()
-        try:
-            g_tmp.parse(path.as_posix(), format="turtle")
-        except Exception as e:
-            print(f"[WARN] Konnte {path.name} nicht parsen: {e}")
+        cached = TripleIndex(Snapshot(input_cache_path(path)))
+        if path not in changed:
+            sources[path] = cached
             continue
-
-        for s in set(s for s in g_tmp.subjects() if isinstance(s, URIRef)):
-            preds_in_tmp = {p for _, p, _ in g_tmp.triples((s, None, None))}
-            for p in preds_in_tmp:
-                g_merged.remove((s, p, None))
-
-        for t in g_tmp:
-            g_merged.add(t)
-
-        print(f"[OK] Gemerged: {path.name} ({len(g_tmp)} Tripel)")
-
-    return g_merged
+        g_new = parse_input(path)
+        if g_new is None:
+            return None
+        subjects = set(cached.subjects(unique=True)) | set(g_new.subjects(unique=True))
+        if not all(isinstance(s, URIRef) for s in subjects):
+            print(f"[INFO] {path.name} enthält Blank Nodes – vollständiger Neuaufbau.")
+            return None
+        affected |= subjects
+        sources[path] = g_new
+    print(f"[INFO] Betroffene Subjekte: {len(affected)}")
+
+    def affected_triples(source):
+        for s in affected:
+            yield from source.triples((s, None, None))
+
+    owned, unowned = resolve_precedence((p.name, affected_triples(sources[p])) for p in files)
+    base = (t for t in TripleIndex(prev) if t[0] not in affected)
+    g_merged = materialize(owned, unowned, base)
+    return g_merged, {path: sources[path] for path in changed}
+
+def load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(files: list[Path], hashes: dict, out_path: Path, written: dict[str, Path]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST.write_text(json.dumps({
+        "order": [p.name for p in files],
+        "inputs": hashes,
+        "output": file_hash(out_path),
+        # Je geschriebenem Format der Hash der Ausgabe
+        "outputs": {fmt: file_hash(path) for fmt, path in written.items()},
+    }, indent=2), encoding="utf-8")
+
+def save_state(files: list[Path], hashes: dict, out_path: Path, written: dict[str, Path],
+               pending: dict[Path, Optional[Graph]]) -> None:
+    """Speichert Eingabe-Snapshots und Manifest gemeinsam, erst nach geschriebener Ausgabe.
+
+    Snapshots mit neuen Eingaben und ein Manifest mit alten Hashes ließen den
+    nächsten inkrementellen Merge neu mit neu vergleichen (entfernte Subjekte
+    blieben stehen); daher zuerst das Manifest löschen, zuletzt neu schreiben.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST.unlink(missing_ok=True)
+    for path, g in pending.items():
+        if g is None:
+            input_cache_path(path).unlink(missing_ok=True)
+        else:
+            write_snapshot(g, path, input_cache_path(path))
+    save_manifest(files, hashes, out_path, written)
+
+def outputs_current(manifest: dict, out_path: Path) -> bool:
+    """True, wenn alle gewählten Formate existieren und zum Manifest passen."""
+    recorded = manifest.get("outputs", {})
+    for fmt in selected_formats():
+        path = out_path.with_suffix(FORMATS[fmt][0])
+        if fmt not in recorded or not path.exists() or recorded[fmt] != file_hash(path):
+            return False
+    return True
 
 def bind_namespaces(g: Graph):
     g.bind("ecrm", ECRM, override=True)
@@ -64,32 +209,44 @@ def bind_namespaces(g: Graph):
 # Main
 
 def main():
+    parser = argparse.ArgumentParser(description="Führt die RDF-Dateien zu sappho-reception zusammen.")
+    parser.add_argument("--full", action="store_true",
+        help="Vollständiger Neuaufbau statt inkrementellem Merge")
+    args = parser.parse_args()
+
     base_dir = Path("../data/rdf").resolve()
     out_path = (base_dir / "sappho-reception.ttl").resolve()
 
     if not base_dir.exists():
         sys.exit(f"Verzeichnis nicht gefunden: {base_dir}")
 
-    g = merge_with_precedence(base_dir, out_path)
-
-    # Turtle
-    tmp_ttl = out_path.with_suffix(".ttl.tmp")
-    g.serialize(destination=tmp_ttl.as_posix(), format="turtle", encoding="utf-8")
-    Path(tmp_ttl).replace(out_path)
-
-    # RDF/XML
-    rdf_out = out_path.with_suffix(".rdf")       
-    tmp_rdf = rdf_out.with_suffix(".rdf.tmp")
-    g.serialize(destination=tmp_rdf.as_posix(), format="pretty-xml", encoding="utf-8")
-    Path(tmp_rdf).replace(rdf_out)
-
-    # JSON-LD
-    jsonld_out = out_path.with_suffix(".jsonld")
-    tmp_jsonld = jsonld_out.with_suffix(".jsonld.tmp")
-    g.serialize(destination=tmp_jsonld.as_posix(), format="json-ld", encoding="utf-8")
-    Path(tmp_jsonld).replace(jsonld_out)
-
-    print(f"\nFertig. Dateien gespeichert:\n  {out_path}\n  {rdf_out}")
+    mark("Eingaben prüfen")
+    files = input_files(base_dir, out_path)
+    hashes = {p.name: file_hash(p) for p in files}
+    manifest = {} if args.full else load_manifest()
+
+    if manifest.get("inputs") == hashes and outputs_current(manifest, out_path):
+        print("Eingaben unverändert – nichts zu tun.")
+        return
+
+    mark("Merge")
+    result = merge_incremental(files, hashes, manifest, out_path) if manifest else None
+    if result is None:
+        result = merge_with_precedence(base_dir, out_path)
+    g, pending = result
+
+    # Turtle, RDF/XML, JSON-LD + Binär-Snapshot für die lesenden Skripte (statistics, network, ...)
+    mark("Ausgabe")
+    written = write_outputs(g, out_path, snapshot=True)
+
+    # Ohne neues Turtle passt das Manifest nicht zum Ergebnis; Snapshots und
+    # Manifest bleiben dann auf dem alten Stand
+    if "turtle" in written:
+        save_state(files, hashes, out_path, written, pending)
+
+    print("\nFertig. Dateien gespeichert:")
+    for path in written.values():
+        print(f"  {path}")
     print(f"Gesamtzahl Tripel: {len(g)}")
 
 if __name__ == "__main__":
@@ -4,7 +4,10 @@ import xml.etree.ElementTree as ET
 from xml.dom import minidom
 from pathlib import Path
 from collections import defaultdict
-from rdflib import Graph, BNode, Literal, URIRef
+from rdflib import BNode, Literal, URIRef
+
+from phase_timer import mark, note
+from triple_index import load_index
 
 
 INPUT_FILE  = sys.argv[1] if len(sys.argv) > 1 else "./sappho-digital/data/rdf/sappho-reception.ttl"
@@ -569,16 +572,19 @@ def pretty_print(root):
 
 
 def main():
+    mark("Laden")
     print(f"Lade RDF: {INPUT_FILE}")
-    g = Graph()
-    g.parse(INPUT_FILE)
+    g = load_index(INPUT_FILE)
     total_triples = len(g)
     print(f"Tripel: {total_triples:,}")
+    note("triples", total_triples)
 
+    mark("Graphdaten")
     nodes, edges, labels = build_graph_data(g)
     class_stats          = build_class_stats(nodes)
     int31_neighbors      = compute_int31_neighbors(nodes, edges)
 
+    mark("URLs auflösen")
     print("Löse URLs auf …")
 
     url_map, warnings = resolve_all_urls(nodes, g, labels)
@@ -591,6 +597,7 @@ def main():
     else:
         print("✓ Alle URLs erfolgreich aufgelöst.")
 
+    mark("XML schreiben")
     root    = build_xml(nodes, edges, class_stats, int31_neighbors, total_triples, url_map)
     xml_str = pretty_print(root)
     Path(OUTPUT_FILE).write_text(xml_str, encoding="utf-8")
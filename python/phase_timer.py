@@ -0,0 +1,153 @@
+import atexit
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional
+
+# -----------------------------------------------------------------------
+# Phasen-Zeitmessung für die Pipeline-Skripte
+#
+# Die Skripte markieren ihre Abschnitte mit mark("Name") (beendet die
+# vorige Phase) oder "with phase("Name"):" (verschachtelbar). Ist die
+# Messung abgeschaltet, kehren beide sofort zurück.
+#
+#   SAPPHO_TIMING=1 python3 statistics.py ...   Zeiten je Phase
+#   SAPPHO_PROFILE=1 python3 statistics.py ...  zusätzlich cProfile je Phase
+#
+# Bei Programmende landen die Zeiten in .cache/timing/<skript>.json, eine
+# Zeile je Lauf in .cache/timing/history.jsonl (für Vergleiche über die
+# Zeit); Profile als <skript>.<nr>-<phase>.prof, lesbar mit
+#   python3 -m pstats ../.cache/timing/statistics.02-indizes.prof
+# SAPPHO_TIMING_DIR setzt ein anderes Zielverzeichnis.
+# -----------------------------------------------------------------------
+
+ENV_TIMING = "SAPPHO_TIMING"
+ENV_PROFILE = "SAPPHO_PROFILE"
+ENV_DIR = "SAPPHO_TIMING_DIR"
+
+REPORT_DIR = (Path(__file__).resolve().parent / "../.cache/timing").resolve()
+
+
+def _flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no")
+
+
+PROFILE = _flag(ENV_PROFILE)
+ENABLED = PROFILE or _flag(ENV_TIMING)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9äöüß]+", "-", name.lower()).strip("-") or "phase"
+
+
+class _Timer:
+    def __init__(self):
+        self.script = Path(sys.argv[0]).stem or "python"
+        self.started = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.t0 = time.perf_counter()
+        self.phases: list[dict] = []
+        self.notes: dict = {}
+        self.stack: list[dict] = []
+        self.marked: Optional[dict] = None
+        self.profiler: Optional[cProfile.Profile] = None
+        self.out_dir = Path(os.environ[ENV_DIR]).resolve() if os.environ.get(ENV_DIR) else REPORT_DIR
+        atexit.register(self.report)
+
+    def open(self, name: str) -> dict:
+        parents = ([self.marked["name"]] if self.marked else []) + [e["name"] for e in self.stack]
+        entry = {"name": "/".join(parents + [name]),
+                 "start": round(time.perf_counter() - self.t0, 4)}
+        self.phases.append(entry)
+        # Nur eine cProfile-Instanz kann laufen: Profil je Phase der obersten Ebene
+        if PROFILE and self.profiler is None:
+            self.profiler = cProfile.Profile()
+            entry["_profiler"] = self.profiler
+            self.profiler.enable()
+        return entry
+
+    def close(self, entry: dict) -> None:
+        entry["duration"] = round(time.perf_counter() - self.t0 - entry["start"], 4)
+        prof = entry.pop("_profiler", None)
+        if prof is not None:
+            prof.disable()
+            self.profiler = None
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            nr = sum(1 for p in self.phases if "profile" in p) + 1
+            path = self.out_dir / f"{self.script}.{nr:02d}-{_slug(entry['name'])}.prof"
+            prof.dump_stats(path)
+            entry["profile"] = path.name
+
+    def mark(self, name: Optional[str]) -> None:
+        while self.stack:
+            self.close(self.stack.pop())
+        if self.marked is not None:
+            self.close(self.marked)
+            self.marked = None
+        if name is not None:
+            self.marked = self.open(name)
+
+    @contextmanager
+    def phase(self, name: str):
+        entry = self.open(name)
+        self.stack.append(entry)
+        try:
+            yield
+        finally:
+            if self.stack and self.stack[-1] is entry:
+                self.stack.pop()
+                self.close(entry)
+
+    def report(self) -> None:
+        self.mark(None)
+        total = time.perf_counter() - self.t0
+        data = {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started": self.started,
+            "total": round(total, 4),
+            "notes": self.notes,
+            "phases": self.phases,
+        }
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.out_dir / f"{self.script}.json"
+            path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            with open(self.out_dir / "history.jsonl", "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(data, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[WARN] Zeitbericht nicht geschrieben: {e}", file=sys.stderr)
+            return
+
+        width = max((len(p["name"]) for p in self.phases), default=5)
+        print(f"\n[TIMING] {self.script}: {total:.2f}s gesamt -> {path}", file=sys.stderr)
+        for p in self.phases:
+            share = p["duration"] / total * 100 if total else 0.0
+            print(f"  {p['name']:<{width}} {p['duration']:>8.2f}s {share:5.1f}%", file=sys.stderr)
+
+
+# Gesamtzeit ab dem ersten Import dieses Moduls
+_timer: Optional[_Timer] = _Timer() if ENABLED else None
+
+
+def mark(name: str) -> None:
+    """Beendet die laufende Phase und beginnt die nächste (für Skripte auf Modulebene)."""
+    if ENABLED:
+        _timer.mark(name)
+
+
+def phase(name: str):
+    """Kontextmanager für eine (Unter-)Phase; ohne SAPPHO_TIMING ein nullcontext."""
+    if not ENABLED:
+        return nullcontext()
+    return _timer.phase(name)
+
+
+def note(key: str, value) -> None:
+    """Legt eine Kennzahl (z. B. Tripelzahl) im Bericht ab."""
+    if ENABLED:
+        _timer.notes[key] = value
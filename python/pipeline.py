@@ -0,0 +1,218 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import build_cache
+
+# -----------------------------------------------------------------------
+# Pipeline-Runner für die Datengenerierung
+#
+# Die Skripte sind als Abhängigkeitsgraph mit Ein- und Ausgaben deklariert;
+# ein Knoten hängt von jedem Knoten ab, der eine seiner Eingaben erzeugt.
+# Unabhängige Knoten laufen gleichzeitig, jeder als eigener Prozess
+# (authors/works/fragments parallel, danach statistics/network/... nach
+# dem Merge). Die Update-Schritte laufen über den Build-Cache.
+#
+# Verwendung:
+#   python3 pipeline.py                    alles
+#   python3 pipeline.py statistics          statistics samt Vorgängern
+#   python3 pipeline.py -j 2 --no-cache
+#
+# Die Ausgabe jedes Knotens landet in .cache/pipeline/<knoten>.log.
+# -----------------------------------------------------------------------
+
+HERE = Path(__file__).resolve().parent
+LOG_DIR = (HERE / "../.cache/pipeline").resolve()
+
+MERGED_TTL = "../data/rdf/sappho-reception.ttl"
+RECEPTION_CSV = "../data/reception-indices.csv"
+
+# Auswertungen auf dem gemergten Graphen (Pfade wie in build.xml)
+ANALYTICS = {
+    "homepage-counter": {
+        "cmd": ["homepage-counter.py", MERGED_TTL, "../html/homepage-counter.xml"],
+        "inputs": [MERGED_TTL],
+        "outputs": ["../html/homepage-counter.xml"],
+    },
+    "reception-index": {
+        "cmd": ["reception-index.py"],
+        "inputs": [MERGED_TTL],
+        "outputs": [RECEPTION_CSV],
+    },
+    # ergänzt reception-indices.csv um Autor:innen-Spalten
+    "statistics": {
+        "cmd": ["statistics.py", MERGED_TTL, "../html/statistics-data.xml"],
+        "inputs": [MERGED_TTL, RECEPTION_CSV],
+        "outputs": ["../html/statistics-data.xml"],
+    },
+    "network": {
+        "cmd": ["network.py", MERGED_TTL, "../html/network-data.xml"],
+        "inputs": [MERGED_TTL],
+        "outputs": ["../html/network-data.xml"],
+    },
+}
+
+
+def build_nodes() -> dict[str, dict]:
+    nodes = {}
+    for name, step in build_cache.STEPS.items():
+        nodes[name] = {"cmd": [step["script"]], "inputs": step["inputs"],
+                       "outputs": step["outputs"], "cached": True}
+    for name, node in ANALYTICS.items():
+        nodes[name] = dict(node, cached=False)
+
+    producer = {}
+    for name, node in nodes.items():
+        for out in node["outputs"]:
+            producer[os.path.normpath(out)] = name
+    for name, node in nodes.items():
+        node["deps"] = sorted({producer[p] for p in map(os.path.normpath, node["inputs"])
+                               if p in producer and producer[p] != name})
+    return nodes
+
+
+def with_ancestors(nodes: dict, targets: list[str]) -> set[str]:
+    selected, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(nodes[name]["deps"])
+    return selected
+
+
+# ---------------- Ausführen ----------------
+
+_print_lock = threading.Lock()
+
+def log(msg: str) -> None:
+    with _print_lock:
+        print(msg, flush=True)
+
+def run_node(name: str, node: dict, use_cache: bool, force: bool) -> Optional[str]:
+    """Führt einen Knoten aus; liefert "ok"/"cache" oder None bei Fehler."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_DIR / f"{name}.log", "w", encoding="utf-8") as fh:
+        if node["cached"] and use_cache:
+            return build_cache.run_step(name, force, log=fh)
+        result = subprocess.run([sys.executable, *node["cmd"]], cwd=HERE,
+                                stdout=fh, stderr=subprocess.STDOUT)
+    return "ok" if result.returncode == 0 else None
+
+
+def run_pipeline(nodes: dict, selected: set[str], jobs: int, use_cache: bool, force: bool) -> dict:
+    """Startet jeden Knoten, sobald seine Vorgänger fertig sind; liefert die Zeiten je Knoten."""
+    timings: dict[str, dict] = {}
+    done: set[str] = set()
+    failed: set[str] = set()
+    pending = set(selected)
+    running = {}
+    t_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            changed = True
+            while changed:
+                changed = False
+                for name in sorted(pending):
+                    deps = [d for d in nodes[name]["deps"] if d in selected]
+                    if any(d in failed for d in deps):
+                        log(f"[SKIP] {name}: Vorgänger fehlgeschlagen")
+                        failed.add(name)
+                    elif all(d in done for d in deps):
+                        log(f"[START] {name}")
+                        timings[name] = {"start": time.perf_counter() - t_start}
+                        running[pool.submit(run_node, name, nodes[name], use_cache, force)] = name
+                    else:
+                        continue
+                    pending.discard(name)
+                    changed = True
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                t = timings[name]
+                t["end"] = time.perf_counter() - t_start
+                t["duration"] = t["end"] - t["start"]
+                try:
+                    status = fut.result()
+                except Exception as e:
+                    log(f"[FEHLER] {name}: {e}")
+                    status = None
+                t["status"] = status or "fehler"
+                if status is None:
+                    failed.add(name)
+                    log(f"[FEHLER] {name} ({t['duration']:.1f}s) – siehe {LOG_DIR / (name + '.log')}")
+                else:
+                    done.add(name)
+                    log(f"[{status.upper()}] {name} ({t['duration']:.1f}s)")
+    return timings
+
+
+# ---------------- Bericht ----------------
+
+def critical_path(nodes: dict, timings: dict) -> tuple[float, list[str]]:
+    """Längste Kette abhängiger Knoten, gemessen an ihren Laufzeiten."""
+    best: dict[str, tuple[float, list[str]]] = {}
+
+    def visit(name: str) -> tuple[float, list[str]]:
+        if name not in best:
+            prev = max((visit(d) for d in nodes[name]["deps"] if d in timings),
+                       default=(0.0, []), key=lambda x: x[0])
+            best[name] = (prev[0] + timings[name].get("duration", 0.0), prev[1] + [name])
+        return best[name]
+
+    return max((visit(n) for n in timings), default=(0.0, []), key=lambda x: x[0])
+
+def print_report(nodes: dict, timings: dict, wall: float) -> None:
+    print(f"\n{'Knoten':<18} {'Start':>7} {'Dauer':>7}  Status")
+    for name, t in sorted(timings.items(), key=lambda kv: kv[1]["start"]):
+        print(f"{name:<18} {t['start']:>6.1f}s {t.get('duration', 0.0):>6.1f}s  {t.get('status', '-')}")
+    total = sum(t.get("duration", 0.0) for t in timings.values())
+    length, path = critical_path(nodes, timings)
+    print(f"\nGesamtzeit: {wall:.1f}s (Summe aller Knoten {total:.1f}s, Parallelität {total / wall if wall else 0:.1f}x)")
+    print(f"Kritischer Pfad ({length:.1f}s): {' → '.join(path)}")
+
+# ---------------- Main ----------------
+
+def main():
+    nodes = build_nodes()
+    parser = argparse.ArgumentParser(description="Datengenerierung als paralleler Abhängigkeitsgraph.")
+    parser.add_argument("targets", nargs="*", metavar="knoten",
+        help=f"Zielknoten samt Vorgängern ({', '.join(nodes)}); Standard: alle")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Anzahl gleichzeitiger Knoten (Standard: CPU-Kerne)")
+    parser.add_argument("--no-cache", action="store_true",
+        help="Update-Schritte ohne Build-Cache ausführen")
+    parser.add_argument("--force", action="store_true",
+        help="Build-Cache ignorieren, Ergebnisse aber neu ablegen")
+    parser.add_argument("--list", action="store_true",
+        help="Knoten und Abhängigkeiten anzeigen")
+    args = parser.parse_args()
+
+    unknown = [t for t in args.targets if t not in nodes]
+    if unknown:
+        parser.error(f"unbekannte Knoten: {', '.join(unknown)}")
+
+    if args.list:
+        for name, node in nodes.items():
+            print(f"{name:<18} <- {', '.join(node['deps']) or '-'}")
+        return
+
+    selected = with_ancestors(nodes, args.targets) if args.targets else set(nodes)
+    t0 = time.perf_counter()
+    timings = run_pipeline(nodes, selected, max(1, args.jobs), not args.no_cache, args.force)
+    print_report(nodes, timings, time.perf_counter() - t0)
+
+    if any(t.get("status") == "fehler" for t in timings.values()) or len(timings) < len(selected):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from rdflib import Graph
+
+from phase_timer import note, phase
+from rdf_snapshot import PathLike, Snapshot, atomic_write, attach_snapshot, write_snapshot
+from rdf_writers import write_jsonld, write_rdfxml, write_turtle
+
+# -----------------------------------------------------------------------
+# Gemeinsame Ausgabestufe der RDF-Skripte
+#
+# Schreibt einen Graphen parallel als Turtle, RDF/XML und JSON-LD. Alle
+# Formate lesen aus einem temporären Binär-Snapshot: Turtle streamt im
+# Hauptprozess direkt daraus, die übrigen Formate laufen in
+# Worker-Prozessen.
+#
+# Mit SAPPHO_RDF_FORMATS lassen sich Formate abwählen, z. B.
+#   SAPPHO_RDF_FORMATS=turtle python3 works.py
+# SAPPHO_RDF_WRITER=rdflib schaltet auf die rdflib-Serializer zurück.
+# -----------------------------------------------------------------------
+
+ENV_FORMATS = "SAPPHO_RDF_FORMATS"
+ENV_WRITER = "SAPPHO_RDF_WRITER"
+
+# Format -> (Dateiendung, rdflib-Serializer)
+FORMATS = {
+    "turtle": (".ttl", "turtle"),
+    "pretty-xml": (".rdf", "pretty-xml"),
+    "json-ld": (".jsonld", "json-ld"),
+}
+
+# Streamende Writer (Snapshot -> Datei), die den rdflib-Serializer ersetzen
+FAST_WRITERS = {
+    "turtle": write_turtle,
+    "pretty-xml": write_rdfxml,
+    "json-ld": write_jsonld,
+}
+
+ALIASES = {
+    "ttl": "turtle",
+    "rdf": "pretty-xml",
+    "xml": "pretty-xml",
+    "jsonld": "json-ld",
+}
+
+
+def selected_formats(formats: Optional[Iterable[str]] = None) -> list[str]:
+    """Gewählte Formate (Argument, sonst SAPPHO_RDF_FORMATS, sonst alle)."""
+    if formats is None:
+        env = os.environ.get(ENV_FORMATS, "").strip()
+        formats = env.split(",") if env else list(FORMATS)
+    result = []
+    for f in formats:
+        name = f.strip().lower()
+        name = ALIASES.get(name, name)
+        if not name:
+            continue
+        if name not in FORMATS:
+            raise ValueError(f"Unbekanntes RDF-Format: {f!r} (erlaubt: {', '.join(FORMATS)})")
+        if name not in result:
+            result.append(name)
+    return result
+
+
+def use_fast_writers() -> bool:
+    return os.environ.get(ENV_WRITER, "").strip().lower() != "rdflib"
+
+
+def _serialize(g: Graph, fmt: str, dest: Path) -> None:
+    with atomic_write(dest) as fh:
+        g.serialize(destination=fh, format=FORMATS[fmt][1], encoding="utf-8")
+
+
+def _write_from_snapshot(snap_path: str, fmt: str, dest: str, fast: bool) -> float:
+    t0 = time.perf_counter()
+    snap = Snapshot(snap_path)
+    if fast and fmt in FAST_WRITERS:
+        FAST_WRITERS[fmt](snap, dest)
+    else:
+        _serialize(snap.to_graph(), fmt, Path(dest))
+    return time.perf_counter() - t0
+
+
+def _available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _pool_context():
+    # Auf einem Kern lohnt sich der Umweg über Snapshot und Worker nicht.
+    if _available_cpus() < 2:
+        return None
+    # Die Generator-Skripte laufen auf Modulebene ohne __main__-Schutz;
+    # mit "spawn" würde jeder Worker das ganze Skript erneut ausführen.
+    if "fork" in mp.get_all_start_methods():
+        return mp.get_context("fork")
+    return None
+
+
+def write_outputs(
+    g: Graph,
+    ttl_path: PathLike,
+    formats: Optional[Iterable[str]] = None,
+    snapshot: bool = False,
+) -> dict[str, Path]:
+    """Schreibt g in alle gewählten Formate neben ttl_path; liefert Format -> Pfad.
+
+    Mit snapshot=True wird nach dem Turtle zusätzlich der Binär-Snapshot
+    für die lesenden Skripte geschrieben.
+    """
+    t_start = time.perf_counter()
+    ttl_path = Path(ttl_path)
+    ttl_path.parent.mkdir(parents=True, exist_ok=True)
+
+    formats = selected_formats(formats)
+    targets = {fmt: ttl_path.with_suffix(FORMATS[fmt][0]) for fmt in formats}
+    skipped = [fmt for fmt in FORMATS if fmt not in formats]
+    if skipped:
+        print(f"[INFO] Übersprungen ({ENV_FORMATS}): {', '.join(skipped)}")
+
+    fast = use_fast_writers()
+    ctx = _pool_context()
+    remote = [fmt for fmt in formats if fmt != "turtle"] if ctx else []
+    local = [fmt for fmt in formats if fmt not in remote]
+    needs_snap = bool(remote) or (fast and any(fmt in FAST_WRITERS for fmt in local))
+
+    note("triples", len(g))
+    written: dict[str, Path] = {}
+    with tempfile.TemporaryDirectory(prefix="sappho-rdf-") as tmp_dir:
+        futures = {}
+        pool = None
+        snap = None
+        if needs_snap:
+            t0 = time.perf_counter()
+            with phase("snapshot"):
+                snap = write_snapshot(g, None, Path(tmp_dir) / "graph.snap")
+            print(f"[OK] Snapshot: {len(g)} Tripel ({time.perf_counter() - t0:.2f}s)")
+        if remote:
+            pool = ProcessPoolExecutor(max_workers=min(len(remote), _available_cpus()), mp_context=ctx)
+            for fmt in remote:
+                futures[fmt] = pool.submit(_write_from_snapshot, str(snap), fmt, str(targets[fmt]), fast)
+
+        try:
+            for fmt in local:
+                t0 = time.perf_counter()
+                with phase(fmt):
+                    if fast and fmt in FAST_WRITERS:
+                        FAST_WRITERS[fmt](Snapshot(snap), targets[fmt])
+                    else:
+                        _serialize(g, fmt, targets[fmt])
+                written[fmt] = targets[fmt]
+                print(f"[OK] {fmt}: {targets[fmt]} ({time.perf_counter() - t0:.2f}s)")
+
+            if snapshot and "turtle" in written:
+                t0 = time.perf_counter()
+                if snap is not None:
+                    written["snapshot"] = attach_snapshot(snap, ttl_path)
+                else:
+                    written["snapshot"] = write_snapshot(g, ttl_path)
+                print(f"[OK] snapshot: {written['snapshot']} ({time.perf_counter() - t0:.2f}s)")
+
+            for fmt, fut in futures.items():
+                with phase(f"{fmt} (Worker)"):
+                    elapsed = fut.result()
+                written[fmt] = targets[fmt]
+                print(f"[OK] {fmt}: {targets[fmt]} ({elapsed:.2f}s)")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    print(f"[OK] Ausgabe geschrieben ({time.perf_counter() - t_start:.2f}s)")
+    return written
+
+
+# -----------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Verwendung: {sys.argv[0]} <input.ttl> [...]", file=sys.stderr)
+        sys.exit(1)
+    for arg in sys.argv[1:]:
+        g = Graph()
+        g.parse(arg, format="turtle")
+        write_outputs(g, arg, [fmt for fmt in selected_formats() if fmt != "turtle"])
@@ -0,0 +1,281 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from rdflib import Graph, BNode, Literal, URIRef
+
+# -----------------------------------------------------------------------
+# Binärer Snapshot eines Turtle-Graphen
+#
+# Aufbau der Datei:
+#   MAGIC (8 Bytes) | Header-Offset (u64) | Header-Länge (u64)
+#   Blöcke (jeweils 8-Byte-ausgerichtet)
+#   Header (JSON, am Dateiende)
+#
+# Blöcke:
+#   term_offsets  u64[n_terms + 1]  Start-/Endpositionen in term_data
+#   term_data     Bytes             kodierte Terme, byteweise sortiert
+#   spo           u32[3 * n]        Tripel als Term-IDs, sortiert (s, p, o)
+#   pos           u32[3 * n]        dieselben Tripel als (p, o, s), sortiert
+#   osp           u32[3 * n]        dieselben Tripel als (o, s, p), sortiert
+# -----------------------------------------------------------------------
+
+MAGIC = b"SDSNAP\r\n"
+FORMAT_VERSION = 2
+SUFFIX = ".snap"
+_PREAMBLE = struct.Struct("<8sQQ")
+
+PathLike = Union[str, os.PathLike]
+
+
+def snapshot_path(ttl_path: PathLike) -> Path:
+    return Path(ttl_path).with_suffix(SUFFIX)
+
+
+def encode_term(term) -> bytes:
+    """Kodiert einen rdflib-Term als Bytes (Typ-Kennung + Wert)."""
+    if isinstance(term, URIRef):
+        return b"U" + str(term).encode("utf-8")
+    if isinstance(term, BNode):
+        return b"B" + str(term).encode("utf-8")
+    if isinstance(term, Literal):
+        if term.language:
+            extra = "@" + term.language
+        elif term.datatype:
+            extra = "^^" + str(term.datatype)
+        else:
+            extra = ""
+        return b"L" + str(term).encode("utf-8") + b"\x00" + extra.encode("utf-8")
+    raise TypeError(f"Nicht unterstützter Term: {term!r}")
+
+
+def decode_term(raw: bytes):
+    kind, body = raw[:1], raw[1:]
+    if kind == b"U":
+        return URIRef(body.decode("utf-8"))
+    if kind == b"B":
+        return BNode(body.decode("utf-8"))
+    value, _, extra = body.rpartition(b"\x00")
+    value, extra = value.decode("utf-8"), extra.decode("utf-8")
+    if extra.startswith("@"):
+        return Literal(value, lang=extra[1:])
+    if extra.startswith("^^"):
+        return Literal(value, datatype=URIRef(extra[2:]))
+    return Literal(value)
+
+
+def _source_info(ttl_path: PathLike) -> dict:
+    st = os.stat(ttl_path)
+    return {"name": Path(ttl_path).name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# -----------------------------------------------------------------------
+# Schreiben
+# -----------------------------------------------------------------------
+
+@contextmanager
+def atomic_write(path: PathLike, mode: str = "wb", **kwargs):
+    """Schreibt über eine eindeutige Temp-Datei neben path und ersetzt path erst am Ende.
+
+    Parallele Läufe für dieselbe Datei schreiben so nie in dieselbe Temp-Datei.
+    kwargs gehen an open() (encoding, newline, ...).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, mode, **kwargs) as fh:
+            yield fh
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_snapshot(g: Graph, ttl_path: Optional[PathLike], snap_path: Optional[PathLike] = None) -> Path:
+    """Schreibt den Snapshot zu einer (bereits geschriebenen) Turtle-Datei.
+
+    Ohne ttl_path entsteht ein Snapshot ohne Quelle (nie "aktuell"),
+    etwa zur Übergabe an Worker-Prozesse.
+    """
+    snap_path = Path(snap_path) if snap_path else snapshot_path(ttl_path)
+
+    encoded: dict = {}
+    for triple in g:
+        for t in triple:
+            if t not in encoded:
+                encoded[t] = encode_term(t)
+    order = sorted(encoded, key=encoded.__getitem__)
+    term_id = {t: i for i, t in enumerate(order)}
+
+    offsets = array("Q", [0])
+    data = bytearray()
+    for t in order:
+        data += encoded[t]
+        offsets.append(len(data))
+
+    ids = sorted((term_id[s], term_id[p], term_id[o]) for s, p, o in g)
+    spo, pos, osp = array("I"), array("I"), array("I")
+    for s, p, o in ids:
+        spo.extend((s, p, o))
+    for p, o, s in sorted((p, o, s) for s, p, o in ids):
+        pos.extend((p, o, s))
+    for o, s, p in sorted((o, s, p) for s, p, o in ids):
+        osp.extend((o, s, p))
+
+    blocks = {
+        "term_offsets": offsets.tobytes(),
+        "term_data": bytes(data),
+        "spo": spo.tobytes(),
+        "pos": pos.tobytes(),
+        "osp": osp.tobytes(),
+    }
+
+    with atomic_write(snap_path) as fh:
+        fh.write(_PREAMBLE.pack(MAGIC, 0, 0))
+        layout = {}
+        for name, payload in blocks.items():
+            pad = -fh.tell() % 8
+            fh.write(b"\x00" * pad)
+            layout[name] = [fh.tell(), len(payload)]
+            fh.write(payload)
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "source": _source_info(ttl_path) if ttl_path else None,
+            "n_terms": len(order),
+            "n_triples": len(spo) // 3,
+            "namespaces": [[prefix, str(ns)] for prefix, ns in g.namespaces()],
+            "blocks": layout,
+        }).encode("utf-8")
+        header_offset = fh.tell()
+        fh.write(header)
+        fh.seek(0)
+        fh.write(_PREAMBLE.pack(MAGIC, header_offset, len(header)))
+    return snap_path
+
+
+def attach_snapshot(snap_path: PathLike, ttl_path: PathLike) -> Path:
+    """Übernimmt einen fertigen Snapshot als Snapshot zu ttl_path (nur die Quelle wird neu gesetzt)."""
+    data = Path(snap_path).read_bytes()
+    magic, header_offset, header_len = _PREAMBLE.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Kein Snapshot: {snap_path}")
+    header = json.loads(data[header_offset:header_offset + header_len])
+    header["source"] = _source_info(ttl_path)
+    raw_header = json.dumps(header).encode("utf-8")
+
+    out_path = snapshot_path(ttl_path)
+    with atomic_write(out_path) as fh:
+        fh.write(_PREAMBLE.pack(MAGIC, header_offset, len(raw_header)))
+        fh.write(data[_PREAMBLE.size:header_offset])
+        fh.write(raw_header)
+    return out_path
+
+
+# -----------------------------------------------------------------------
+# Lesen
+# -----------------------------------------------------------------------
+
+class Snapshot:
+    """Schreibgeschützter, per mmap eingeblendeter Snapshot."""
+
+    def __init__(self, snap_path: PathLike):
+        self.path = Path(snap_path)
+        with open(self.path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_offset, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Kein Snapshot: {self.path}")
+        self.header = json.loads(self._mm[header_offset:header_offset + header_len])
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Snapshot-Version {self.header.get('version')} statt {FORMAT_VERSION}")
+        self.n_terms = self.header["n_terms"]
+        self.n_triples = self.header["n_triples"]
+        self.namespaces = [(prefix, URIRef(ns)) for prefix, ns in self.header["namespaces"]]
+
+        view = memoryview(self._mm)
+        blocks = self.header["blocks"]
+        self._blocks = {name: view[off:off + size] for name, (off, size) in blocks.items()}
+        self.term_offsets = self._blocks["term_offsets"].cast("Q")
+        self.term_data = self._blocks["term_data"]
+        self.spo = self._blocks["spo"].cast("I")
+        self.pos = self._blocks["pos"].cast("I")
+        self.osp = self._blocks["osp"].cast("I")
+        self._terms: list = [None] * self.n_terms
+
+    def __len__(self) -> int:
+        return self.n_triples
+
+    def is_fresh(self, ttl_path: PathLike) -> bool:
+        """True, wenn der Snapshot zur aktuellen Turtle-Datei passt."""
+        try:
+            current = _source_info(ttl_path)
+        except OSError:
+            return False
+        return (
+            self.header.get("byteorder") == sys.byteorder
+            and self.header.get("source") == current
+        )
+
+    def raw_term(self, i: int) -> bytes:
+        return bytes(self.term_data[self.term_offsets[i]:self.term_offsets[i + 1]])
+
+    def term(self, i: int):
+        t = self._terms[i]
+        if t is None:
+            t = self._terms[i] = decode_term(self.raw_term(i))
+        return t
+
+    def terms(self) -> list:
+        return [self.term(i) for i in range(self.n_terms)]
+
+    def triples(self) -> Iterable[tuple]:
+        terms = self.terms()
+        spo = self.spo
+        for i in range(0, len(spo), 3):
+            yield terms[spo[i]], terms[spo[i + 1]], terms[spo[i + 2]]
+
+    def to_graph(self) -> Graph:
+        g = Graph()
+        for prefix, ns in self.namespaces:
+            g.bind(prefix, ns, override=True)
+        g.addN((s, p, o, g) for s, p, o in self.triples())
+        return g
+
+
+def open_snapshot(ttl_path: PathLike) -> Optional[Snapshot]:
+    """Öffnet den Snapshot zu ttl_path, falls vorhanden und aktuell."""
+    snap_path = snapshot_path(ttl_path)
+    if not snap_path.exists():
+        return None
+    try:
+        snap = Snapshot(snap_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Snapshot unlesbar ({snap_path.name}): {e}", file=sys.stderr)
+        return None
+    if not snap.is_fresh(ttl_path):
+        print(f"[INFO] Snapshot veraltet: {snap_path.name}", file=sys.stderr)
+        return None
+    return snap
+
+
+# -----------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Verwendung: {sys.argv[0]} <input.ttl> [...]", file=sys.stderr)
+        sys.exit(1)
+    for arg in sys.argv[1:]:
+        g = Graph()
+        g.parse(arg, format="turtle")
+        out = write_snapshot(g, arg)
+        print(f"Geschrieben: {out} ({len(g)} Tripel)")
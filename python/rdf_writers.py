@@ -0,0 +1,503 @@
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from rdflib import Graph
+from rdflib.namespace import OWL, RDF, RDFS, XSD
+
+from rdf_snapshot import PathLike, Snapshot, atomic_write
+from triple_index import TripleIndex
+
+# -----------------------------------------------------------------------
+# Streamende Writer auf Basis eines Binär-Snapshots
+#
+# Die Writer laufen über die SPO-Permutation des Snapshots, fassen die
+# Tripel je Subjekt zusammen und schreiben sie direkt in die Datei. Im
+# Speicher liegt jeweils nur ein Subjekt; Terme werden aus den rohen
+# Bytes des Wörterbuchs gerendert. Die Reihenfolge folgt den Term-IDs
+# (= Bytefolge der Terme) und ist damit von Lauf zu Lauf stabil.
+# -----------------------------------------------------------------------
+
+# Lokalteil, der hinter einem Präfix stehen darf (ecrm:E21_Person)
+_LOCAL_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*\Z")
+
+# Datentypen, die in Turtle ohne Anführungszeichen stehen dürfen
+_BARE = {
+    str(XSD.integer): re.compile(r"[+-]?[0-9]+\Z"),
+    str(XSD.boolean): re.compile(r"(?:true|false)\Z"),
+}
+
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_SHORT_ESCAPE = re.compile(r'[\\"\n\r\t]')
+_LONG_ESCAPE = re.compile(r'[\\"\r]')
+
+
+def subject_groups(snap: Snapshot) -> Iterator[tuple[int, list[tuple[int, int]]]]:
+    """(Subjekt-ID, [(Prädikat-ID, Objekt-ID), ...]) in SPO-Reihenfolge."""
+    spo = snap.spo
+    current, group = None, []
+    for i in range(0, len(spo), 3):
+        s = spo[i]
+        if s != current:
+            if group:
+                yield current, group
+            current, group = s, []
+        group.append((spo[i + 1], spo[i + 2]))
+    if group:
+        yield current, group
+
+
+def split_raw(raw: bytes) -> tuple[str, str, str]:
+    """Rohterm -> (Art, Wert, Zusatz); Zusatz ist "@lang", "^^datatype" oder ""."""
+    kind = raw[:1].decode("ascii")
+    if kind != "L":
+        return kind, raw[1:].decode("utf-8"), ""
+    value, _, extra = raw[1:].rpartition(b"\x00")
+    return kind, value.decode("utf-8"), extra.decode("utf-8")
+
+
+# -----------------------------------------------------------------------
+# Turtle
+# -----------------------------------------------------------------------
+
+class _TurtleTerms:
+    """Rendert Term-IDs eines Snapshots als Turtle (mit Präfixen)."""
+
+    def __init__(self, snap: Snapshot):
+        self._snap = snap
+        # erster gebundener Präfix je Namensraum gewinnt
+        self._ns: dict[str, str] = {}
+        for prefix, ns in snap.namespaces:
+            self._ns.setdefault(str(ns), prefix)
+        self.used: dict[str, str] = {}
+        self.type_id = self.label_id = None
+        self.render = lru_cache(maxsize=1 << 16)(self._render)
+
+    def collect_prefixes(self) -> None:
+        """Ermittelt vorab die tatsächlich benutzten Präfixe (ein Lauf übers Wörterbuch)."""
+        for i in range(self._snap.n_terms):
+            kind, value, extra = split_raw(self._snap.raw_term(i))
+            if kind == "U":
+                self._qname(value, record=True)
+                if value == str(RDF.type):
+                    self.type_id = i
+                elif value == str(RDFS.label):
+                    self.label_id = i
+            elif extra.startswith("^^"):
+                self._qname(extra[2:], record=True)
+
+    def _qname(self, uri: str, record: bool = False):
+        for sep in ("#", "/"):
+            cut = uri.rfind(sep) + 1
+            if not cut:
+                continue
+            prefix = self._ns.get(uri[:cut])
+            if prefix is not None and _LOCAL_NAME.match(uri[cut:]):
+                if record:
+                    self.used[prefix] = uri[:cut]
+                return f"{prefix}:{uri[cut:]}"
+        return None
+
+    def iri(self, uri: str) -> str:
+        return self._qname(uri) or f"<{uri}>"
+
+    def _render(self, term_id: int) -> str:
+        kind, value, extra = split_raw(self._snap.raw_term(term_id))
+        if kind == "U":
+            return self.iri(value)
+        if kind == "B":
+            return f"_:{value}"
+        if extra.startswith("^^"):
+            bare = _BARE.get(extra[2:])
+            if bare is not None and bare.match(value):
+                return value
+            return f"{_quote(value)}^^{self.iri(extra[2:])}"
+        return _quote(value) + extra
+
+
+def _quote(value: str) -> str:
+    if "\n" in value:
+        body = _LONG_ESCAPE.sub(lambda m: _ESCAPES[m.group()], value)
+        return f'"""{body}"""'
+    return '"' + _SHORT_ESCAPE.sub(lambda m: _ESCAPES[m.group()], value) + '"'
+
+
+def write_turtle(snap: Snapshot, dest: PathLike) -> Path:
+    """Schreibt den Snapshot als Turtle nach dest (Subjekte gruppiert, stabil sortiert)."""
+    dest = Path(dest)
+    terms = _TurtleTerms(snap)
+    terms.collect_prefixes()
+    render = terms.render
+    type_id, label_id = terms.type_id, terms.label_id
+
+    with atomic_write(dest, "w", encoding="utf-8", newline="\n") as fh:
+        for prefix in sorted(terms.used):
+            fh.write(f"@prefix {prefix}: <{terms.used[prefix]}> .\n")
+        fh.write("\n")
+
+        for s, pairs in subject_groups(snap):
+            # rdf:type zuerst, dann rdfs:label, dann alle übrigen in ID-Reihenfolge
+            preds: dict[int, list[int]] = {}
+            for p, o in pairs:
+                preds.setdefault(p, []).append(o)
+            order = sorted(preds, key=lambda p: (p != type_id, p != label_id, p))
+
+            parts = []
+            for p in order:
+                verb = "a" if p == type_id else render(p)
+                objs = ",\n        ".join(render(o) for o in preds[p])
+                parts.append(f"{verb} {objs}")
+            fh.write(f"{render(s)} " + " ;\n    ".join(parts) + " .\n\n")
+    return dest
+
+
+# -----------------------------------------------------------------------
+# RDF/XML
+#
+# Gleiche Verschachtelung wie rdflibs "pretty-xml": jedes Subjekt genau
+# einmal als typisiertes Element (erster rdf:type) mit rdf:about; noch
+# nicht geschriebene Objekte werden bis zu max_depth Ebenen tief inline
+# ausgegeben, alles Weitere per rdf:resource verlinkt. Anders als bei
+# rdflib folgt die Reihenfolge den Term-IDs und ist damit stabil.
+# -----------------------------------------------------------------------
+
+_XML_ESCAPES = {"\r": "&#13;"}
+
+_RDF_ROOT = f"{{{RDF}}}RDF"
+_RDF_ABOUT = f"{{{RDF}}}about"
+_RDF_NODEID = f"{{{RDF}}}nodeID"
+_RDF_RESOURCE = f"{{{RDF}}}resource"
+_RDF_DATATYPE = f"{{{RDF}}}datatype"
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+
+class _XMLOut:
+    """Minimaler XML-Writer mit derselben Einrückung wie rdflibs XMLWriter."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.stack: list[str] = []
+        self.closed = True
+        self.parent = False
+
+    def _close_start_tag(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.fh.write(">")
+
+    def push(self, qname: str) -> None:
+        self._close_start_tag()
+        self.fh.write("\n" + "  " * len(self.stack) + "<" + qname)
+        self.stack.append(qname)
+        self.closed = False
+        self.parent = False
+
+    def pop(self) -> None:
+        qname = self.stack.pop()
+        if not self.closed:
+            self.closed = True
+            self.fh.write("/>")
+        else:
+            if self.parent:
+                self.fh.write("\n" + "  " * len(self.stack))
+            self.fh.write(f"</{qname}>")
+        self.parent = True
+
+    def attribute(self, qname: str, value: str) -> None:
+        self.fh.write(f" {qname}={quoteattr(value)}")
+
+    def text(self, text: str) -> None:
+        self._close_start_tag()
+        if "<" in text and ">" in text and "]]>" not in text:
+            self.fh.write(f"<![CDATA[{text}]]>")
+        else:
+            self.fh.write(escape(text, _XML_ESCAPES))
+
+
+class _RDFXMLWriter:
+    def __init__(self, snap: Snapshot, fh, max_depth: int = 3):
+        self.snap = snap
+        self.index = TripleIndex(snap)
+        self.out = _XMLOut(fh)
+        self.max_depth = max_depth
+        self.serialized = bytearray(snap.n_terms)
+        self.type_id = self.index.term_id(RDF.type)
+        self.class_ids = {i for i in map(self.index.term_id, (OWL.Class, RDFS.Class)) if i is not None}
+
+        # Namensräume wie bei rdflib aus den gebundenen Präfixen des Graphen
+        g = Graph(bind_namespaces="none")
+        for prefix, ns in snap.namespaces:
+            g.bind(prefix, ns, override=True, replace=True)
+        self.nm = g.namespace_manager
+        self.qnames = lru_cache(maxsize=1 << 12)(self.nm.qname_strict)
+
+    def uri(self, term_id: int) -> str:
+        return split_raw(self.snap.raw_term(term_id))[1]
+
+    def has_triples(self, s: int) -> bool:
+        return next(self.index.triple_ids(s, None, None), None) is not None
+
+    def is_object(self, o: int) -> bool:
+        return next(self.index.triple_ids(None, None, o), None) is not None
+
+    def is_class(self, o: int) -> bool:
+        return any(next(self.index.triple_ids(o, self.type_id, c), None) is not None for c in self.class_ids)
+
+    def namespaces(self) -> list[tuple[str, str]]:
+        """Präfixe aller Prädikate und rdf:type-Objekte (in ID-Reihenfolge ermittelt)."""
+        uris = {p for _, p, _ in self.index.triple_ids(None, None, None)}
+        if self.type_id is not None:
+            uris |= {o for _, _, o in self.index.triple_ids(None, self.type_id, None)}
+        namespaces = {}
+        for i in sorted(uris):
+            prefix, ns, _ = self.nm.compute_qname_strict(self.uri(i))
+            namespaces[prefix] = str(ns)
+        namespaces["rdf"] = str(RDF)
+        return sorted(namespaces.items())
+
+    def write(self) -> None:
+        out = self.out
+        out.fh.write('<?xml version="1.0" encoding="utf-8"?>')
+        out.push("rdf:RDF")
+        out.fh.write("\n")
+        for prefix, ns in self.namespaces():
+            out.fh.write(f'  xmlns:{prefix}="{ns}"\n' if prefix else f'  xmlns="{ns}"\n')
+
+        subjects = [s for s, _ in subject_groups(self.snap)]
+        # zuerst Subjekte, auf die nichts verweist (bzw. nur sie selbst) ...
+        for s in subjects:
+            if not self.is_object(s) or next(self.index.triple_ids(s, None, s), None) is not None:
+                self.subject(s, 1)
+        # ... dann alles Übrige, Blank Nodes zuletzt
+        for s in subjects:
+            if self.snap.raw_term(s)[:1] != b"B":
+                self.subject(s, 1)
+        for s in subjects:
+            self.subject(s, 1)
+
+        out.pop()
+        out.fh.write("\n")
+
+    def subject(self, s: int, depth: int) -> None:
+        if self.serialized[s]:
+            return
+        self.serialized[s] = 1
+        out = self.out
+
+        element, type_id = "rdf:Description", None
+        if self.type_id is not None:
+            t = next(self.index.triple_ids(s, self.type_id, None), None)
+            if t is not None:
+                try:
+                    element, type_id = self.qnames(self.uri(t[2])), t[2]
+                except ValueError:
+                    pass
+        out.push(element)
+
+        kind, value, _ = split_raw(self.snap.raw_term(s))
+        if kind == "B":
+            out.attribute("rdf:nodeID", value)
+        else:
+            out.attribute("rdf:about", value)
+
+        for _, p, o in self.index.triple_ids(s, None, None):
+            if not (p == self.type_id and o == type_id):
+                self.predicate(p, o, depth + 1)
+        out.pop()
+
+    def predicate(self, p: int, o: int, depth: int) -> None:
+        out = self.out
+        out.push(self.qnames(self.uri(p)))
+        kind, value, extra = split_raw(self.snap.raw_term(o))
+        if kind == "L":
+            if extra.startswith("@"):
+                out.attribute("xml:lang", extra[1:])
+            elif extra.startswith("^^"):
+                out.attribute("rdf:datatype", extra[2:])
+            out.text(value)
+        elif self.serialized[o] or not self.has_triples(o):
+            out.attribute("rdf:nodeID" if kind == "B" else "rdf:resource", value)
+        elif kind == "U" and self.is_class(o):
+            out.attribute("rdf:resource", value)
+        elif depth <= self.max_depth:
+            self.subject(o, depth + 1)
+        elif kind == "B" and not self.serialized[o] and sum(1 for _ in self.index.triple_ids(None, None, o)) == 1:
+            self.subject(o, depth + 1)
+        else:
+            out.attribute("rdf:nodeID" if kind == "B" else "rdf:resource", value)
+        out.pop()
+
+
+def write_rdfxml(snap: Snapshot, dest: PathLike, max_depth: int = 3) -> Path:
+    """Schreibt den Snapshot als RDF/XML nach dest (Struktur wie rdflibs pretty-xml)."""
+    dest = Path(dest)
+    with atomic_write(dest, "w", encoding="utf-8", newline="\n") as fh:
+        _RDFXMLWriter(snap, fh, max_depth).write()
+    return dest
+
+
+# -----------------------------------------------------------------------
+# JSON-LD
+#
+# Kompaktes JSON-LD mit festem Projektkontext: alle IRIs als Präfix-IRIs
+# (Projekt-URIs über "sd:"), ein Knoten je Subjekt und Zeile im @graph.
+# Präfixe statt @base, weil JSON-LD-Prozessoren relative IRIs deutlich
+# langsamer auflösen.
+# -----------------------------------------------------------------------
+
+JSONLD_CONTEXT = {
+    "sd": "https://sappho-digital.com/",
+    "ecrm": "http://erlangen-crm.org/current/",
+    "lrmoo": "http://iflastandards.info/ns/lrm/lrmoo/",
+    "intro": "https://w3id.org/lso/intro/currentbeta#",
+    "prov": "http://www.w3.org/ns/prov#",
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+    "owl": str(OWL),
+    "rdf": str(RDF),
+    "rdfs": str(RDFS),
+    "xsd": str(XSD),
+}
+
+
+class _JSONLDTerms:
+    """Kompaktiert Term-IDs eines Snapshots gegen JSONLD_CONTEXT."""
+
+    def __init__(self, snap: Snapshot, context: dict):
+        self._snap = snap
+        # längster Namensraum zuerst
+        self.prefixes = sorted(
+            ((k, v) for k, v in context.items() if not k.startswith("@")),
+            key=lambda kv: -len(kv[1]),
+        )
+        self.compact = lru_cache(maxsize=1 << 12)(self._compact)
+        self.value = lru_cache(maxsize=1 << 16)(self._value)
+
+    def _compact(self, uri: str) -> str:
+        """IRI als Präfix-IRI, sonst absolut."""
+        for prefix, ns in self.prefixes:
+            if uri.startswith(ns) and len(uri) > len(ns) and not uri[len(ns):].startswith("//"):
+                return f"{prefix}:{uri[len(ns):]}"
+        return uri
+
+    def node_ref(self, kind: str, value: str) -> str:
+        return f"_:{value}" if kind == "B" else self._compact(value)
+
+    def _value(self, term_id: int):
+        kind, value, extra = split_raw(self._snap.raw_term(term_id))
+        if kind != "L":
+            return {"@id": self.node_ref(kind, value)}
+        if extra.startswith("@"):
+            return {"@value": value, "@language": extra[1:]}
+        if extra.startswith("^^"):
+            return {"@value": value, "@type": self.compact(extra[2:])}
+        return value
+
+
+def write_jsonld(snap: Snapshot, dest: PathLike, context: Optional[dict] = None) -> Path:
+    """Schreibt den Snapshot als kompaktes JSON-LD nach dest (ein Knoten je Subjekt)."""
+    dest = Path(dest)
+    context = context or JSONLD_CONTEXT
+    terms = _JSONLDTerms(snap, context)
+    index = TripleIndex(snap)
+    type_id = index.term_id(RDF.type)
+
+    with atomic_write(dest, "w", encoding="utf-8", newline="\n") as fh:
+        fh.write('{\n"@context": ' + json.dumps(context, indent=2) + ',\n"@graph": [\n')
+        first = True
+        for s, pairs in subject_groups(snap):
+            kind, value, _ = split_raw(snap.raw_term(s))
+            node = {"@id": terms.node_ref(kind, value)}
+            types = [terms.compact(split_raw(snap.raw_term(o))[1]) for p, o in pairs if p == type_id]
+            if types:
+                node["@type"] = types[0] if len(types) == 1 else types
+            for p, o in pairs:
+                if p == type_id:
+                    continue
+                key = terms.compact(split_raw(snap.raw_term(p))[1])
+                val = terms.value(o)
+                if key not in node:
+                    node[key] = val
+                elif isinstance(node[key], list):
+                    node[key].append(val)
+                else:
+                    node[key] = [node[key], val]
+            fh.write(("" if first else ",\n") + json.dumps(node, ensure_ascii=False, separators=(",", ":")))
+            first = False
+        fh.write("\n]\n}\n")
+    return dest
+
+
+def rdfxml_structure(path: PathLike) -> Counter:
+    """Reihenfolge- und verschachtelungsunabhängige Struktur einer RDF/XML-Datei.
+
+    Je Knotenelement: (Tag, rdf:about, sortierte Eigenschaften); inline
+    ausgegebene Knoten zählen als Verweis auf ihr rdf:about. Blank-Node-IDs
+    sind bei jedem Parsen neu und werden daher nicht verglichen.
+    """
+    def node_id(el) -> Optional[str]:
+        if el.get(_RDF_NODEID) is not None:
+            return "_:"
+        return el.get(_RDF_ABOUT)
+
+    structure: Counter = Counter()
+    for _, el in ElementTree.iterparse(path):
+        ident = node_id(el)
+        if ident is None or el.tag == _RDF_ROOT:
+            continue
+        props = []
+        for prop in el:
+            nested = [node_id(child) for child in prop]
+            if prop.get(_RDF_NODEID) is not None:
+                nested.append("_:")
+            target = prop.get(_RDF_RESOURCE) or (nested[0] if nested else None)
+            if target is not None:
+                props.append((prop.tag, "->", target))
+            else:
+                props.append((prop.tag, prop.get(_XML_LANG, ""), prop.get(_RDF_DATATYPE, ""), prop.text or ""))
+        structure[(el.tag, ident, tuple(sorted(props)))] += 1
+    return structure
+
+
+def compare_rdfxml(a: PathLike, b: PathLike) -> int:
+    """Vergleicht zwei RDF/XML-Dateien strukturell; liefert die Zahl abweichender Knoten."""
+    sa, sb = rdfxml_structure(a), rdfxml_structure(b)
+    only_a, only_b = sa - sb, sb - sa
+    for label, diff in ((Path(a).name, only_a), (Path(b).name, only_b)):
+        for tag, ident, _ in list(diff)[:10]:
+            print(f"  nur in {label}: {tag} {ident}")
+    return sum(only_a.values()) + sum(only_b.values())
+
+
+# -----------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streamende RDF-Writer auf Basis eines Snapshots.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_write = sub.add_parser("write", help="Snapshot als .ttl, .rdf oder .jsonld schreiben")
+    p_write.add_argument("snapshot")
+    p_write.add_argument("output")
+    p_cmp = sub.add_parser("compare", help="zwei RDF/XML-Dateien strukturell vergleichen")
+    p_cmp.add_argument("a")
+    p_cmp.add_argument("b")
+    args = parser.parse_args()
+
+    if args.cmd == "write":
+        writers = {".ttl": write_turtle, ".rdf": write_rdfxml, ".jsonld": write_jsonld}
+        writer = writers.get(Path(args.output).suffix)
+        if writer is None:
+            sys.exit(f"Unbekannte Endung: {args.output} (erlaubt: {', '.join(writers)})")
+        out = writer(Snapshot(args.snapshot), args.output)
+        print(f"Geschrieben: {out}")
+    else:
+        n = compare_rdfxml(args.a, args.b)
+        print("Struktur identisch." if n == 0 else f"{n} abweichende Knoten.")
+        sys.exit(1 if n else 0)
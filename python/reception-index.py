@@ -6,9 +6,12 @@ import argparse
 from collections import defaultdict
 from typing import Optional
 
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, RDFS
 
+from phase_timer import mark
+from triple_index import TripleIndex, load_index
+
 LRMOO = Namespace("http://iflastandards.info/ns/lrm/lrmoo/")
 INTRO  = Namespace("https://w3id.org/lso/intro/currentbeta#")
 ECRM   = Namespace("http://erlangen-crm.org/current/")
@@ -50,7 +53,7 @@ def clean_label(s: str) -> str:
     s = re.sub(r'\s*\([^)]+\)\s*$', '', s)
     return s.strip()
 
-def get_label(g: Graph, uri: URIRef) -> str:
+def get_label(g: TripleIndex, uri: URIRef) -> str:
     en = de = any_label = None
     for _, _, label in g.triples((uri, RDFS.label, None)):
         lang = getattr(label, "language", None)
@@ -69,8 +72,8 @@ def compute_index(ttl_path: str,
     assert abs(w_p + w_i - 1.0) < 1e-9, "w_p + w_i muss 1.0 ergeben."
 
     print(f"Lese {ttl_path} …", file=sys.stderr)
-    g = Graph()
-    g.parse(ttl_path, format="turtle")
+    mark("Laden")
+    g = load_index(ttl_path)
     print(f"  {len(g)} Tripel geladen.", file=sys.stderr)
 
     sappho_f2    : set[URIRef] = set()
@@ -104,6 +107,7 @@ def compute_index(ttl_path: str,
 
         return phenom
 
+    mark("Phänomene")
     print("  Berechne Phänomene …", file=sys.stderr)
     f2_phenomena: dict[URIRef, set[URIRef]] = {}
     for f2 in reception_f2:
@@ -115,6 +119,7 @@ def compute_index(ttl_path: str,
     print(f"  Texte mit Analysedaten: {len(reception_with_act)}", file=sys.stderr)
 
     # ── INT31-Knoten → beteiligte Texte ──────────────────────────────────────
+    mark("INT31-Knoten → beteiligte Texte")
     print("  Berechne INT31-Beziehungen …", file=sys.stderr)
     f2_to_int31: dict[URIRef, set[URIRef]] = defaultdict(set)
 
@@ -156,6 +161,7 @@ def compute_index(ttl_path: str,
     print(f"  Median INT31 (aktive Texte):      {i_med:.2f}", file=sys.stderr)
 
     # ── Normalisierung relativ zum Median ─────────────────────────────────────
+    mark("Normalisierung relativ zum Median")
     if use_log:
         log_p_ref = math.log1p(p_med)
         log_i_ref = math.log1p(i_med)
@@ -166,6 +172,7 @@ def compute_index(ttl_path: str,
         def norm_i(v): return min(v / (2 * i_med), 1.0) if i_med > 0 else 0.0
 
     # ── Index berechnen ───────────────────────────────────────────────────────
+    mark("Index berechnen")
     results: list[dict] = []
     for f2 in reception_with_act:
         p_n = norm_p(p_raw[f2])
@@ -186,6 +193,7 @@ def compute_index(ttl_path: str,
     results.sort(key=lambda r: -r["reception_index"])
 
     # ── Ausgabe ───────────────────────────────────────────────────────────────
+    mark("Ausgabe")
     if csv_out:
         fieldnames = ["uri", "label", "n_phenomena", "n_int31",
                       "p_norm", "i_norm", "reception_index"]
@@ -304,6 +312,7 @@ def main():
         use_log  = not args.no_log,
     )
 
+    mark("Zusammenfassung")
     print_summary(results, top_n=25)
 
 
@@ -5,6 +5,9 @@ import re
 from typing import Optional, List, Dict, Tuple
 import xml.etree.ElementTree as ET
 
+from phase_timer import mark
+from rdf_output import write_outputs
+
 # -----------------------------------------------------------------------
 # Pfade
 # -----------------------------------------------------------------------
@@ -127,6 +130,7 @@ def build_relation_uris(ref_local: str, referred_local: str):
 # -----------------------------------------------------------------------
 # XML-Seitenindex laden
 # -----------------------------------------------------------------------
+mark("XML-Seitenindex laden")
 def _text(el: Optional[ET.Element]) -> str:
     if el is None:
         return ""
@@ -200,6 +204,7 @@ def pages_phrase_en_for(tid: str) -> str:
 # -----------------------------------------------------------------------
 # Graphs laden
 # -----------------------------------------------------------------------
+mark("Graphs laden")
 g_works    = Graph().parse(WORKS,    format="turtle")
 g_analysis = Graph().parse(ANALYSIS, format="turtle")
 g_frag     = Graph().parse(FRAGMENTS, format="turtle")
@@ -223,6 +228,7 @@ out.bind("intro", INTRO)
 # -----------------------------------------------------------------------
 # F1 holen
 # -----------------------------------------------------------------------
+mark("F1 holen")
 f1       = pick_f1(g_frag)
 f1_label = get_label(g_frag, f1, "Work")
 f1_local = local_id(f1)
@@ -230,6 +236,7 @@ f1_local = local_id(f1)
 # -----------------------------------------------------------------------
 # F2–F1-Relationen 
 # -----------------------------------------------------------------------
+mark("F2–F1-Relationen")
 f2_works = set(g_works.subjects(RDF.type, LRMOO["F2_Expression"]))
 relations_to_create: List[Dict] = []
 
@@ -247,6 +254,7 @@ for f2 in sorted(f2_works, key=lambda u: str(u)):
 # -----------------------------------------------------------------------
 # F2-Relationen 
 # -----------------------------------------------------------------------
+mark("F2-Relationen")
 info: Dict[URIRef, Dict] = {}
 for f2 in set(g_analysis.subjects(RDF.type, LRMOO["F2_Expression"])):
     r18_keys   = set(shorten_r18_key(f2, a) for a in g_analysis.objects(f2, INTRO["R18_showsActualization"]))
@@ -405,6 +413,7 @@ def collect_f2_evidence(f2: URIRef) -> Tuple[Dict[str, Dict], set]:
 # -----------------------------------------------------------------------
 # Materialisierung
 # -----------------------------------------------------------------------
+mark("Materialisierung")
 if relations_to_create:
     ensure_copied(g_frag, out, f1)
 
@@ -538,6 +547,7 @@ for rel in relations_to_create:
 # -----------------------------------------------------------------------
 # Aufräumen
 # -----------------------------------------------------------------------
+mark("Aufräumen")
 if relations_to_create:
     all_f2_in_out = set(out.subjects(RDF.type, LRMOO["F2_Expression"]))
     for f2 in all_f2_in_out:
@@ -550,11 +560,5 @@ if relations_to_create:
 # -----------------------------------------------------------------------
 # Serialisieren
 # -----------------------------------------------------------------------
-OUTFILE.parent.mkdir(parents=True, exist_ok=True)
-out.serialize(destination=OUTFILE.as_posix(), format="turtle")
-
-OUT_RDF = OUTFILE.with_suffix(".rdf")
-out.serialize(destination=OUT_RDF.as_posix(), format="pretty-xml", encoding="utf-8")
-
-OUT_JSONLD = OUTFILE.with_suffix(".jsonld")
-out.serialize(destination=OUT_JSONLD.as_posix(), format="json-ld", encoding="utf-8")
\ No newline at end of file
+mark("Serialisieren")
+write_outputs(out, OUTFILE)
\ No newline at end of file
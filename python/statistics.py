@@ -3,9 +3,12 @@ import sys
 import xml.etree.ElementTree as ET
 from collections import defaultdict
 from typing import Optional
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, RDFS
 
+from phase_timer import mark, note
+from triple_index import load_index
+
 LRMOO = Namespace("http://iflastandards.info/ns/lrm/lrmoo/")
 INTRO  = Namespace("https://w3id.org/lso/intro/currentbeta#")
 ECRM   = Namespace("http://erlangen-crm.org/current/")
@@ -42,9 +45,11 @@ def feature_type(uri: str) -> Optional[str]:
 
 def main(ttl_path: str, xml_out: str) -> None:
     print(f"Lese {ttl_path} ...", file=sys.stderr)
-    g = Graph()
-    g.parse(ttl_path, format="turtle")
+    mark("Laden")
+    g = load_index(ttl_path)
     print(f"  {len(g)} Tripel geladen.", file=sys.stderr)
+    note("triples", len(g))
+    mark("Indizes")
 
     sappho_f2    = set()
     reception_f2 = set()
@@ -155,6 +160,7 @@ def main(ttl_path: str, xml_out: str) -> None:
         return clean_label(raw)
 
     # ── Alle Phänomene im Vergleich ────────────────────────────────
+    mark("Alle Phänomene im Vergleich")
 
     for ftype_key, pattern, ftype_label in FEATURE_TYPES:
         all_feat_uris: set[URIRef] = set()
@@ -208,6 +214,7 @@ def main(ttl_path: str, xml_out: str) -> None:
             item_el.set("pctReception",   f'{d["pct_r"]:.2f}')
 
     # ── Phänomene nach Fragment-Referenz ───────────────────────────
+    mark("Phänomene nach Fragment-Referenz")
 
     import re as _re
 
@@ -351,6 +358,7 @@ def main(ttl_path: str, xml_out: str) -> None:
                 feat_el.set("count", str(count))
 
     # ── Phänomene im Laufe der Zeit ────────────────────────────────
+    mark("Phänomene im Laufe der Zeit")
 
     R17i_was_created_by      = LRMOO["R17i_was_created_by"]
     R4i_is_embodied_in       = LRMOO["R4i_is_embodied_in"]
@@ -503,6 +511,7 @@ def main(ttl_path: str, xml_out: str) -> None:
                 cell_el.set("n",      str(dec_total))
 
     # ── Phänomene nach Gattung ─────────────────────────────────────
+    mark("Phänomene nach Gattung")
 
     genre_dist_feat:   dict[URIRef, dict[str, int]] = defaultdict(lambda: defaultdict(int))
     genre_dist_labels: dict[URIRef, str] = {}
@@ -565,6 +574,7 @@ def main(ttl_path: str, xml_out: str) -> None:
                 gc_el.set("n",     str(cnt))
 
     # ── Stoff-Komponenten ──────────────────────────────────────────
+    mark("Stoff-Komponenten")
 
     rec_all_feats: dict[URIRef, set] = {}
     for rec in dist_records:
@@ -635,6 +645,7 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  PlotComponents: {len(sorted_plots)} Stoffe verarbeitet", file=sys.stderr)
 
     # ── Personenreferenzen vs. Figuren ────────────────────────────
+    mark("Personenreferenzen vs. Figuren")
 
     def count_persons_in_index(f2_index: dict) -> tuple[dict, dict, dict, dict]:
         """Gibt (pr_count, ch_count, pr_labels, pr_by_id, ch_by_id) zurück."""
@@ -721,6 +732,7 @@ def main(ttl_path: str, xml_out: str) -> None:
           file=sys.stderr)
 
     # ── Werkreferenzen × Zitate ───────────────────────────────────
+    mark("Werkreferenzen × Zitate")
 
     INT21_TextPassage = INTRO["INT21_TextPassage"]
 
@@ -805,6 +817,7 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  WorkCitation: {len(sorted_works)} Werke in XML geschrieben", file=sys.stderr)
 
     # ── Phänomene als Grundlage intertextueller Relationen ─────────
+    mark("Phänomene als Grundlage intertextueller Relationen")
 
     INT31_IntertextualRelation       = INTRO["INT31_IntertextualRelation"]
     R22i_relationIsBasedOnSimilarity = INTRO["R22i_relationIsBasedOnSimilarity"]
@@ -908,6 +921,7 @@ def main(ttl_path: str, xml_out: str) -> None:
           f"{len(sorted_pairs)} Paare in XML geschrieben", file=sys.stderr)
 
     # ── Top-N INT31-Knoten ─────────────
+    mark("Top-N INT31-Knoten")
 
     BASE_URL = "https://sappho-digital.com/"
 
@@ -1027,6 +1041,7 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  INT31TopNodes: Top-{TOP_PER_TYPE} je relType in XML geschrieben", file=sys.stderr)
 
     # ── Durchschnittliche intertextuelle Beziehungen & gemeinsame Phänomene ──
+    mark("Durchschnittliche intertextuelle Beziehungen & gemeinsame Phänomene")
 
     f2_to_int31: dict[URIRef, set[URIRef]] = defaultdict(set)
     for node_uri in int31_to_feats:
@@ -1121,6 +1136,7 @@ def main(ttl_path: str, xml_out: str) -> None:
     print(f"  Stat10 in XML geschrieben.", file=sys.stderr)
 
     # ── Gender ────────────────────────────────────────────────────
+    mark("Gender")
 
     E21_Person       = ECRM["E21_Person"]
     P2_has_type_prop = ECRM["P2_has_type"]        
@@ -1310,6 +1326,7 @@ def main(ttl_path: str, xml_out: str) -> None:
 
     print(f"  Gender-Statistiken in XML geschrieben.", file=sys.stderr)
 
+    mark("Rezeptions-Autor:innen")
     ra_el = ET.SubElement(root_el, "receptionAuthors")
     for f2_uri, authors_str in sorted(f2_authors_map.items(), key=lambda x: str(x[0])):
         if authors_str:
@@ -1319,6 +1336,7 @@ def main(ttl_path: str, xml_out: str) -> None:
             ae.set("authorIds", f2_author_ids_map.get(f2_uri, ""))
     print(f"  receptionAuthors: {len(f2_authors_map)} Einträge in XML", file=sys.stderr)
 
+    mark("Schreiben")
     tree = ET.ElementTree(root_el)
     ET.indent(tree, space="  ")
     tree.write(xml_out, encoding="utf-8", xml_declaration=True)
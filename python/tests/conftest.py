@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import OWL, RDF, RDFS, XSD
+
+# Die Skripte importieren ihre Module flach aus python/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SAPPHO = Namespace("https://sappho-digital.com/")
+ECRM = Namespace("http://erlangen-crm.org/current/")
+WD = Namespace("http://www.wikidata.org/entity/")
+
+
+def build_sample_graph(with_list: bool = True) -> Graph:
+    """Kleiner Graph mit allem, was die Writer und der Index unterscheiden müssen."""
+    g = Graph()
+    g.bind("ecrm", ECRM)
+    g.bind("sappho", SAPPHO)
+
+    person = SAPPHO["person/A1"]
+    g.add((person, RDF.type, ECRM.E21_Person))
+    g.add((person, RDF.type, OWL.NamedIndividual))
+    g.add((person, RDFS.label, Literal("Sappho", lang="de")))
+    g.add((person, RDFS.label, Literal("Σαπφώ", lang="grc")))
+    g.add((person, OWL.sameAs, WD.Q17892))
+    g.add((person, RDFS.comment, Literal('Zeile 1\nZeile "2" mit \\ und """')))
+    g.add((person, SAPPHO.born, Literal("0630", datatype=XSD.gYear)))
+    g.add((person, SAPPHO.workCount, Literal(3)))
+    g.add((person, SAPPHO.flag, Literal(True)))
+    g.add((ECRM.E21_Person, RDF.type, OWL.Class))
+
+    # Blank-Node-Kette tiefer als max_depth, ein geteilter und ein freier Blank Node
+    node = person
+    for i in range(5):
+        child = BNode()
+        g.add((node, ECRM.P1_is_identified_by, child))
+        g.add((child, RDFS.label, Literal(f"Ebene {i}")))
+        node = child
+    shared = BNode()
+    g.add((person, SAPPHO.shared, shared))
+    g.add((SAPPHO["work/W1"], SAPPHO.shared, shared))
+    g.add((shared, RDF.type, ECRM.E55_Type))
+    g.add((BNode(), RDFS.label, Literal("frei")))
+
+    if with_list:
+        # Nur IRIs: rdflibs pretty-xml verliert Literale in Listen
+        head = BNode()
+        Collection(g, head, [SAPPHO["work/W1"], SAPPHO["work/W2"], SAPPHO["work/W3"]])
+        g.add((SAPPHO["work/W1"], SAPPHO.members, head))
+    g.add((SAPPHO["work/W1"], RDFS.seeAlso, URIRef("https://example.org/a%20b?x=1&y=2#frag")))
+    return g
+
+
+@pytest.fixture
+def sample_graph() -> Graph:
+    return build_sample_graph()
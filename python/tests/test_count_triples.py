@@ -0,0 +1,73 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+from rdflib import Graph
+
+from rdf_snapshot import Snapshot, write_snapshot
+from rdf_writers import write_turtle
+
+# count-triples.py ist wegen des Bindestrichs nicht direkt importierbar
+_spec = importlib.util.spec_from_file_location(
+    "count_triples", Path(__file__).resolve().parent.parent / "count-triples.py")
+count_triples = importlib.util.module_from_spec(_spec)
+sys.modules["count_triples"] = count_triples  # für die Worker (Pickle)
+_spec.loader.exec_module(count_triples)
+
+HANDWRITTEN = '''\
+@prefix ex: <https://example.org/> .
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+@base <https://example.org/base/> .
+
+# Kommentar mit "Anführungszeichen" und <iri>
+ex:a a ex:Klasse , ex:Andere ;
+    rdfs:label "a; b, c. # kein Kommentar"@de , 'einfach' ;
+    ex:zahl 1.5 , 42 , -3 , true ;
+    ex:datum "2024-01-01"^^<http://www.w3.org/2001/XMLSchema#date> ;
+    ex:lang """mehrere
+Zeilen mit "Anführung" und ; , . #""" ;
+    ex:leer [] ;
+    ex:knoten [ ex:x ex:y ; ex:z [ ex:tief "1" ] ] ;
+    ex:liste ( ex:l1 "l2" ( ex:innen ) [ ex:im ex:listenknoten ] ) ;
+    ex:nil () ;
+.
+<relativ> ex:p ex:o.
+ex:b ex:p ex:c.
+[ ex:frei "subjekt" ] ex:q ex:r .
+( ex:s1 ex:s2 ) ex:als ex:subjekt .
+'''
+
+
+def test_handwritten_turtle(tmp_path):
+    path = tmp_path / "hand.ttl"
+    path.write_text(HANDWRITTEN, encoding="utf-8")
+    assert count_triples.stream_count_triples(path) == len(Graph().parse(path.as_posix(), format="turtle"))
+
+
+@pytest.mark.parametrize("writer", ["rdflib", "stream"])
+def test_serialized_fixture(tmp_path, sample_graph, writer):
+    path = tmp_path / "graph.ttl"
+    if writer == "rdflib":
+        sample_graph.serialize(destination=path.as_posix(), format="turtle")
+    else:
+        write_turtle(Snapshot(write_snapshot(sample_graph, None, tmp_path / "graph.snap")), path)
+    assert count_triples.stream_count_triples(path) == len(sample_graph)
+
+
+def test_unterminated_literal_raises(tmp_path):
+    path = tmp_path / "kaputt.ttl"
+    path.write_text('<a> <b> """offen\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        count_triples.stream_count_triples(path)
+
+
+def test_count_files_uses_cache(tmp_path, sample_graph, monkeypatch):
+    monkeypatch.setattr(count_triples, "CACHE_FILE", tmp_path / "counts.json")
+    path = tmp_path / "graph.ttl"
+    sample_graph.serialize(destination=path.as_posix(), format="turtle")
+    assert count_triples.count_files([path]) == {path: len(sample_graph)}
+    # Zweiter Lauf: ohne Worker aus dem Cache
+    monkeypatch.setattr(count_triples, "stream_count_triples", None)
+    monkeypatch.setattr(count_triples, "ProcessPoolExecutor", None)
+    assert count_triples.count_files([path]) == {path: len(sample_graph)}
@@ -0,0 +1,104 @@
+import pytest
+from rdflib import Graph, Literal
+from rdflib.namespace import RDF
+
+import harvest_state
+from conftest import SAPPHO
+from harvest_state import HarvestState, content_hash
+
+CONTEXT = {"script": "abc", "projection": "xyz"}
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(harvest_state, "STATE_DIR", tmp_path / "harvest")
+    return tmp_path / "harvest"
+
+
+def entry_triples(key: str, value: str) -> list[tuple]:
+    # Jeder Eintrag erzeugt auch den gemeinsam genutzten Typ-Knoten
+    return [(SAPPHO[key], SAPPHO.wert, Literal(value)),
+            (SAPPHO.Typ, RDF.type, SAPPHO.Klasse)]
+
+
+def harvest(entries: dict[str, str], context=CONTEXT, full=False, incomplete=()) -> tuple[HarvestState, set, Graph]:
+    """Ein Lauf wie in works.py: planen, geänderte Einträge erzeugen, zusammenführen."""
+    state = HarvestState("test", context, full=full)
+    changed = state.plan({key: [value.encode()] for key, value in entries.items()})
+    for key, value in entries.items():
+        g = state.graph(key)
+        if g is None:
+            continue
+        for t in entry_triples(key, value):
+            g.add(t)
+        if key in incomplete:
+            state.mark_incomplete(key)
+    base = Graph()
+    base.add((SAPPHO.global_, SAPPHO.wert, Literal("global")))
+    return state, changed, state.finish(base)
+
+
+def expected(entries: dict[str, str]) -> set:
+    triples = {(SAPPHO.global_, SAPPHO.wert, Literal("global"))}
+    for key, value in entries.items():
+        triples.update(entry_triples(key, value))
+    return triples
+
+
+def test_content_hash_ignores_order_and_duplicates():
+    assert content_hash([b"a", b"b"]) == content_hash([b"b", b"a", b"a"])
+    assert content_hash([b"a"]) != content_hash([b"b"])
+
+
+def test_first_run_builds_everything(state_dir):
+    entries = {"e1": "1", "e2": "2"}
+    _, changed, g = harvest(entries)
+    assert changed == {"e1", "e2"}
+    assert set(g) == expected(entries)
+    assert [p.name for p in state_dir.iterdir()] == ["test.pickle"]
+
+
+def test_unchanged_run_reuses_stored_triples():
+    entries = {"e1": "1", "e2": "2"}
+    harvest(entries)
+    state, changed, g = harvest(entries)
+    assert changed == set()
+    assert state.graph("e1") is None
+    assert set(g) == expected(entries)
+
+
+def test_changed_and_removed_entries():
+    harvest({"e1": "1", "e2": "2", "e3": "3"})
+    entries = {"e1": "1", "e2": "zwei", "e4": "4"}
+    _, changed, g = harvest(entries)
+    assert changed == {"e2", "e4"}
+    # e3 fällt heraus, der gemeinsame Typ-Knoten bleibt
+    assert set(g) == expected(entries)
+
+
+def test_incomplete_entry_is_rebuilt_next_run():
+    harvest({"e1": "1", "e2": "2"}, incomplete={"e2"})
+    _, changed, _ = harvest({"e1": "1", "e2": "2"})
+    assert changed == {"e2"}
+
+
+def test_context_change_and_full_rebuild_everything(capsys):
+    entries = {"e1": "1", "e2": "2"}
+    harvest(entries)
+    _, changed, _ = harvest(entries, context={**CONTEXT, "script": "neu"})
+    assert changed == {"e1", "e2"}
+    assert "Kontext geändert" in capsys.readouterr().out
+
+    state, changed, _ = harvest(entries, context={**CONTEXT, "script": "neu"}, full=True)
+    assert state.full and changed == {"e1", "e2"}
+
+
+def test_unreadable_state_is_reported(state_dir, capsys):
+    entries = {"e1": "1"}
+    harvest(entries)
+    (state_dir / "test.pickle").write_bytes(b"kein pickle")
+    capsys.readouterr()
+    _, changed, g = harvest(entries)
+    assert "nicht lesbar" in capsys.readouterr().out
+    assert changed == {"e1"}
+    assert set(g) == expected(entries)
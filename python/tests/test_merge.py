@@ -0,0 +1,144 @@
+import random
+import sys
+
+import pytest
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+import merge
+from conftest import SAPPHO
+
+
+def legacy_merge(graphs: list[Graph]) -> Graph:
+    """Der ursprüngliche Merge: je Quelle (s, p) der URI-Subjekte ersetzen, dann alles hinzufügen."""
+    g_merged = Graph()
+    for g_tmp in graphs:
+        for s in set(s for s in g_tmp.subjects() if isinstance(s, URIRef)):
+            for p in {p for _, p, _ in g_tmp.triples((s, None, None))}:
+                g_merged.remove((s, p, None))
+        for t in g_tmp:
+            g_merged.add(t)
+    return g_merged
+
+
+def random_sources(seed: int, n_sources: int = 5, blank: bool = True) -> list[Graph]:
+    rng = random.Random(seed)
+    subjects = [SAPPHO[f"s{i}"] for i in range(12)]
+    preds = [SAPPHO[f"p{i}"] for i in range(4)]
+    shared = [BNode("geteilt")] if blank else []
+    graphs = []
+    for _ in range(n_sources):
+        g = Graph()
+        for _ in range(rng.randint(5, 25)):
+            s = rng.choice(subjects + shared)
+            o = rng.choice([Literal(rng.randint(0, 5)), rng.choice(subjects)])
+            g.add((s, rng.choice(preds), o))
+        graphs.append(g)
+    return graphs
+
+
+def test_resolve_precedence_matches_legacy_merge():
+    for seed in range(50):
+        graphs = random_sources(seed)
+        owned, unowned = merge.resolve_precedence((f"q{i}", g) for i, g in enumerate(graphs))
+        assert set(merge.materialize(owned, unowned)) == set(legacy_merge(graphs)), seed
+
+
+def test_later_source_wins_per_subject_and_predicate():
+    s, p, q = SAPPHO.s, SAPPHO.p, SAPPHO.q
+    b = BNode()
+    first = [(s, p, Literal("alt")), (s, q, Literal("bleibt")), (b, p, Literal("b1"))]
+    second = [(s, p, Literal("neu 1")), (s, p, Literal("neu 2")), (b, p, Literal("b2"))]
+    owned, unowned = merge.resolve_precedence([("a", first), ("b", second)])
+    assert set(owned[(s, p)]) == {Literal("neu 1"), Literal("neu 2")}
+    assert owned[(s, q)] == [Literal("bleibt")]
+    # Blank-Node-Subjekte werden nie ersetzt
+    assert set(unowned) == {(b, p, Literal("b1")), (b, p, Literal("b2"))}
+
+
+# ---------------- Inkrementeller Merge ----------------
+
+@pytest.fixture
+def merge_dir(tmp_path, monkeypatch):
+    """Arbeitsordner wie im Repo (python/ neben data/rdf/), Merge-Cache im tmp_path."""
+    (tmp_path / "python").mkdir()
+    (tmp_path / "data" / "rdf").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path / "python")
+    monkeypatch.setattr(merge, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(merge, "MANIFEST", tmp_path / "cache" / "manifest.json")
+    monkeypatch.delenv("SAPPHO_RDF_FORMATS", raising=False)
+    return tmp_path / "data" / "rdf"
+
+
+def write_inputs(rdf_dir, graphs: list[Graph]) -> None:
+    for name, g in zip(merge.ORDER, graphs):
+        g.serialize(destination=(rdf_dir / name).as_posix(), format="turtle")
+
+
+def run_merge(monkeypatch, capsys, *args) -> str:
+    monkeypatch.setattr(sys, "argv", ["merge.py", *args])
+    merge.main()
+    return capsys.readouterr().out
+
+
+def merged(rdf_dir) -> set:
+    return set(Graph().parse((rdf_dir / "sappho-reception.ttl").as_posix(), format="turtle"))
+
+
+def edit_source(rng: random.Random, g: Graph) -> None:
+    """Subjekt entfernen, Objekte ändern oder ein neues Subjekt anlegen."""
+    subjects = sorted(set(g.subjects()))
+    action = rng.choice(["remove", "change", "add"])
+    if action == "remove" and subjects:
+        g.remove((rng.choice(subjects), None, None))
+    elif action == "change" and subjects:
+        s = rng.choice(subjects)
+        for _, p, o in list(g.triples((s, None, None))):
+            g.remove((s, p, o))
+            g.add((s, p, Literal(f"neu {rng.random()}")))
+    else:
+        g.add((SAPPHO[f"neu{rng.randint(0, 99)}"], SAPPHO.p0, Literal("hinzu")))
+
+
+def test_incremental_merge_equals_full(merge_dir, monkeypatch, capsys):
+    rng = random.Random(7)
+    graphs = random_sources(3, blank=False)
+    write_inputs(merge_dir, graphs)
+    run_merge(monkeypatch, capsys)
+    assert merged(merge_dir) == set(legacy_merge(graphs))
+
+    for step in range(8):
+        edit_source(rng, graphs[rng.randrange(len(graphs))])
+        write_inputs(merge_dir, graphs)
+        out = run_merge(monkeypatch, capsys)
+        assert "Geänderte Eingaben" in out, step
+        assert merged(merge_dir) == set(legacy_merge(graphs)), step
+
+    incremental = merged(merge_dir)
+    run_merge(monkeypatch, capsys, "--full")
+    assert merged(merge_dir) == incremental
+
+
+def test_unchanged_inputs_are_skipped(merge_dir, monkeypatch, capsys):
+    write_inputs(merge_dir, random_sources(4, blank=False))
+    run_merge(monkeypatch, capsys)
+    assert "nichts zu tun" in run_merge(monkeypatch, capsys)
+
+
+def test_run_without_turtle_keeps_merge_state(merge_dir, monkeypatch, capsys):
+    graphs = random_sources(5, blank=False)
+    gone = SAPPHO["entfernt"]
+    graphs[-1].add((gone, SAPPHO.p0, Literal("weg")))
+    write_inputs(merge_dir, graphs)
+    run_merge(monkeypatch, capsys)
+
+    graphs[-1].remove((gone, None, None))
+    write_inputs(merge_dir, graphs)
+    monkeypatch.setenv("SAPPHO_RDF_FORMATS", "pretty-xml")
+    run_merge(monkeypatch, capsys)
+    monkeypatch.delenv("SAPPHO_RDF_FORMATS")
+    run_merge(monkeypatch, capsys)
+
+    result = merged(merge_dir)
+    assert not any(s == gone for s, _, _ in result)
+    assert result == set(legacy_merge(graphs))
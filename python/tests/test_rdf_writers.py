@@ -0,0 +1,44 @@
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from conftest import build_sample_graph
+from rdf_snapshot import Snapshot, write_snapshot
+from rdf_writers import compare_rdfxml, write_jsonld, write_rdfxml, write_turtle
+
+WRITERS = [
+    (write_turtle, ".ttl", "turtle", "turtle"),
+    (write_rdfxml, ".rdf", "pretty-xml", "xml"),
+    (write_jsonld, ".jsonld", "json-ld", "json-ld"),
+]
+
+
+@pytest.mark.parametrize("writer, suffix, rdflib_format, parse_format", WRITERS)
+def test_streaming_writer_matches_rdflib(tmp_path, sample_graph, writer, suffix, rdflib_format, parse_format):
+    snap = Snapshot(write_snapshot(sample_graph, None, tmp_path / "graph.snap"))
+    ours = writer(snap, tmp_path / f"ours{suffix}")
+    reference = tmp_path / f"rdflib{suffix}"
+    sample_graph.serialize(destination=reference.as_posix(), format=rdflib_format, encoding="utf-8")
+
+    g_ours = Graph().parse(ours.as_posix(), format=parse_format)
+    g_ref = Graph().parse(reference.as_posix(), format=parse_format)
+    assert isomorphic(g_ours, g_ref)
+    assert isomorphic(g_ours, sample_graph)
+
+
+def test_rdfxml_structure_matches_pretty_xml(tmp_path):
+    # pretty-xml schreibt Listen als parseType="Collection" und verwirft dabei
+    # weitere Aussagen über die Listenknoten; der Writer bleibt verlustfrei
+    g = build_sample_graph(with_list=False)
+    snap = Snapshot(write_snapshot(g, None, tmp_path / "graph.snap"))
+    ours = write_rdfxml(snap, tmp_path / "ours.rdf")
+    reference = tmp_path / "rdflib.rdf"
+    g.serialize(destination=reference.as_posix(), format="pretty-xml", encoding="utf-8")
+    assert compare_rdfxml(ours, reference) == 0
+
+
+def test_writers_leave_no_temp_files(tmp_path, sample_graph):
+    snap = Snapshot(write_snapshot(sample_graph, None, tmp_path / "graph.snap"))
+    for writer, suffix, _, _ in WRITERS:
+        writer(snap, tmp_path / f"out{suffix}")
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,57 @@
+from itertools import product
+
+from rdflib import Literal, URIRef
+from rdflib.namespace import RDF, RDFS
+
+from conftest import SAPPHO, build_sample_graph
+from rdf_snapshot import Snapshot, snapshot_path, write_snapshot
+from triple_index import TripleIndex, load_index
+
+
+def make_index(tmp_path, g):
+    return TripleIndex(Snapshot(write_snapshot(g, None, tmp_path / "graph.snap")))
+
+
+def test_every_pattern_matches_graph(tmp_path, sample_graph):
+    index = make_index(tmp_path, sample_graph)
+    assert len(index) == len(sample_graph)
+    assert set(index) == set(sample_graph)
+    for triple in sample_graph:
+        for mask in product((False, True), repeat=3):
+            pattern = tuple(t if bound else None for t, bound in zip(triple, mask))
+            assert set(index.triples(pattern)) == set(sample_graph.triples(pattern)), pattern
+
+
+def test_unknown_terms_match_nothing(tmp_path, sample_graph):
+    index = make_index(tmp_path, sample_graph)
+    missing = URIRef("https://sappho-digital.com/fehlt")
+    assert list(index.triples((missing, None, None))) == []
+    assert list(index.triples((None, RDFS.label, Literal("Sappho", lang="en")))) == []
+    assert (missing, RDF.type, missing) not in index
+    assert index.term_id(missing) is None
+
+
+def test_graph_api_helpers(tmp_path, sample_graph):
+    index = make_index(tmp_path, sample_graph)
+    person = SAPPHO["person/A1"]
+    assert set(index.subjects(RDF.type, unique=True)) == set(sample_graph.subjects(RDF.type, unique=True))
+    assert sorted(index.objects(person, RDFS.label)) == sorted(sample_graph.objects(person, RDFS.label))
+    assert set(index.predicate_objects(person)) == set(sample_graph.predicate_objects(person))
+    assert set(index.subject_objects(RDFS.label)) == set(sample_graph.subject_objects(RDFS.label))
+    assert index.value(person, SAPPHO.workCount) == sample_graph.value(person, SAPPHO.workCount)
+    assert index.value(person, SAPPHO.fehlt, default="x") == "x"
+    assert (person, RDF.type, SAPPHO.fehlt) not in index
+
+
+def test_load_index_rebuilds_stale_snapshot(tmp_path):
+    ttl = tmp_path / "graph.ttl"
+    g = build_sample_graph()
+    g.serialize(destination=ttl.as_posix(), format="turtle")
+    assert len(load_index(ttl)) == len(g)
+    assert snapshot_path(ttl).exists()
+
+    g.add((SAPPHO["work/W9"], RDFS.label, Literal("neu")))
+    g.serialize(destination=ttl.as_posix(), format="turtle")
+    index = load_index(ttl)
+    assert len(index) == len(g)
+    assert (SAPPHO["work/W9"], RDFS.label, Literal("neu")) in index
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+import wikidata
+from wikidata import ENV_API, ENV_CACHE, EntityCache, TokenBucket
+from wikidata_server import StandIn
+
+
+def entity(qid: str, label: str = "Name") -> dict:
+    return {"id": qid, "type": "item",
+            "labels": {"de": {"language": "de", "value": f"{label} {qid}"}},
+            "claims": {}, "sitelinks": {}}
+
+
+ENTITIES = {f"Q{i}": entity(f"Q{i}") for i in range(1, 9)}
+# Weiterleitung Q100 -> Q1, wie wbgetentities sie liefert
+ENTITIES["Q100"] = {**ENTITIES["Q1"], "redirects": {"from": "Q100", "to": "Q1"}}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Lokaler Wikidata-Ersatz; Laufzeit-Cache leer, schnelles Ratenlimit, ohne SQLite."""
+    srv = StandIn(("127.0.0.1", 0), dict(ENTITIES))
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    host, port = srv.server_address[:2]
+    monkeypatch.setenv(ENV_API, f"http://{host}:{port}/w/api.php")
+    monkeypatch.setenv(ENV_CACHE, "off")
+    monkeypatch.setattr(wikidata, "LIMITER", TokenBucket(200.0))
+    monkeypatch.setattr(wikidata, "_WD_CACHE", {})
+    monkeypatch.setattr(wikidata, "_cache", None)
+    monkeypatch.setattr(wikidata, "_cache_opened", False)
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+# ---------------- TokenBucket ----------------
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20.0, capacity=2.0)
+    t0 = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 2 sofort aus dem Vorrat, 4 weitere mit 20/s
+    assert 0.15 <= time.monotonic() - t0 < 1.0
+
+
+def test_token_bucket_is_shared_between_threads():
+    bucket = TokenBucket(rate=50.0, capacity=1.0)
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - t0 >= 19 / 50 * 0.9
+
+
+def test_token_bucket_pause_blocks_all_requests():
+    bucket = TokenBucket(rate=100.0)
+    bucket.pause(0.3)
+    t0 = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - t0 >= 0.29
+
+
+# ---------------- download_batch ----------------
+
+def test_download_batch(server):
+    result = wikidata.download_batch(["Q2", "Q99", "Q100"])
+    # Q99 fehlt, die Weiterleitung Q100 wird unter der angefragten QID abgelegt
+    assert sorted(result) == ["Q100", "Q2"]
+    assert result["Q100"]["id"] == "Q1"
+    assert server.summary()["requests"] == 1
+
+
+def test_download_batch_splits_around_invalid_ids(server):
+    qids = [f"Q{i}" for i in range(1, 9)]
+    qids[5] = "ungültig"
+    result = wikidata.download_batch(qids)
+    assert sorted(result) == sorted(q for q in qids if q != "ungültig")
+    # Halbieren statt Einzelabrufe: 1 + 2 + 2 + 2 Anfragen für 8 IDs
+    assert server.summary()["requests"] == 7
+
+
+def test_download_batch_waits_out_429(server):
+    server.fail_every = 2
+    server.retry_after = 0.2
+    wikidata.download_batch(["Q1"])
+    t0 = time.monotonic()
+    assert sorted(wikidata.download_batch(["Q2", "Q3"])) == ["Q2", "Q3"]
+    assert time.monotonic() - t0 >= 0.19
+    assert server.summary()["throttled"] == 1
+
+
+# ---------------- prefetch mit SQLite-Cache ----------------
+
+def test_prefetch_uses_cache_and_refresh(server, tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_CACHE, str(tmp_path / "entities.sqlite"))
+    assert wikidata.prefetch(["Q1", "Q2", "Q3", None]) == 3
+    assert wikidata.fetch_wikidata("Q2")["labels"]["de"]["value"] == "Name Q2"
+    requests = server.summary()["requests"]
+
+    # Neuer Lauf: alles aus SQLite, ohne Anfrage
+    monkeypatch.setattr(wikidata, "_WD_CACHE", {})
+    assert wikidata.prefetch(["Q1", "Q2", "Q3"]) == 0
+    assert server.summary()["requests"] == requests
+
+    # --full: SQLite übergehen und neu abrufen
+    server.entities["Q2"] = entity("Q2", "Neu")
+    monkeypatch.setattr(wikidata, "_WD_CACHE", {})
+    assert wikidata.prefetch(["Q1", "Q2", "Q3"], refresh=True) == 3
+    assert wikidata.fetch_wikidata("Q2")["labels"]["de"]["value"] == "Neu Q2"
+    assert EntityCache(tmp_path / "entities.sqlite").get("Q2")["labels"]["de"]["value"] == "Neu Q2"
@@ -0,0 +1,179 @@
+import sys
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterator, Optional
+
+from rdflib import Graph
+
+from rdf_snapshot import PathLike, Snapshot, encode_term, open_snapshot, snapshot_path, write_snapshot
+
+# -----------------------------------------------------------------------
+# Schreibgeschützter Tripel-Index auf Basis eines Snapshots
+#
+# Alle Terme sind als Integer-IDs interniert; die Tripel liegen in drei
+# sortierten Permutationen (SPO, POS, OSP) im eingeblendeten Snapshot.
+# Ein Muster wird per Binärsuche auf die passende Permutation abgebildet,
+# rdflib-Terme entstehen erst bei der Ausgabe.
+# -----------------------------------------------------------------------
+
+# Permutation -> Position von (s, p, o) innerhalb eines gespeicherten Tripels
+_ORDER = {
+    "spo": (0, 1, 2),
+    "pos": (2, 0, 1),
+    "osp": (1, 2, 0),
+}
+
+
+class TripleIndex:
+    """Teilmenge der rdflib-Graph-API über einem Snapshot."""
+
+    def __init__(self, snap: Snapshot):
+        self._snap = snap
+        self._perms = {"spo": snap.spo, "pos": snap.pos, "osp": snap.osp}
+        self._cols = {name: (mv[0::3], mv[1::3], mv[2::3]) for name, mv in self._perms.items()}
+        self._ids: dict = {}
+        self.namespaces = snap.namespaces
+
+    def __len__(self) -> int:
+        return len(self._snap)
+
+    def __iter__(self):
+        return self.triples((None, None, None))
+
+    def __contains__(self, triple) -> bool:
+        for _ in self.triples(triple):
+            return True
+        return False
+
+    # --- Term-IDs --------------------------------------------------------
+
+    def term_id(self, term) -> Optional[int]:
+        """ID eines Terms (Binärsuche im sortierten Wörterbuch) oder None."""
+        if term in self._ids:
+            return self._ids[term]
+        try:
+            key = encode_term(term)
+        except TypeError:
+            return None
+        lo, hi = 0, self._snap.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            raw = self._snap.raw_term(mid)
+            if raw < key:
+                lo = mid + 1
+            elif raw > key:
+                hi = mid
+            else:
+                self._ids[term] = mid
+                return mid
+        self._ids[term] = None
+        return None
+
+    # --- Mustersuche -----------------------------------------------------
+
+    def _range(self, perm: str, keys: tuple) -> tuple[int, int]:
+        lo, hi = 0, len(self._snap)
+        for key, col in zip(keys, self._cols[perm]):
+            lo = bisect_left(col, key, lo, hi)
+            hi = bisect_right(col, key, lo, hi)
+        return lo, hi
+
+    def triple_ids(self, s: Optional[int], p: Optional[int], o: Optional[int]) -> Iterator[tuple]:
+        """Tripel als (s, p, o)-ID-Tupel; None steht für eine Variable."""
+        if s is not None:
+            if p is None:
+                perm, keys = ("spo", (s,)) if o is None else ("osp", (o, s))
+            else:
+                perm, keys = ("spo", (s, p)) if o is None else ("spo", (s, p, o))
+        elif p is not None:
+            perm, keys = "pos", (p,) if o is None else (p, o)
+        elif o is not None:
+            perm, keys = "osp", (o,)
+        else:
+            perm, keys = "spo", ()
+
+        lo, hi = self._range(perm, keys)
+        data = self._perms[perm]
+        i_s, i_p, i_o = _ORDER[perm]
+        for i in range(3 * lo, 3 * hi, 3):
+            yield data[i + i_s], data[i + i_p], data[i + i_o]
+
+    def triples(self, pattern) -> Iterator[tuple]:
+        ids = []
+        for term in pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            tid = self.term_id(term)
+            if tid is None:
+                return
+            ids.append(tid)
+        term = self._snap.term
+        for s, p, o in self.triple_ids(*ids):
+            yield term(s), term(p), term(o)
+
+    def subjects(self, predicate=None, object=None, unique: bool = False):
+        seen = set()
+        for s, _, _ in self.triples((None, predicate, object)):
+            if unique:
+                if s in seen:
+                    continue
+                seen.add(s)
+            yield s
+
+    def predicates(self, subject=None, object=None, unique: bool = False):
+        seen = set()
+        for _, p, _ in self.triples((subject, None, object)):
+            if unique:
+                if p in seen:
+                    continue
+                seen.add(p)
+            yield p
+
+    def objects(self, subject=None, predicate=None, unique: bool = False):
+        seen = set()
+        for _, _, o in self.triples((subject, predicate, None)):
+            if unique:
+                if o in seen:
+                    continue
+                seen.add(o)
+            yield o
+
+    def subject_objects(self, predicate=None):
+        for s, _, o in self.triples((None, predicate, None)):
+            yield s, o
+
+    def subject_predicates(self, object=None):
+        for s, p, _ in self.triples((None, None, object)):
+            yield s, p
+
+    def predicate_objects(self, subject=None):
+        for _, p, o in self.triples((subject, None, None)):
+            yield p, o
+
+    def value(self, subject=None, predicate=None, object=None, default=None):
+        """Wie Graph.value: liefert den fehlenden Term des ersten passenden Tripels."""
+        if subject is None:
+            values = self.subjects(predicate, object)
+        elif predicate is None:
+            values = self.predicates(subject, object)
+        else:
+            values = self.objects(subject, predicate)
+        for v in values:
+            return v
+        return default
+
+    def to_graph(self) -> Graph:
+        return self._snap.to_graph()
+
+
+def load_index(ttl_path: PathLike) -> TripleIndex:
+    """Öffnet den Index zu ttl_path; Snapshot wird bei Bedarf aus Turtle neu erzeugt."""
+    snap = open_snapshot(ttl_path)
+    if snap is None:
+        print(f"  Erzeuge Snapshot aus {Path(ttl_path).name} ...", file=sys.stderr)
+        g = Graph()
+        g.parse(Path(ttl_path).as_posix(), format="turtle")
+        write_snapshot(g, ttl_path)
+        snap = Snapshot(snapshot_path(ttl_path))
+    return TripleIndex(snap)
@@ -0,0 +1,477 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# -----------------------------------------------------------------------
+# Gemeinsamer Wikidata-Zugriff für authors.py, works.py und fragments.py
+#
+# Abgerufene Entitäten landen in einer SQLite-Datenbank (eine Zeile je
+# QID mit Abrufzeitpunkt), sodass wiederholte Läufe ohne Netz auskommen.
+#
+#   SAPPHO_WD_CACHE=<pfad>     andere Datenbank; "off" schaltet den Cache ab
+#   SAPPHO_WD_MAX_AGE=<tage>   ältere Einträge neu abrufen (Standard: 30)
+#   SAPPHO_WD_OFFLINE=1        nie ins Netz, nur der Cache (auch veraltet)
+#   SAPPHO_WD_WORKERS=<n>      gleichzeitige Anfragen in prefetch() (Standard: 8)
+#   SAPPHO_WD_RATE=<n>         höchstens n Anfragen pro Sekunde (Standard: 5)
+#   SAPPHO_WD_DUMP=<datei>     Entitäten aus einem lokalen JSON-Dump/Auszug statt
+#                              aus API und Cache lesen (siehe wikidata_dump.py)
+#   SAPPHO_WD_API=<url>        anderer API-Endpunkt, z. B. wikidata_server.py
+#   SAPPHO_WD_RECORD=<datei>   abgerufene Entitäten (vor slim_entity) als JSON
+#                              Lines anhängen, als Fixture für wikidata_server.py;
+#                              der SQLite-Cache wird dabei nicht gelesen
+#
+# Schlägt ein erneuter Abruf fehl, wird der veraltete Eintrag verwendet.
+# Die Skripte sammeln vor der Hauptschleife alle QIDs und laden sie mit
+# prefetch() parallel; alle Anfragen teilen sich ein Token-Bucket, 429/503
+# mit Retry-After pausiert alle Worker gemeinsam, ebenso der Fehler
+# "maxlag" (Anfragen mit maxlag=5: hinkt die Replikation hinterher, lehnt
+# die API sie ab). Abgerufen wird über wbgetentities, bis zu 50 QIDs je
+# Anfrage und nur Claims, Sitelinks und die deutschen/englischen Labels.
+#
+# Jede Entität wird vor dem Ablegen (Speicher und SQLite) auf die von den
+# Skripten gelesenen Eigenschaften reduziert (slim_entity); die Struktur
+# bleibt die des Wikidata-JSON. Wer eine neue Eigenschaft liest, trägt sie
+# in PROPERTIES ein – Cache-Einträge mit anderer Projektion gelten dann
+# als veraltet.
+# -----------------------------------------------------------------------
+
+ENV_CACHE = "SAPPHO_WD_CACHE"
+ENV_MAX_AGE = "SAPPHO_WD_MAX_AGE"
+ENV_OFFLINE = "SAPPHO_WD_OFFLINE"
+ENV_WORKERS = "SAPPHO_WD_WORKERS"
+ENV_RATE = "SAPPHO_WD_RATE"
+ENV_DUMP = "SAPPHO_WD_DUMP"
+ENV_API = "SAPPHO_WD_API"
+ENV_RECORD = "SAPPHO_WD_RECORD"
+
+CACHE_DB = (Path(__file__).resolve().parent / "../.cache/wikidata/entities.sqlite").resolve()
+DEFAULT_MAX_AGE_DAYS = 30.0
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 5.0
+MAX_ATTEMPTS = 5
+
+API_URL = "https://www.wikidata.org/w/api.php"
+BATCH_SIZE = 50                      # Höchstgrenze von wbgetentities ohne Bot-Recht
+PROPS = "labels|claims|sitelinks"
+MAXLAG = 5                           # Sekunden Replikationsverzug, ab denen die API ablehnt
+
+# Von authors.py, works.py und fragments.py gelesene Eigenschaften
+PROPERTIES = (
+    "P18",    # Bild
+    "P19",    # Geburtsort
+    "P20",    # Sterbeort
+    "P21",    # Geschlecht
+    "P214",   # VIAF
+    "P227",   # GND
+    "P569",   # Geburtsdatum
+    "P570",   # Sterbedatum
+    "P625",   # Koordinaten
+    "P1709",  # equivalent class (DBpedia)
+    "P2888",  # exact match (DBpedia)
+    "P8383",  # Goodreads
+)
+LABEL_LANGUAGES = ("de", "en")
+LANGUAGES = "|".join(LABEL_LANGUAGES)
+# Gelesene Felder strukturierter Werte (Item-ID, Zeitpunkt, Koordinaten)
+VALUE_KEYS = ("id", "time", "latitude", "longitude")
+PROJECTION = ",".join(PROPERTIES) + ";" + ",".join(LABEL_LANGUAGES)
+
+SESSION = requests.Session()
+SESSION.headers.update({
+    "User-Agent": "SapphoDigital/1.0 (+mailto:laura.untner@fu-berlin.de)"
+})
+# Ein Verbindungspool, der für alle Worker reicht
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+
+class TokenBucket:
+    """Globales Ratenlimit: rate Anfragen/s, Spitzen bis capacity."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        return
+                    wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hält alle Anfragen für seconds an (Retry-After)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class EntityCache:
+    """Persistenter Entitäten-Cache (SQLite), threadsicher über eine Sperre."""
+
+    def __init__(self, path: Path = CACHE_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entities ("
+            " qid TEXT PRIMARY KEY, fetched REAL NOT NULL, data TEXT NOT NULL,"
+            " projection TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entities)")}
+        if "projection" not in columns:
+            self._db.execute("ALTER TABLE entities ADD COLUMN projection TEXT NOT NULL DEFAULT ''")
+        self._db.commit()
+
+    def get(self, qid: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """Entität zu qid; None, wenn sie fehlt oder (bei max_age) veraltet ist.
+
+        Veraltet heißt: älter als max_age Sekunden oder mit anderer Projektion
+        abgelegt. Ohne max_age wird jeder vorhandene Eintrag geliefert.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched, data, projection FROM entities WHERE qid = ?", (qid,)
+            ).fetchone()
+        if row is None:
+            return None
+        fetched, data, projection = row
+        if max_age is not None and (time.time() - fetched > max_age or projection != PROJECTION):
+            return None
+        return slim_entity(json.loads(data))
+
+    def put(self, qid: str, data: dict) -> None:
+        payload = json.dumps(slim_entity(data), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entities (qid, fetched, data, projection) VALUES (?, ?, ?, ?)",
+                (qid, time.time(), payload, PROJECTION),
+            )
+            self._db.commit()
+
+    def stats(self) -> tuple[int, Optional[float], Optional[float]]:
+        """Anzahl Einträge, ältester und jüngster Abrufzeitpunkt."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*), MIN(fetched), MAX(fetched) FROM entities"
+            ).fetchone()
+
+    def qids(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT qid FROM entities")]
+
+    def purge(self, older_than: float) -> int:
+        """Löscht Einträge, die älter als older_than Sekunden sind."""
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM entities WHERE fetched < ?", (time.time() - older_than,)
+            )
+            self._db.commit()
+        return cur.rowcount
+
+
+def _slim_value(value):
+    if isinstance(value, dict):
+        return {k: value[k] for k in VALUE_KEYS if k in value} or value
+    return value
+
+def slim_entity(entity: dict) -> dict:
+    """Reduziert eine Entität auf PROPERTIES, die Labels in LABEL_LANGUAGES
+    und die Sitelinks, die dbpedia_from_sitelinks() auswerten kann."""
+    claims = {}
+    for prop in PROPERTIES:
+        statements = entity.get("claims", {}).get(prop)
+        if not statements:
+            continue
+        # Aussagen ohne Wert (novalue/somevalue) bleiben als leerer mainsnak erhalten
+        claims[prop] = [
+            {"mainsnak": {"datavalue": {"value": _slim_value(dv.get("value"))}}} if dv else {"mainsnak": {}}
+            for dv in (cl.get("mainsnak", {}).get("datavalue") for cl in statements)
+        ]
+
+    labels = {}
+    for lang in LABEL_LANGUAGES:
+        label = entity.get("labels", {}).get(lang)
+        if isinstance(label, dict) and "value" in label:
+            labels[lang] = {"value": label["value"]}
+
+    # enwiki, dewiki und der erste sonstige Wiki-Link (Fallback für DBpedia)
+    sitelinks = {}
+    fallback = None
+    for site, link in (entity.get("sitelinks") or {}).items():
+        if site in ("enwiki", "dewiki") and isinstance(link, dict):
+            sitelinks[site] = {"title": link.get("title")}
+        elif (fallback is None and site.endswith("wiki")
+              and isinstance(link, dict) and link.get("title")):
+            fallback = site
+            sitelinks[site] = {"title": link["title"]}
+
+    record = {"id": entity.get("id"), "labels": labels, "claims": claims}
+    if sitelinks:
+        record["sitelinks"] = sitelinks
+    return record
+
+def max_age() -> float:
+    if recording():
+        # Aufnahme: alles übers Netz holen, damit die Fixture vollständig wird
+        return 0.0
+    days = os.environ.get(ENV_MAX_AGE, "").strip()
+    return float(days or DEFAULT_MAX_AGE_DAYS) * 86400
+
+
+def offline() -> bool:
+    return os.environ.get(ENV_OFFLINE, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def api_url() -> str:
+    return os.environ.get(ENV_API, "").strip() or API_URL
+
+
+def recording() -> Optional[Path]:
+    value = os.environ.get(ENV_RECORD, "").strip()
+    return Path(value) if value else None
+
+
+_record_lock = threading.Lock()
+
+def record_entities(entities: Iterable[dict]) -> None:
+    """Hängt Entitäten an die Fixture-Datei (JSON Lines, mit .gz komprimiert)."""
+    path = recording()
+    if path is None:
+        return
+    lines = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entities)
+    if not lines:
+        return
+    with _record_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "at", encoding="utf-8") as fh:
+            fh.write(lines)
+
+
+def dump_path() -> Optional[Path]:
+    value = os.environ.get(ENV_DUMP, "").strip()
+    return Path(value) if value else None
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name, "").strip()
+    return float(value) if value else default
+
+
+LIMITER = TokenBucket(_env_number(ENV_RATE, DEFAULT_RATE))
+
+
+_cache: Optional[EntityCache] = None
+_cache_opened = False
+
+def entity_cache() -> Optional[EntityCache]:
+    """Der gemeinsame Cache (beim ersten Aufruf geöffnet); None, wenn abgeschaltet."""
+    global _cache, _cache_opened
+    if not _cache_opened:
+        _cache_opened = True
+        setting = os.environ.get(ENV_CACHE, "").strip()
+        if setting.lower() in ("off", "0", "no", "false"):
+            return None
+        try:
+            _cache = EntityCache(Path(setting) if setting else CACHE_DB)
+        except sqlite3.Error as e:
+            print(f"[WARN] Wikidata-Cache nicht verfügbar ({e}), ohne Cache weiter.")
+    return _cache
+
+
+# Entitäten dieses Laufs (auch ohne SQLite-Cache nur einmal abrufen)
+_WD_CACHE: dict[str, dict] = {}
+
+def retry_after(r: requests.Response, attempt: int) -> float:
+    """Wartezeit aus dem Retry-After-Header (Sekunden oder Datum), sonst Backoff."""
+    value = r.headers.get("Retry-After", "").strip()
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return 1.5 * (attempt + 1)
+
+def _api_get(params: dict) -> Optional[dict]:
+    """Eine API-Anfrage unter dem Ratenlimit; None bei Fehler."""
+    for attempt in range(MAX_ATTEMPTS):
+        LIMITER.acquire()
+        try:
+            r = SESSION.get(api_url(), params=params, timeout=30)
+            if r.status_code in (429, 503):
+                LIMITER.pause(retry_after(r, attempt))
+                continue
+            if r.status_code != 200:
+                return None
+            data = r.json()
+            if data.get("error", {}).get("code") == "maxlag":
+                LIMITER.pause(retry_after(r, attempt))
+                continue
+            return data
+        except (requests.RequestException, ValueError):
+            time.sleep(1.0 * (attempt + 1))
+    return None
+
+def download_batch(qids: list[str]) -> dict[str, dict]:
+    """Holt bis zu BATCH_SIZE Entitäten mit einer wbgetentities-Anfrage; QID -> Entität."""
+    data = _api_get({
+        "action": "wbgetentities",
+        "ids": "|".join(qids),
+        "props": PROPS,
+        "languages": LANGUAGES,
+        "maxlag": MAXLAG,
+        "format": "json",
+    })
+    if data is None:
+        return {}
+    if "error" in data:
+        # Eine ungültige ID lässt die ganze Anfrage scheitern: Batch teilen
+        if len(qids) == 1:
+            return {}
+        mid = len(qids) // 2
+        return {**download_batch(qids[:mid]), **download_batch(qids[mid:])}
+    result = {}
+    for key, entity in data.get("entities", {}).items():
+        if "missing" in entity:
+            continue
+        # Weiterleitungen: unter der angefragten QID ablegen
+        result[entity.get("redirects", {}).get("from", key)] = entity
+    record_entities(result.values())
+    return result
+
+def download_entity(qid: str) -> dict:
+    """Holt eine einzelne Entität; {} bei Fehler."""
+    return download_batch([qid]).get(qid, {})
+
+def _cached(qid: str, cache: Optional[EntityCache], refresh: bool = False) -> Optional[dict]:
+    """Entität aus dem Laufzeit- oder (frischen) SQLite-Cache; mit refresh nur zur Laufzeit."""
+    if qid in _WD_CACHE:
+        return _WD_CACHE[qid]
+    data = cache.get(qid, 0.0 if refresh else max_age()) if cache else None
+    if data:
+        _WD_CACHE[qid] = data
+    return data
+
+def _store(qid: str, data: dict, cache: Optional[EntityCache]) -> dict:
+    if data:
+        data = slim_entity(data)
+    if not data and cache:
+        # Netz nicht erreichbar / offline: lieber veraltet als leer
+        data = cache.get(qid) or {}
+    elif data and cache:
+        cache.put(qid, data)
+    if data:
+        _WD_CACHE[qid] = data
+    return data
+
+def fetch_wikidata(qid: str) -> dict:
+    if not qid:
+        return {}
+    if dump_path():
+        if qid not in _WD_CACHE:
+            # Kein eigener Dump-Durchlauf je QID: gelesen wird nur gebündelt in prefetch
+            print(f"[WARN] {qid} nicht vorab aus dem Dump geladen – ohne Daten")
+            _WD_CACHE[qid] = {}
+        return _WD_CACHE[qid]
+    cache = entity_cache()
+    data = _cached(qid, cache)
+    if data is not None:
+        return data
+    return _store(qid, {} if offline() else download_entity(qid), cache)
+
+def prefetch(qids: Iterable[Optional[str]], workers: Optional[int] = None,
+             refresh: bool = False) -> int:
+    """Lädt alle qids vorab, fehlende parallel übers Netz; liefert die Zahl der Abrufe.
+
+    refresh (--full der Harvester): SQLite-Einträge unabhängig vom Alter neu abrufen.
+    """
+    t0 = time.perf_counter()
+    todo = sorted({q for q in qids if q})
+    dump = dump_path()
+    if dump:
+        # Reproduzierbar: nur der Dump, weder Netz noch SQLite-Cache
+        from wikidata_dump import read_dump
+        missing = [q for q in todo if q not in _WD_CACHE]
+        if missing:
+            _WD_CACHE.update(read_dump(dump, missing))
+            absent = [q for q in missing if q not in _WD_CACHE]
+            # Auch Fehlende merken, sonst liest jeder Zugriff den Dump erneut
+            _WD_CACHE.update((q, {}) for q in absent)
+            if absent:
+                print(f"[WARN] Nicht im Dump: {len(absent)} QIDs, z. B. {', '.join(absent[:5])}")
+        return 0
+
+    cache = entity_cache()
+    missing = [q for q in todo if _cached(q, cache, refresh) is None]
+    if not missing:
+        return 0
+
+    workers = workers or int(_env_number(ENV_WORKERS, DEFAULT_WORKERS))
+    batches = [missing[i:i + BATCH_SIZE] for i in range(0, len(missing), BATCH_SIZE)]
+    results: dict[str, dict] = {}
+    if not offline():
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+            for batch in pool.map(download_batch, batches):
+                results.update(batch)
+    failed = 0
+    for qid in missing:
+        failed += not _store(qid, results.get(qid, {}), cache)
+    fetched = 0 if offline() else len(missing)
+    print(f"[OK] Wikidata: {len(todo)} QIDs, {len(todo) - len(missing)} aus dem Cache, "
+          f"{fetched} abgerufen in {0 if offline() else len(batches)} Anfragen, "
+          f"{failed} ohne Daten ({time.perf_counter() - t0:.1f}s)")
+    return fetched
+
+
+# -----------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wikidata-Cache der Harvester anzeigen/bereinigen.")
+    parser.add_argument("--purge", type=float, metavar="TAGE",
+        help="Einträge löschen, die älter als TAGE sind")
+    args = parser.parse_args()
+
+    cache = entity_cache()
+    if cache is None:
+        sys.exit(f"Wikidata-Cache ist abgeschaltet ({ENV_CACHE}).")
+    if args.purge is not None:
+        print(f"Gelöscht: {cache.purge(args.purge * 86400)} Einträge")
+    n, oldest, newest = cache.stats()
+    print(f"{cache.path}: {n} Entitäten, {cache.path.stat().st_size / 1e6:.1f} MB")
+    if n:
+        fmt = lambda t: time.strftime("%Y-%m-%d %H:%M", time.localtime(t))
+        print(f"  ältester Abruf: {fmt(oldest)}, jüngster: {fmt(newest)}")
@@ -0,0 +1,191 @@
+import bz2
+import gzip
+import json
+import multiprocessing as mp
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from wikidata import entity_cache, slim_entity
+
+# -----------------------------------------------------------------------
+# Wikidata-Entitäten aus einem lokalen JSON-Dump lesen
+#
+# Liest den offiziellen Dump (latest-all.json[.bz2|.gz]: ein JSON-Array,
+# eine Entität pro Zeile) oder einen Auszug im JSON-Lines-Format und
+# behält nur die gesuchten QIDs. Entpackt wird, wenn vorhanden, mit
+# lbzip2/pbzip2/pigz in einem eigenen Prozess; das Filtern und Parsen
+# der Zeilen verteilen Worker-Prozesse blockweise.
+#
+# Die Harvester nutzen den Dump statt der API, wenn SAPPHO_WD_DUMP
+# gesetzt ist (siehe wikidata.py). Für wiederholte Läufe lohnt ein Auszug:
+#   python3 wikidata_dump.py latest-all.json.bz2 ../data/wikidata-extract.jsonl.gz --from-cache
+#   python3 wikidata_dump.py latest-all.json.bz2 extract.jsonl.gz --qids qids.txt
+# -----------------------------------------------------------------------
+
+CHUNK_SIZE = 16 << 20
+
+# Externe, parallel entpackende Werkzeuge je Endung (in dieser Reihenfolge probiert)
+DECOMPRESSORS = {
+    ".bz2": [["lbzip2", "-dc"], ["pbzip2", "-dc"]],
+    ".gz": [["pigz", "-dc"]],
+}
+
+# Im Dump steht die ID am Zeilenanfang: {"type":"item","id":"Q42",...
+_HEAD_ID = re.compile(rb'\s*\{\s*(?:"type"\s*:\s*"[a-z]+"\s*,\s*)?"id"\s*:\s*"([A-Z]\d+)"')
+
+
+def _available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def open_dump(path: Path) -> tuple:
+    """Öffnet den Dump entpackt als Byte-Stream; liefert (stream, prozess oder None)."""
+    for cmd in DECOMPRESSORS.get(path.suffix, []):
+        if shutil.which(cmd[0]):
+            proc = subprocess.Popen(cmd + [str(path)], stdout=subprocess.PIPE)
+            return proc.stdout, proc
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb"), None
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb"), None
+    return open(path, "rb"), None
+
+
+def read_chunks(stream, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Blöcke aus ganzen Zeilen."""
+    rest = b""
+    while True:
+        block = stream.read(size)
+        if not block:
+            break
+        block = rest + block
+        cut = block.rfind(b"\n") + 1
+        if cut == 0:
+            rest = block
+            continue
+        rest = block[cut:]
+        yield block[:cut]
+    if rest:
+        yield rest
+
+
+_wanted: frozenset = frozenset()
+
+def _init_worker(wanted: frozenset) -> None:
+    global _wanted
+    _wanted = wanted
+
+def _scan_chunk(chunk: bytes) -> list[tuple[str, dict]]:
+    found = []
+    for line in chunk.split(b"\n"):
+        line = line.strip().rstrip(b",")
+        if len(line) < 2 or line in (b"[", b"]"):
+            continue
+        m = _HEAD_ID.match(line)
+        if m and m.group(1).decode("ascii") not in _wanted:
+            continue
+        # Treffer – oder ein Auszug mit anderer Schlüsselreihenfolge
+        try:
+            entity = json.loads(line)
+        except ValueError:
+            continue
+        qid = entity.get("id") if isinstance(entity, dict) else None
+        if qid in _wanted:
+            found.append((qid, slim_entity(entity)))
+    return found
+
+
+def read_dump(path, qids: Iterable[str], workers: Optional[int] = None) -> dict[str, dict]:
+    """Liest die Entitäten zu qids aus dem Dump (bereits mit slim_entity reduziert)."""
+    path = Path(path)
+    wanted = frozenset(qids)
+    result: dict[str, dict] = {}
+    if not wanted:
+        return result
+
+    t0 = time.perf_counter()
+    workers = workers or _available_cpus()
+    stream, proc = open_dump(path)
+    try:
+        chunks = read_chunks(stream)
+        if workers > 1 and "fork" in mp.get_all_start_methods():
+            # Höchstens 2 Blöcke je Worker unterwegs (Pool.imap läse den Dump vorab ein)
+            with mp.get_context("fork").Pool(workers, _init_worker, (wanted,)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.apply_async(_scan_chunk, (chunk,)))
+                    if len(pending) >= 2 * workers:
+                        result.update(pending.popleft().get())
+                        if len(result) == len(wanted):
+                            break
+                while pending:
+                    result.update(pending.popleft().get())
+        else:
+            _init_worker(wanted)
+            for chunk in chunks:
+                result.update(_scan_chunk(chunk))
+                if len(result) == len(wanted):
+                    break
+    finally:
+        stream.close()
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+    print(f"[OK] Dump {path.name}: {len(result)}/{len(wanted)} Entitäten "
+          f"({time.perf_counter() - t0:.1f}s)")
+    return result
+
+
+def write_extract(entities: dict[str, dict], out_path: Path) -> None:
+    """Schreibt einen Auszug als JSON Lines (mit .gz komprimiert)."""
+    opener = gzip.open if out_path.suffix == ".gz" else open
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with opener(tmp, "wt", encoding="utf-8") as fh:
+        for qid in sorted(entities, key=lambda q: (len(q), q)):
+            fh.write(json.dumps(entities[qid], ensure_ascii=False, separators=(",", ":")) + "\n")
+    tmp.replace(out_path)
+
+
+# -----------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Auszug aus einem Wikidata-JSON-Dump erstellen.")
+    parser.add_argument("dump", type=Path, help="Dump oder Auszug (.json, .bz2, .gz)")
+    parser.add_argument("out", type=Path, help="Ausgabe (.jsonl oder .jsonl.gz)")
+    parser.add_argument("--qids", type=Path, help="Datei mit einer QID pro Zeile")
+    parser.add_argument("--from-cache", action="store_true",
+        help="alle QIDs aus dem Wikidata-Cache der Harvester übernehmen")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+        help="Worker-Prozesse (Standard: CPU-Kerne)")
+    args = parser.parse_args()
+
+    qids: set[str] = set()
+    if args.qids:
+        qids |= {l.strip() for l in args.qids.read_text(encoding="utf-8").splitlines() if l.strip()}
+    if args.from_cache:
+        cache = entity_cache()
+        if cache is None:
+            sys.exit("Wikidata-Cache ist abgeschaltet.")
+        qids |= set(cache.qids())
+    if not qids:
+        parser.error("keine QIDs (--qids oder --from-cache)")
+
+    entities = read_dump(args.dump, qids, args.workers)
+    write_extract(entities, args.out)
+    missing = sorted(qids - entities.keys())
+    print(f"Geschrieben: {args.out} ({len(entities)} Entitäten)")
+    if missing:
+        print(f"[WARN] Nicht im Dump: {len(missing)} QIDs, z. B. {', '.join(missing[:10])}")
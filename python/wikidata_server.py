@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from wikidata import ENV_API, ENV_CACHE
+from wikidata_dump import open_dump
+
+# -----------------------------------------------------------------------
+# Lokaler Wikidata-Ersatz für Messungen und Regressionstests
+#
+# Beantwortet wbgetentities-Anfragen aus aufgezeichneten Entitäten, mit
+# einstellbarer Latenz und künstlichen 429-Antworten. Fixtures entstehen
+# mit SAPPHO_WD_RECORD (siehe wikidata.py) oder als Dump-Auszug
+# (wikidata_dump.py); beide sind JSON Lines, eine Entität pro Zeile.
+#
+# Aufnahme (einmal mit Netz):
+#   SAPPHO_WD_RECORD=../.cache/wikidata/fixtures.jsonl.gz python3 works.py
+# Ersatzserver starten und Harvester dagegen laufen lassen:
+#   python3 wikidata_server.py ../.cache/wikidata/fixtures.jsonl.gz --latency 0.2 --fail-every 20
+#   SAPPHO_WD_API=http://127.0.0.1:8765/w/api.php SAPPHO_WD_CACHE=off python3 works.py
+# oder beides in einem Schritt, mit Zeitmessung und Serverstatistik:
+#   python3 wikidata_server.py fixtures.jsonl.gz --latency 0.2 --run works.py
+# -----------------------------------------------------------------------
+
+DEFAULT_PORT = 8765
+
+# Für wbgetentities erlaubte Werte von props (Rest der Entität bleibt immer)
+ENTITY_PARTS = ("labels", "descriptions", "aliases", "claims", "sitelinks")
+LANGUAGE_PARTS = ("labels", "descriptions", "aliases")
+
+_VALID_ID = re.compile(r"[QPL]\d+")
+
+
+def load_fixtures(path: Path) -> dict[str, dict]:
+    """Entitäten nach ID, Weiterleitungen zusätzlich unter der alten ID."""
+    entities: dict[str, dict] = {}
+    stream, proc = open_dump(path)
+    try:
+        for line in stream:
+            line = line.strip().rstrip(b",")
+            if len(line) < 2 or line in (b"[", b"]"):
+                continue
+            entity = json.loads(line)
+            entities[entity["id"]] = entity
+            source = entity.get("redirects", {}).get("from")
+            if source:
+                entities[source] = entity
+    finally:
+        stream.close()
+        if proc is not None:
+            proc.wait()
+    return entities
+
+
+def select_parts(entity: dict, props: list[str], languages: list[str]) -> dict:
+    out = {k: v for k, v in entity.items() if k not in ENTITY_PARTS or k in props}
+    if languages:
+        for part in LANGUAGE_PARTS:
+            if part in out:
+                out[part] = {l: v for l, v in out[part].items() if l in languages}
+    return out
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.entities = 0
+        self.missing = 0
+        self.recent = deque()
+
+
+class StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, entities: dict, latency: float = 0.0,
+                 fail_every: int = 0, rate: float = 0.0, retry_after: float = 1.0):
+        super().__init__(address, Handler)
+        self.entities = entities
+        self.latency = latency
+        self.fail_every = fail_every
+        self.rate = rate
+        self.retry_after = retry_after
+        self.stats = Stats()
+
+    def throttle(self) -> bool:
+        """True, wenn diese Anfrage mit 429 beantwortet werden soll."""
+        st = self.stats
+        with st.lock:
+            st.requests += 1
+            now = time.monotonic()
+            st.recent.append(now)
+            while st.recent and st.recent[0] < now - 1.0:
+                st.recent.popleft()
+            limited = (self.fail_every and st.requests % self.fail_every == 0) or \
+                      (self.rate and len(st.recent) > self.rate)
+            if limited:
+                st.throttled += 1
+            return bool(limited)
+
+    def summary(self) -> dict:
+        st = self.stats
+        return {"requests": st.requests, "throttled": st.throttled,
+                "entities": st.entities, "missing": st.missing}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: StandIn
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self._send(200, self.server.summary())
+            return
+        if url.path != "/w/api.php":
+            self._send(404, {"error": {"code": "not-found"}})
+            return
+
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency)
+        if srv.throttle():
+            self._send(429, {"error": {"code": "too-many-requests"}},
+                       {"Retry-After": f"{srv.retry_after:g}"})
+            return
+
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if q.get("action") != "wbgetentities":
+            self._send(200, {"error": {"code": "badvalue", "info": "nur action=wbgetentities"}})
+            return
+        ids = [i for i in q.get("ids", "").split("|") if i]
+        if not ids or any(not _VALID_ID.fullmatch(i) for i in ids):
+            self._send(200, {"error": {"code": "no-such-entity"}})
+            return
+        props = q.get("props", "|".join(ENTITY_PARTS)).split("|")
+        languages = [l for l in q.get("languages", "").split("|") if l]
+
+        result = {}
+        for qid in ids:
+            entity = srv.entities.get(qid)
+            if entity is None:
+                result[qid] = {"id": qid, "missing": ""}
+                continue
+            result[entity["id"]] = select_parts(entity, props, languages)
+        with srv.stats.lock:
+            srv.stats.entities += sum(1 for e in result.values() if "missing" not in e)
+            srv.stats.missing += sum(1 for e in result.values() if "missing" in e)
+        self._send(200, {"entities": result, "success": 1})
+
+
+def run_script(server: StandIn, script: str) -> int:
+    """Führt ein Harvester-Skript gegen den Ersatzserver aus und berichtet."""
+    host, port = server.server_address[:2]
+    env = dict(os.environ)
+    # Ohne SQLite-Cache, sonst misst der Lauf nur den Cache
+    env.setdefault(ENV_CACHE, "off")
+    env[ENV_API] = f"http://{host}:{port}/w/api.php"
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, script], cwd=Path(__file__).resolve().parent, env=env)
+    elapsed = time.perf_counter() - t0
+    s = server.summary()
+    print(f"\n[BENCH] {script}: {elapsed:.2f}s, Exit-Code {result.returncode}")
+    print(f"  Anfragen {s['requests']} (davon 429: {s['throttled']}), "
+          f"Entitäten {s['entities']}, fehlend {s['missing']}")
+    return result.returncode
+
+
+# -----------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lokaler Wikidata-Ersatz (wbgetentities) aus Fixtures.")
+    parser.add_argument("fixtures", type=Path, help="Aufnahme oder Dump-Auszug (.jsonl, .gz, .bz2)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0,
+        help="Verzögerung je Anfrage in Sekunden")
+    parser.add_argument("--fail-every", type=int, default=0, metavar="N",
+        help="jede N-te Anfrage mit 429 beantworten")
+    parser.add_argument("--rate", type=float, default=0.0,
+        help="mehr als RATE Anfragen pro Sekunde mit 429 beantworten")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+        help="Retry-After der 429-Antworten in Sekunden (Standard: 1)")
+    parser.add_argument("--run", metavar="SKRIPT",
+        help="Skript gegen den Server ausführen, messen und beenden")
+    args = parser.parse_args()
+
+    entities = load_fixtures(args.fixtures)
+    server = StandIn(("127.0.0.1", 0 if args.run else args.port), entities,
+                     args.latency, args.fail_every, args.rate, args.retry_after)
+    host, port = server.server_address[:2]
+    print(f"Wikidata-Ersatz mit {len(entities)} Entitäten: http://{host}:{port}/w/api.php")
+
+    if args.run:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        code = run_script(server, args.run)
+        server.shutdown()
+        sys.exit(code)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.summary()))
@@ -2,17 +2,20 @@
 # by Jonas Rohe, Viktor J. Illmer, Lisa Poggel and Frank Fischer
 # https://github.com/temporal-communities/1001-books
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+import gzip
+import hashlib
 import io
+import json
 import time
-import shutil
-import urllib.request
 
 import polars as pl
 import requests
-from scipy import stats
-from numpy.polynomial import Polynomial
-from sklearn.metrics import r2_score
+from wikidata import TokenBucket, retry_after
+from wikimetrix_stats import N_BOOTSTRAP, CONFIDENCE, analyse_subsets, format_ci
 
 # =========================
 # CONFIG
@@ -21,21 +24,53 @@ INPUT_XLSX = Path("../../doktorat/Diss/Sappho-Rezeption/Sappho-Rez_vollstaendig.
 OUTPUT_FILE = Path("../data/wikimetrix.csv")
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
+# WDQS-Ergebnisse je Abfrage und QID; neu abgefragt werden nur fehlende oder abgelaufene QIDs
+WDQS_CACHE_FILE = OUTPUT_FILE.with_name("wikimetrix_wdqs_cache.parquet")
+WDQS_CACHE_MAX_AGE_DAYS = 30
+
+# Statistik zusätzlich je Wert dieser Spalten: Gattung und Zeitraum aus den
+# Werkzeilen der Excel-Datei, Gender aus Wikidata (P21)
+GENRE_COL = "Gattung"
+YEAR_COL = "Publikationsjahr/Aufführungsjahr"
+PERIOD_YEARS = 50
+SUBSET_COLUMNS = ["Gattung", "Gender", "Zeitraum"]
+MIN_SUBSET_SIZE = 3
+
+OUTPUT_COLUMNS = [
+    "Autor_in",
+    "Interne Autor_in-ID",
+    "Author Wikidata ID",
+    "Author Sitelinks",
+    "Author QRank",
+    "Work Count",
+]
+
 AUTHOR_NAME_COL = "Autor_in"
 AUTHOR_INTERNAL_ID_COL = "Interne Autor_in-ID"
 AUTHOR_QID_COLNAME = "Autor_in QID"
 AUTHOR_QID_COL_INDEX = 12  # M
 
-BATCH_SIZE = 20
-REQUEST_SLEEP = 5.0
+WDQS_URL = "https://query.wikidata.org/sparql"
+
+BATCH_SIZE = 20           # Startgröße, danach adaptiv
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 200
+TARGET_SECONDS = 10.0     # res.elapsed: schnellere Batches wachsen, langsamere schrumpfen
+MAX_WORKERS = 3           # gleichzeitige Anfragen (WDQS erlaubt 5 je Client)
+REQUEST_RATE = 1.0        # Anfragen pro Sekunde über alle Worker
+REQUEST_SLEEP = 5.0       # Basis für den Backoff nach Fehlern
 REQUEST_TIMEOUT = 120
 MAX_RETRIES = 6
 
 USER_AGENT = "wikimetrix/0.1 (contact: deine-mail@example.com)"
 
 QRANK_URL = "https://qrank.wmcloud.org/download/qrank.csv.gz"
-QRANK_PATH = Path("inputs/qrank.csv.gz")
-QRANK_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Außerhalb eines Arbeitsordners, damit der Cache Läufe überdauert
+QRANK_DIR = Path("../.cache/qrank")
+QRANK_PATH = QRANK_DIR / "qrank.csv.gz"
+QRANK_PARQUET = QRANK_DIR / "qrank.parquet"  # nach Entity sortiert, zstd
+QRANK_MAX_AGE_DAYS = 30
+QRANK_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # =========================
@@ -46,17 +81,27 @@ def format_query(query: str, qids: list[str]) -> str:
     return query % formatted_qids
 
 
-def query_wdqs(query: str, qids: list[str], max_retries: int = MAX_RETRIES) -> pl.DataFrame:
+class WDQSTimeout(RuntimeError):
+    """Zeitlimit von WDQS oder Client; der Batch wird geteilt statt wiederholt."""
+
+
+WDQS_LIMITER = TokenBucket(REQUEST_RATE)
+WDQS_SESSION = requests.Session()
+
+
+def query_wdqs(query: str, qids: list[str], max_retries: int = MAX_RETRIES) -> tuple[pl.DataFrame, float]:
+    """Ein Batch; liefert das Ergebnis und die Dauer laut res.elapsed."""
     if not qids:
-        return pl.DataFrame()
+        return pl.DataFrame(), 0.0
 
-    url = "https://query.wikidata.org/sparql"
     formatted_query = format_query(query, qids)
 
     for attempt in range(1, max_retries + 1):
+        WDQS_LIMITER.acquire()
+        wait_seconds = REQUEST_SLEEP * (2 ** (attempt - 1))
         try:
-            res = requests.post(
-                url,
+            res = WDQS_SESSION.post(
+                WDQS_URL,
                 data={"query": formatted_query},
                 headers={
                     "Accept": "text/tab-separated-values",
@@ -64,22 +109,30 @@ def query_wdqs(query: str, qids: list[str], max_retries: int = MAX_RETRIES) -> p
                 },
                 timeout=REQUEST_TIMEOUT,
             )
+            if res.status_code == 429:
+                # Retry-After gilt für alle Worker: das gemeinsame Ratenlimit pausieren
+                wait_seconds = retry_after(res, attempt)
+                WDQS_LIMITER.pause(wait_seconds)
+            elif res.status_code >= 500 and "TimeoutException" in res.text:
+                raise WDQSTimeout(f"WDQS-Zeitlimit nach {res.elapsed.total_seconds():.1f}s")
             res.raise_for_status()
-            print(f"Request took {res.elapsed.total_seconds():.3f} seconds.")
+            elapsed = res.elapsed.total_seconds()
+            print(f"Request took {elapsed:.3f} seconds.")
 
             text = res.text.strip()
             if not text:
-                return pl.DataFrame()
+                return pl.DataFrame(), elapsed
 
             if "Please set a user-agent" in text:
                 raise RuntimeError(
                     "WDQS rejected the request because no valid User-Agent was accepted."
                 )
 
-            df = pl.read_csv(io.BytesIO(res.content), separator="\t")
+            # TSV mit SPARQL-Termen: Literale als "Text"@de, keine CSV-Quotes
+            df = pl.read_csv(io.BytesIO(res.content), separator="\t", quote_char=None)
 
             if df.width == 0:
-                return pl.DataFrame()
+                return pl.DataFrame(), elapsed
 
             return (
                 df.rename(lambda s: s.strip("?"))
@@ -88,84 +141,297 @@ def query_wdqs(query: str, qids: list[str], max_retries: int = MAX_RETRIES) -> p
                     pl.all()
                     .str.strip_chars("<>")
                     .str.strip_prefix("http://www.wikidata.org/entity/")
+                    .str.replace(r'^"(.*)"(?:@[\w-]+|\^\^.*)?$', "$1")
                 )
-            )
+            ), elapsed
 
+        except (requests.exceptions.Timeout, WDQSTimeout) as e:
+            if len(qids) > 1:
+                raise WDQSTimeout(str(e)) from e
+            error = e
         except (requests.exceptions.RequestException, RuntimeError) as e:
-            if attempt == max_retries:
-                raise RuntimeError(
-                    f"WDQS request failed after {max_retries} attempts: {e}"
-                ) from e
+            error = e
 
-            wait_seconds = REQUEST_SLEEP * (2 ** (attempt - 1))
-            print(
-                f"⚠️ Versuch {attempt}/{max_retries} fehlgeschlagen: {e}\n"
-                f"   Warte {wait_seconds:.1f} Sekunden und versuche es erneut..."
-            )
-            time.sleep(wait_seconds)
+        if attempt == max_retries:
+            raise RuntimeError(
+                f"WDQS request failed after {max_retries} attempts: {error}"
+            ) from error
+
+        print(
+            f"⚠️ Versuch {attempt}/{max_retries} fehlgeschlagen: {error}\n"
+            f"   Warte {wait_seconds:.1f} Sekunden und versuche es erneut..."
+        )
+        time.sleep(wait_seconds)
 
-    return pl.DataFrame()
+    return pl.DataFrame(), 0.0
+
+
+def next_batch_size(size: int, elapsed: float) -> int:
+    if elapsed < TARGET_SECONDS / 2:
+        return min(MAX_BATCH_SIZE, size + max(1, size // 2))
+    if elapsed > TARGET_SECONDS:
+        return max(MIN_BATCH_SIZE, size // 2)
+    return size
 
 
 def query_in_batches(query: str, qids: list[str]) -> pl.DataFrame:
+    """Batches parallel (MAX_WORKERS) unter WDQS_LIMITER; Größe passt sich der Antwortzeit an."""
     if not qids:
         return pl.DataFrame()
 
-    results = []
-
-    for i in range(0, len(qids), BATCH_SIZE):
-        batch = qids[i:i + BATCH_SIZE]
-        print(f"Batch {i}–{i + len(batch)} / {len(qids)}")
-        df = query_wdqs(query, batch)
-        if df.height > 0:
-            results.append(df)
-        time.sleep(REQUEST_SLEEP)
+    results: dict[int, pl.DataFrame] = {}
+    size = BATCH_SIZE
+    cursor = 0
+    split: deque[tuple[int, int]] = deque()   # geteilte Batches nach Zeitlimit, zuerst
+    running = {}
+
+    with ThreadPoolExecutor(MAX_WORKERS) as pool:
+        while cursor < len(qids) or split or running:
+            while len(running) < MAX_WORKERS and (split or cursor < len(qids)):
+                if split:
+                    start, end = split.popleft()
+                else:
+                    start, end = cursor, min(cursor + size, len(qids))
+                    cursor = end
+                running[pool.submit(query_wdqs, query, qids[start:end])] = (start, end)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end = running.pop(future)
+                try:
+                    df, elapsed = future.result()
+                except WDQSTimeout as e:
+                    mid = (start + end) // 2
+                    split.extendleft([(mid, end), (start, mid)])
+                    size = max(MIN_BATCH_SIZE, (end - start) // 2)
+                    print(f"⚠️ Batch {start}–{end}: {e}; geteilt, Batchgröße jetzt {size}")
+                    continue
+                size = next_batch_size(size, elapsed)
+                print(f"Batch {start}–{end} / {len(qids)} ({elapsed:.1f}s), nächste Batchgröße {size}")
+                if df.height > 0:
+                    results[start] = df
 
     if not results:
         return pl.DataFrame()
 
-    return pl.concat(results, how="vertical_relaxed")
+    return pl.concat([results[k] for k in sorted(results)], how="vertical_relaxed")
+
+
+# =========================
+# WDQS CACHE
+# =========================
+WDQS_CACHE_SCHEMA = {
+    "query": pl.Utf8,
+    "qid": pl.Utf8,
+    "fetched": pl.Datetime("us", "UTC"),
+    "rows": pl.Utf8,  # JSON-Liste der Ergebniszeilen dieser QID
+}
+
+
+def query_key(query: str) -> str:
+    """Schlüssel aus dem normalisierten Abfragetext (Leerraum zusammengefasst)."""
+    return hashlib.sha256(" ".join(query.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def load_wdqs_cache() -> pl.DataFrame:
+    if WDQS_CACHE_FILE.exists():
+        return pl.read_parquet(WDQS_CACHE_FILE)
+    return pl.DataFrame(schema=WDQS_CACHE_SCHEMA)
+
+
+def save_wdqs_cache(cache: pl.DataFrame) -> None:
+    tmp = WDQS_CACHE_FILE.with_name(WDQS_CACHE_FILE.name + ".tmp")
+    cache.sort(["query", "qid"]).write_parquet(tmp)
+    tmp.replace(WDQS_CACHE_FILE)
+
+
+def cached_query_in_batches(query: str, qids: list[str], key_col: str = "qid") -> pl.DataFrame:
+    """query_in_batches mit Cache; key_col ist die Ergebnisspalte mit der abgefragten QID."""
+    if not qids:
+        return pl.DataFrame()
+
+    key = query_key(query)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=WDQS_CACHE_MAX_AGE_DAYS)
+    cache = load_wdqs_cache()
+    fresh = cache.filter(
+        (pl.col("query") == key)
+        & pl.col("qid").is_in(qids)
+        & (pl.col("fetched") >= cutoff)
+    )
+    missing = sorted(set(qids) - set(fresh.get_column("qid").to_list()))
+    print(f"WDQS-Cache: {fresh.height} QIDs aus dem Cache, {len(missing)} abzufragen")
+
+    if missing:
+        df = query_in_batches(query, missing)
+        rows_by_qid: dict[str, list[dict]] = {}
+        if df.height > 0:
+            if key_col not in df.columns:
+                raise ValueError(
+                    f"Die WDQS-Antwort enthält die Schlüsselspalte '{key_col}' nicht. "
+                    f"Vorhanden: {df.columns}"
+                )
+            for row in df.iter_rows(named=True):
+                rows_by_qid.setdefault(row[key_col], []).append(row)
+
+        # Auch QIDs ohne Treffer speichern, sonst würden sie bei jedem Lauf erneut abgefragt
+        now = datetime.now(timezone.utc)
+        new = pl.DataFrame(
+            [
+                {"query": key, "qid": qid, "fetched": now,
+                 "rows": json.dumps(rows_by_qid.get(qid, []), ensure_ascii=False)}
+                for qid in missing
+            ],
+            schema=WDQS_CACHE_SCHEMA,
+        )
+        cache = pl.concat([
+            cache.filter(~((pl.col("query") == key) & pl.col("qid").is_in(missing))),
+            new,
+        ])
+        save_wdqs_cache(cache)
+        fresh = pl.concat([fresh, new])
+
+    rows = [row for cached in fresh.sort("qid").get_column("rows") for row in json.loads(cached)]
+    if not rows:
+        return pl.DataFrame()
+
+    return pl.DataFrame(rows, infer_schema_length=None).with_columns(pl.all().cast(pl.Utf8))
+
+
+# =========================
+# QRANK HELPERS
+# =========================
+def verify_gzip(path: Path) -> None:
+    """Prüft CRC-32 und Länge jedes gzip-Glieds; QRank veröffentlicht keine eigene Prüfsumme."""
+    with gzip.open(path, "rb") as fh:
+        while fh.read(1 << 24):
+            pass
+
+
+def download_qrank() -> None:
+    """Lädt QRANK_PATH herunter; ein abgebrochener Download wird per Range fortgesetzt."""
+    part = QRANK_PATH.with_name(QRANK_PATH.name + ".part")
+    etag_file = QRANK_PATH.with_name(QRANK_PATH.name + ".etag")
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"User-Agent": USER_AGENT}
+        if offset and etag_file.exists():
+            # If-Range: hat sich die Datei inzwischen geändert, kommt sie vollständig neu
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = etag_file.read_text(encoding="utf-8")
+        try:
+            with requests.get(QRANK_URL, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as res:
+                if res.status_code == 416:
+                    break
+                res.raise_for_status()
+                resumed = res.status_code == 206
+                if res.headers.get("ETag"):
+                    etag_file.write_text(res.headers["ETag"], encoding="utf-8")
+                if resumed:
+                    print(f"Setze Download bei {offset / 1e6:.1f} MB fort...")
+                with open(part, "ab" if resumed else "wb") as fh:
+                    for chunk in res.iter_content(1 << 20):
+                        fh.write(chunk)
+                total = res.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit() and part.stat().st_size != int(total):
+                    raise requests.exceptions.ConnectionError(
+                        f"Download unvollständig: {part.stat().st_size} von {total} Bytes"
+                    )
+            break
+        except requests.exceptions.RequestException as e:
+            if attempt == MAX_RETRIES:
+                raise RuntimeError(f"QRank download failed after {MAX_RETRIES} attempts: {e}") from e
+            wait_seconds = REQUEST_SLEEP * (2 ** (attempt - 1))
+            print(f"⚠️ Download unterbrochen ({e}), neuer Versuch in {wait_seconds:.1f} Sekunden...")
+            time.sleep(wait_seconds)
+
+    try:
+        verify_gzip(part)
+    except (OSError, EOFError) as e:
+        part.unlink(missing_ok=True)
+        etag_file.unlink(missing_ok=True)
+        raise RuntimeError(f"QRank-Download beschädigt ({e}); bitte erneut starten.") from e
+    part.replace(QRANK_PATH)
+    etag_file.unlink(missing_ok=True)
+
+
+def build_qrank_parquet() -> None:
+    """Wandelt QRank einmalig in ein sortiertes Parquet um; erneuert es nach QRANK_MAX_AGE_DAYS."""
+    if QRANK_PARQUET.exists():
+        age_days = (time.time() - QRANK_PARQUET.stat().st_mtime) / 86400
+        if age_days < QRANK_MAX_AGE_DAYS:
+            return
+
+    try:
+        if not QRANK_PATH.exists():
+            print("\nDownloading QRank dataset (this may take a while)...")
+            download_qrank()
+            print("Download finished.")
+    except RuntimeError as e:
+        if not QRANK_PARQUET.exists():
+            raise
+        print(f"⚠️ {e}\n   Verwende den vorhandenen QRank-Cache.")
+        return
+
+    print("Converting QRank to Parquet...")
+    tmp = QRANK_PARQUET.with_name(QRANK_PARQUET.name + ".tmp")
+    (
+        pl.scan_csv(QRANK_PATH, schema={"Entity": pl.Utf8, "QRank": pl.Int64})
+        .sort("Entity")
+        .sink_parquet(tmp, compression="zstd", row_group_size=100_000)
+    )
+    tmp.replace(QRANK_PARQUET)
+    QRANK_PATH.unlink()
+
+
+def scan_qrank(qids: list[str]) -> pl.DataFrame:
+    """QRank nur für qids: der Semi-Join als Prädikat wird in den Parquet-Scan geschoben
+    und überspringt dank Sortierung die meisten Row Groups."""
+    return (
+        pl.scan_parquet(QRANK_PARQUET)
+        .filter(pl.col("Entity").is_in(qids))
+        .collect()
+    )
 
 
 # =========================
 # HELPERS
 # =========================
-def clean_qid_value(value: str | None) -> str | None:
-    if value is None:
-        return None
-    value = str(value).strip()
-    if not value:
-        return None
-    value = value.replace("http://www.wikidata.org/entity/", "")
-    value = value.replace("https://www.wikidata.org/entity/", "")
-    if value.startswith("wd:"):
-        value = value[3:]
-    value = value.upper()
-    return value
-
-
-def split_csv_field(value: str | None) -> list[str]:
-    if value is None:
-        return []
-    value = str(value).strip()
-    if not value:
-        return []
-    return [part.strip() for part in value.split(",") if part.strip()]
-
-
-def split_author_names(value: str | None) -> list[str]:
-    if value is None:
-        return []
-    value = str(value).strip()
-    if not value:
-        return []
-
-    if " und " in value:
-        parts = [part.strip() for part in value.split(" und ") if part.strip()]
-        if len(parts) > 1:
-            return parts
-
-    return [value]
+EMPTY_LIST = pl.lit([], dtype=pl.List(pl.Utf8))
+STRIPPED = pl.element().str.strip_chars()
+WIKIDATA_ENTITY_PREFIXES = ("http://www.wikidata.org/entity/", "https://www.wikidata.org/entity/")
+# Alles außer Buchstaben, Ziffern, Leerzeichen, Bindestrich und Punkt (wie str.isalnum)
+SPECIAL_CHARS_PATTERN = r"[^\p{L}\p{N} .\-]"
+
+
+def split_csv_field(col: str) -> pl.Expr:
+    """Kommagetrennte Werte als Liste, ohne leere Einträge."""
+    return (
+        pl.col(col).cast(pl.Utf8)
+        .str.split(",")
+        .list.eval(STRIPPED.filter(STRIPPED != ""))
+        .fill_null(EMPTY_LIST)
+    )
+
+
+def split_author_names(col: str) -> pl.Expr:
+    """Mehrere Namen nur bei " und " mit mindestens zwei Teilen, sonst der ganze Wert."""
+    value = pl.col(col).cast(pl.Utf8).str.strip_chars()
+    parts = value.str.split(" und ").list.eval(STRIPPED.filter(STRIPPED != ""))
+    return (
+        pl.when(parts.list.len() > 1).then(parts)
+        .when(value != "").then(pl.concat_list(value))
+        .otherwise(EMPTY_LIST)
+    )
+
+
+def clean_qid_values(col: str) -> pl.Expr:
+    """QIDs ohne Entity-URI und "wd:", in Großbuchstaben; leere entfallen."""
+    qid = pl.element()
+    for prefix in WIKIDATA_ENTITY_PREFIXES:
+        qid = qid.str.replace_all(prefix, "", literal=True)
+    qid = qid.str.strip_prefix("wd:").str.to_uppercase()
+    return split_csv_field(col).list.eval(qid.filter(qid != ""))
 
 
 def resolve_author_qid_column(df: pl.DataFrame) -> str:
@@ -196,64 +462,58 @@ def expand_author_rows(
     author_name_col: str,
     author_internal_id_col: str,
     author_qid_col: str,
+    extra_cols: list[str] = (),
 ) -> tuple[pl.DataFrame, list[dict]]:
-    rows = []
-    mismatches = []
-
-    for row in df.iter_rows(named=True):
-        names = split_author_names(row.get(author_name_col))
-        internal_ids = split_csv_field(row.get(author_internal_id_col))
-        qids_raw = split_csv_field(row.get(author_qid_col))
-        qids = [clean_qid_value(q) for q in qids_raw if clean_qid_value(q)]
-
-        lengths = {
-            "names": len(names),
-            "internal_ids": len(internal_ids),
-            "qids": len(qids),
-        }
-
-        non_zero_lengths = sorted({v for v in lengths.values() if v > 0})
-
-        if not non_zero_lengths:
-            continue
-
-        if len(non_zero_lengths) != 1:
-            mismatches.append({
-                "Autor_in": row.get(author_name_col),
-                "Interne Autor_in-ID": row.get(author_internal_id_col),
-                "Autor_in QID": row.get(author_qid_col),
-                "lengths": lengths,
-            })
-            continue
-
-        n = non_zero_lengths[0]
-
-        if len(names) != n or len(internal_ids) != n or len(qids) != n:
-            mismatches.append({
-                "Autor_in": row.get(author_name_col),
-                "Interne Autor_in-ID": row.get(author_internal_id_col),
-                "Autor_in QID": row.get(author_qid_col),
-                "lengths": lengths,
-            })
-            continue
-
-        for name, internal_id, qid in zip(names, internal_ids, qids):
-            if qid and qid.startswith("Q") and qid[1:].isdigit():
-                rows.append({
-                    "Autor_in": name,
-                    "Interne Autor_in-ID": internal_id,
-                    "Author Wikidata ID": qid,
-                })
-
-    expanded_df = pl.DataFrame(rows) if rows else pl.DataFrame(
-        schema={
-            "Autor_in": pl.Utf8,
-            "Interne Autor_in-ID": pl.Utf8,
-            "Author Wikidata ID": pl.Utf8,
-        }
+    """Eine Zeile je Autor_in; Zeilen mit ungleich vielen Namen, IDs und QIDs als Mismatches.
+
+    extra_cols (z. B. Gattung, Jahr) werden für jede Autor_in der Zeile übernommen.
+    """
+    lf = (
+        df.lazy()
+        .with_columns(
+            split_author_names(author_name_col).alias("_names"),
+            split_csv_field(author_internal_id_col).alias("_ids"),
+            clean_qid_values(author_qid_col).alias("_qids"),
+        )
+        .with_columns(
+            pl.col("_names").list.len().alias("_n_names"),
+            pl.col("_ids").list.len().alias("_n_ids"),
+            pl.col("_qids").list.len().alias("_n_qids"),
+        )
+    )
+    lengths_match = (
+        (pl.col("_n_names") == pl.col("_n_ids"))
+        & (pl.col("_n_ids") == pl.col("_n_qids"))
+    )
+    all_empty = (pl.col("_n_names") + pl.col("_n_ids") + pl.col("_n_qids")) == 0
+
+    expanded = (
+        lf.filter(lengths_match & ~all_empty)
+        .select(
+            pl.col("_names").alias("Autor_in"),
+            pl.col("_ids").alias("Interne Autor_in-ID"),
+            pl.col("_qids").alias("Author Wikidata ID"),
+            *[pl.col(c).cast(pl.Utf8) for c in extra_cols],
+        )
+        .explode(["Autor_in", "Interne Autor_in-ID", "Author Wikidata ID"])
+        .filter(pl.col("Author Wikidata ID").str.contains(r"^Q\d+$"))
+    )
+    mismatched = (
+        lf.filter(~lengths_match & ~all_empty)
+        .select(
+            pl.col(author_name_col).alias("Autor_in"),
+            pl.col(author_internal_id_col).alias("Interne Autor_in-ID"),
+            pl.col(author_qid_col).alias("Autor_in QID"),
+            pl.struct(
+                names="_n_names",
+                internal_ids="_n_ids",
+                qids="_n_qids",
+            ).alias("lengths"),
+        )
     )
 
-    return expanded_df, mismatches
+    expanded_df, mismatches_df = pl.collect_all([expanded, mismatched])
+    return expanded_df, mismatches_df.to_dicts()
 
 
 # =========================
@@ -278,6 +538,7 @@ base_df, mismatches = expand_author_rows(
     author_name_col=AUTHOR_NAME_COL,
     author_internal_id_col=AUTHOR_INTERNAL_ID_COL,
     author_qid_col=author_qid_col,
+    extra_cols=[c for c in (GENRE_COL, YEAR_COL) if c in df.columns],
 )
 
 if base_df.height == 0:
@@ -321,7 +582,7 @@ SELECT DISTINCT ?qid ?sitelink WHERE {
 }
 """
 
-author_sitelinks = query_in_batches(sitelinks_query, author_qids)
+author_sitelinks = cached_query_in_batches(sitelinks_query, author_qids)
 
 if author_sitelinks.height == 0:
     print("Warnung: Keine Sitelinks gefunden.")
@@ -348,77 +609,139 @@ else:
     )
 
 
+# =========================
+# AUTHOR GENDER
+# =========================
+print("\nFetching author gender...")
+
+gender_query = """
+SELECT DISTINCT ?qid ?gender ?genderLabel WHERE {
+    VALUES ?qid {
+        %s
+    }
+
+    ?qid wdt:P21 ?gender .
+
+    SERVICE wikibase:label { bd:serviceParam wikibase:language "de,en". }
+}
+"""
+
+author_gender = cached_query_in_batches(gender_query, author_qids)
+
+if author_gender.height == 0 or "gender" not in author_gender.columns:
+    print("Warnung: Kein Gender gefunden.")
+    author_gender_agg = pl.DataFrame(
+        schema={"Author Wikidata ID": pl.Utf8, "Gender": pl.Utf8},
+    )
+else:
+    label = (
+        pl.coalesce("genderLabel", "gender")
+        if "genderLabel" in author_gender.columns else pl.col("gender")
+    )
+    author_gender_agg = (
+        author_gender
+        .group_by("qid")
+        .agg(label.unique().sort().str.join(" / ").alias("Gender"))
+        .rename({"qid": "Author Wikidata ID"})
+    )
+
+
 # =========================
 # BUILD OUTPUT DATAFRAME
 # =========================
 print("\nBuilding output dataframe...")
 
-work_count_df = (
-    base_df
+base_lf = base_df.lazy()
+
+work_count = (
+    base_lf
     .group_by(["Interne Autor_in-ID", "Author Wikidata ID"])
     .agg(pl.len().alias("Work Count"))
 )
 
-def count_special_chars(name: str) -> int:
-    """Count non-alphanumeric, non-space, non-hyphen characters in a name."""
-    return sum(1 for c in name if not (c.isalnum() or c in (" ", "-", ".")))
-
-name_candidates = (
-    base_df
+# Bevorzugter Name je Autor_in: wenigste Sonderzeichen, dann kürzester
+best_names = (
+    base_lf
     .select(["Autor_in", "Interne Autor_in-ID", "Author Wikidata ID"])
     .unique()
-)
-
-best_names = (
-    name_candidates
     .with_columns(
-        pl.col("Autor_in")
-        .map_elements(count_special_chars, return_dtype=pl.Int32)
-        .alias("_special"),
-        pl.col("Autor_in")
-        .map_elements(len, return_dtype=pl.Int32)
-        .alias("_len"),
+        pl.col("Autor_in").str.count_matches(SPECIAL_CHARS_PATTERN).alias("_special"),
+        pl.col("Autor_in").str.len_chars().alias("_len"),
     )
-    .sort(["Interne Autor_in-ID", "Author Wikidata ID", "_special", "_len"])
+    .sort(["Interne Autor_in-ID", "Author Wikidata ID", "_special", "_len", "Autor_in"])
     .unique(["Interne Autor_in-ID", "Author Wikidata ID"], keep="first")
     .drop(["_special", "_len"])
 )
 
-distinct_authors_df = best_names
+# Teilmengen je Autor_in: alle Gattungen ihrer Werke (Liste), Zeitraum des frühesten Werks
+subset_aggs = []
+if GENRE_COL in base_df.columns:
+    genre = (
+        pl.col(GENRE_COL).str.split("/").explode()
+        .str.strip_chars().str.strip_chars_end("?").str.strip_chars()
+    )
+    subset_aggs.append(genre.filter(genre != "").unique().sort().alias("Gattung"))
+if YEAR_COL in base_df.columns:
+    subset_aggs.append(
+        pl.col(YEAR_COL).str.extract(r"(\d{4})").cast(pl.Int32).min().alias("_year")
+    )
+
+author_subsets = (
+    base_lf
+    .group_by(["Interne Autor_in-ID", "Author Wikidata ID"])
+    .agg(subset_aggs or [pl.len().alias("_n")])
+)
+if YEAR_COL in base_df.columns:
+    period_start = pl.col("_year") // PERIOD_YEARS * PERIOD_YEARS
+    author_subsets = author_subsets.with_columns(
+        pl.concat_str([
+            period_start.cast(pl.Utf8),
+            (period_start + PERIOD_YEARS - 1).cast(pl.Utf8),
+        ], separator="–").alias("Zeitraum")
+    )
+author_subsets = author_subsets.drop(["_year", "_n"], strict=False)
 
 out_df = (
-    distinct_authors_df
+    best_names
+    .join(
+        work_count,
+        on=["Interne Autor_in-ID", "Author Wikidata ID"],
+        how="left",
+    )
     .join(
-        work_count_df,
+        author_subsets,
         on=["Interne Autor_in-ID", "Author Wikidata ID"],
         how="left",
     )
     .join(
-        author_sitelinks_agg,
+        author_gender_agg.lazy(),
+        on="Author Wikidata ID",
+        how="left",
+    )
+    .join(
+        author_sitelinks_agg.lazy(),
         on="Author Wikidata ID",
         how="left",
     )
     .with_columns(
         pl.col("Author Sitelinks").fill_null(0)
     )
+    .collect()
 )
 
 
 # =========================
 # QRANK
 # =========================
-if not QRANK_PATH.exists():
-    print("\nDownloading QRank dataset (this may take a while)...")
-    urllib.request.urlretrieve(QRANK_URL, QRANK_PATH)
-    print("Download finished.")
+build_qrank_parquet()
 
 print("\nJoining QRank...")
-qrank = pl.read_csv(QRANK_PATH)
+qrank = scan_qrank(author_qids)
 
 out_df = (
     out_df
     .join(
-        qrank.select(["Entity", "QRank"]),
+        qrank,
         left_on="Author Wikidata ID",
         right_on="Entity",
         how="left",
@@ -427,21 +750,13 @@ out_df = (
     .rename({"QRank": "Author QRank"})
 )
 
-out_df = out_df.select([
-    "Autor_in",
-    "Interne Autor_in-ID",
-    "Author Wikidata ID",
-    "Author Sitelinks",
-    "Author QRank",
-    "Work Count",
-])
 
 
 # =========================
 # SAVE
 # =========================
 print(f"\nSaving output to: {OUTPUT_FILE}")
-out_df.write_csv(OUTPUT_FILE)
+out_df.select(OUTPUT_COLUMNS).write_csv(OUTPUT_FILE)
 
 
 # =========================
@@ -449,42 +764,57 @@ out_df.write_csv(OUTPUT_FILE)
 # =========================
 print("\nStatistics:\n")
 
-subset = (
+stats_df = (
     out_df
-    .select(["Author Wikidata ID", "Author QRank", "Author Sitelinks"])
     .drop_nulls(["Author Wikidata ID", "Author QRank", "Author Sitelinks"])
-    .unique("Author Wikidata ID")
+    .unique("Author Wikidata ID", maintain_order=True)
 )
 
-if subset.height < 3:
-    print("Author: skipped (not enough data)")
-else:
-    x = subset.get_column("Author Sitelinks").cast(pl.Float64).to_numpy()
-    y = subset.get_column("Author QRank").cast(pl.Float64).to_numpy()
-
-    print("Author: Spearman correlation")
-    print(stats.spearmanr(y, x))
+missing_subset_cols = [c for c in SUBSET_COLUMNS if c not in stats_df.columns]
+if missing_subset_cols:
+    print(f"Teilmengen übersprungen, Spalten fehlen: {', '.join(missing_subset_cols)}\n")
+
+# Statistik auf dem vollständigen out_df (die CSV enthält nur OUTPUT_COLUMNS)
+subset_frames = [("Author", stats_df)]
+for col in SUBSET_COLUMNS:
+    if col in stats_df.columns:
+        # Listen (Gattungen): eine Autor_in zählt in jeder ihrer Gattungen
+        values = stats_df.explode(col) if stats_df.schema[col] == pl.List(pl.Utf8) else stats_df
+        for (value,), group in values.drop_nulls(col).sort(col).group_by(col, maintain_order=True):
+            subset_frames.append((f"{col} = {value}", group))
+
+subsets = []
+for label, frame in subset_frames:
+    if frame.height < MIN_SUBSET_SIZE:
+        print(f"{label}: skipped (not enough data)")
+        continue
+    subsets.append((
+        label,
+        frame.get_column("Author Sitelinks").cast(pl.Float64).to_numpy(),
+        frame.get_column("Author QRank").cast(pl.Float64).to_numpy(),
+    ))
+
+ci_label = f"{CONFIDENCE:.0%}-KI (Bootstrap, {N_BOOTSTRAP} Resamples)"
+for result in analyse_subsets(subsets):
+    label = result["label"]
+    print(f"{label}: Spearman correlation (n = {result['n']})")
+    print(result["spearman"])
+    if "rho_ci" in result:
+        print(f"  rho {ci_label}: {format_ci(result['rho_ci'])}")
     print()
 
-    try:
-        model = Polynomial.fit(x, y, 2)
-        r2 = r2_score(y, model(x))
-        print(f"Author QRank = {model}")
-        print(f"R² = {r2}")
-        print()
-    except Exception as e:
-        print(f"Author: regression skipped ({e})")
+    if "error" in result:
+        print(f"{label}: regression skipped ({result['error']})")
         print()
+        continue
+    print(f"{label} QRank = {result['model']}")
+    print(f"R² = {result['r2']}")
+    if "r2_ci" in result:
+        print(f"  R² {ci_label}: {format_ci(result['r2_ci'])}")
+        coef_ci = result["coef_ci"]
+        for i in range(coef_ci.shape[1]):
+            print(f"  Koeffizient Grad {i} {ci_label}: {format_ci(coef_ci[:, i])}")
+    print()
 
 print("Done.")
 
-
-# =========================
-# CLEANUP
-# =========================
-try:
-    if QRANK_PATH.parent.exists():
-        print("\nDeleting inputs folder...")
-        shutil.rmtree(QRANK_PATH.parent)
-except Exception as e:
-    print(f"⚠️ Cleanup failed: {e}")
\ No newline at end of file
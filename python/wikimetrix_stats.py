@@ -0,0 +1,108 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.polynomial import Polynomial
+from scipy import stats
+from sklearn.metrics import r2_score
+
+# -----------------------------------------------------------------------
+# Bootstrap-Statistiken für wikimetrix.py
+#
+# Je Teilmenge (alle Autor_innen, Gattung, Gender, Zeitraum, ...):
+# Spearman-rho und quadratischer Fit wie bisher, dazu Bootstrap-
+# Konfidenzintervalle. Die Resamples sind Indexmatrizen (Resamples x n);
+# Ränge, Korrelationen und Kleinste-Quadrate-Lösungen werden für einen
+# ganzen Block von Resamples auf einmal mit NumPy berechnet. Teilmengen
+# laufen in eigenen Prozessen, per "fork" wie in rdf_output.py:
+# wikimetrix.py läuft auf Modulebene ohne __main__-Schutz, mit "spawn"
+# würde jeder Worker das ganze Skript erneut ausführen. Ohne fork
+# (Windows) laufen die Teilmengen nacheinander.
+# -----------------------------------------------------------------------
+
+N_BOOTSTRAP = 2000
+CONFIDENCE = 0.95
+CHUNK_SIZE = 250   # Resamples je Block; Speicher etwa CHUNK_SIZE x n x 3 Werte
+SEED = 1001
+
+
+def spearman_rows(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Spearman-rho je Zeile (Bindungen mit mittleren Rängen wie scipy)."""
+    rx = stats.rankdata(x, axis=1)
+    ry = stats.rankdata(y, axis=1)
+    rx -= rx.mean(axis=1, keepdims=True)
+    ry -= ry.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (rx * ry).sum(axis=1) / np.sqrt((rx * rx).sum(axis=1) * (ry * ry).sum(axis=1))
+
+
+def quadratic_rows(t: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Quadratischer Fit je Zeile über t (auf [-1, 1] abgebildet): Koeffizienten und R²."""
+    v = np.stack([np.ones_like(t), t, t * t], axis=2)
+    vt = v.transpose(0, 2, 1)
+    coef = (np.linalg.pinv(vt @ v) @ (vt @ y[..., None]))[..., 0]
+    resid = y - (v @ coef[..., None])[..., 0]
+    ss_res = (resid * resid).sum(axis=1)
+    ss_tot = ((y - y.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return coef, 1.0 - ss_res / ss_tot
+
+
+def percentile_ci(values: np.ndarray, confidence: float = CONFIDENCE) -> np.ndarray:
+    """Perzentil-Intervall je Spalte, ohne NaN (entartete Resamples)."""
+    alpha = (1.0 - confidence) / 2 * 100
+    return np.nanpercentile(values, [alpha, 100 - alpha], axis=0)
+
+
+def analyse_subset(label: str, x: np.ndarray, y: np.ndarray,
+                   n_boot: int = N_BOOTSTRAP, seed: int = SEED) -> dict:
+    """Spearman und quadratischer Fit für eine Teilmenge, samt Bootstrap-Intervallen."""
+    n = len(x)
+    result = {"label": label, "n": n, "spearman": stats.spearmanr(y, x)}
+    try:
+        model = Polynomial.fit(x, y, 2)
+        result["model"] = model
+        result["r2"] = r2_score(y, model(x))
+    except Exception as e:
+        result["error"] = str(e)
+
+    lo, hi = x.min(), x.max()
+    if n_boot <= 0 or hi == lo:
+        return result
+    # Dieselbe Abbildung auf [-1, 1] wie Polynomial.fit: Koeffizienten vergleichbar mit model
+    t = (2 * x - (lo + hi)) / (hi - lo)
+
+    rng = np.random.default_rng(seed)
+    rhos, coefs, r2s = [], [], []
+    for start in range(0, n_boot, CHUNK_SIZE):
+        idx = rng.integers(0, n, size=(min(CHUNK_SIZE, n_boot - start), n))
+        rhos.append(spearman_rows(x[idx], y[idx]))
+        coef, r2 = quadratic_rows(t[idx], y[idx])
+        coefs.append(coef)
+        r2s.append(r2)
+
+    result["n_boot"] = n_boot
+    result["rho_ci"] = percentile_ci(np.concatenate(rhos))
+    result["coef_ci"] = percentile_ci(np.concatenate(coefs))
+    result["r2_ci"] = percentile_ci(np.concatenate(r2s))
+    return result
+
+
+def _analyse(args: tuple) -> dict:
+    return analyse_subset(*args)
+
+
+def analyse_subsets(subsets: list[tuple[str, np.ndarray, np.ndarray]],
+                    n_boot: int = N_BOOTSTRAP, workers: int | None = None) -> list[dict]:
+    """Alle Teilmengen, parallel in Prozessen; Ergebnisse in der Reihenfolge von subsets."""
+    jobs = [(label, x, y, n_boot, SEED + i) for i, (label, x, y) in enumerate(subsets)]
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1 or "fork" not in mp.get_all_start_methods():
+        return [_analyse(job) for job in jobs]
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("fork")) as pool:
+        return list(pool.map(_analyse, jobs))
+
+
+def format_ci(ci) -> str:
+    return f"[{ci[0]:.4g}, {ci[1]:.4g}]"
@@ -1,40 +1,14 @@
-import requests
-import time
+import sys
 from lxml import etree
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, XSD, OWL
 from pathlib import Path
 from typing import Optional
 
-# Wikidata
-SESSION = requests.Session()
-SESSION.headers.update({
-    "User-Agent": "SapphoDigital/1.0 (+mailto:laura.untner@fu-berlin.de)"
-})
-_WD_CACHE: dict[str, dict] = {}
-
-def fetch_wikidata(qid: str) -> dict:
-    if not qid:
-        return {}
-    if qid in _WD_CACHE:
-        return _WD_CACHE[qid]
-    url = f"https://www.wikidata.org/wiki/Special:EntityData/{qid}.json"
-    for attempt in range(3):
-        try:
-            r = SESSION.get(url, timeout=15)
-            if r.status_code == 200:
-                data = r.json().get("entities", {}).get(qid, {})
-                if data:
-                    _WD_CACHE[qid] = data
-                    return data
-            if r.status_code in (429, 503):
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            break
-        except requests.RequestException:
-            time.sleep(1.0 * (attempt + 1))
-            continue
-    return {}
+from harvest_state import HarvestState, file_digest
+from phase_timer import mark
+from rdf_output import write_outputs
+from wikidata import PROJECTION, fetch_wikidata, prefetch
 
 def get_claim_vals(entity, prop, expect="auto"):
     vals = []
@@ -173,19 +147,58 @@ genre_type_uri = ensure_genre_type()
 # -----------------------------------------------------------------------
 # XML parsen
 # -----------------------------------------------------------------------
+mark("XML parsen")
 parser   = etree.XMLParser(recover=True)
 tree     = etree.parse(INPUT_FILE, parser=parser)
 root     = tree.getroot()
 all_bibls  = root.findall(".//tei:bibl", namespaces=NSMAP)
 top_bibls  = [b for b in all_bibls if b.getparent().tag != f"{{{NSMAP['tei']}}}bibl"]
 
+# -----------------------------------------------------------------------
+# Inkrementell: nur neue oder geänderte bibl-Einträge neu erzeugen
+# -----------------------------------------------------------------------
+harvest = HarvestState("works", {"script": file_digest(__file__), "projection": PROJECTION},
+                       full="--full" in sys.argv[1:])
+_entries: dict[str, list[bytes]] = {}
+for bibl in top_bibls:
+    bibl_id = bibl.get(f"{XML_NS}id")
+    if bibl_id:
+        _entries.setdefault(bibl_id, []).append(etree.tostring(bibl, with_tail=False))
+changed = harvest.plan(_entries)
+
+# -----------------------------------------------------------------------
+# Wikidata vorab laden (Werke und Erscheinungsorte)
+# -----------------------------------------------------------------------
+mark("Wikidata vorab laden")
+def _wd_qids():
+    for bibl in top_bibls:
+        if bibl.get(f"{XML_NS}id") not in changed:
+            continue
+        nested = bibl.find("tei:bibl", namespaces=NSMAP)
+        for ref in (bibl.get("ref"), nested.get("ref") if nested is not None else None):
+            if ref and "wikidata.org/entity/" in ref:
+                yield ref.split("/")[-1]
+        for pubplace_el in bibl.iterfind(".//tei:pubPlace", namespaces=NSMAP):
+            ref = (pubplace_el.get("ref") or "").strip()
+            qid = ref.rstrip("/").split("/")[-1] if ref.startswith("http") else ref
+            if qid.startswith("Q"):
+                yield qid
+
+prefetch(_wd_qids(), refresh=harvest.full)
+
 # -----------------------------------------------------------------------
 # Hauptschleife
 # -----------------------------------------------------------------------
+mark("Hauptschleife")
+g_base = g
 for bibl in top_bibls:
     bibl_id = bibl.get("{http://www.w3.org/XML/1998/namespace}id")
     if not bibl_id:
         continue
+    # Tripel dieses Eintrags in einem eigenen Graphen sammeln
+    g = harvest.graph(bibl_id)
+    if g is None:
+        continue
 
     bibl_uri          = SD[f"expression/{bibl_id}"]
     creation_expr_uri = SD[f"expression_creation/{bibl_id}"]
@@ -250,6 +263,9 @@ for bibl in top_bibls:
         inner_qid = inner_ref.split("/")[-1]
         entity = fetch_wikidata(inner_qid)
 
+    if (outer_is_wd or inner_is_wd) and not entity:
+        harvest.mark_incomplete(bibl_id)
+
     if outer_is_wd and entity:
         # DBpedia
         dbpedia_links = set()
@@ -534,13 +550,13 @@ for bibl in top_bibls:
             g.add((bibl_uri, ECRM.P2_has_type, genre_uri))
 
 # -----------------------------------------------------------------------
-# Speichern
+# Unveränderte und neu erzeugte Einträge zusammenführen
 # -----------------------------------------------------------------------
-Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
-g.serialize(destination=OUTPUT_FILE, format="turtle")
+mark("Einträge zusammenführen")
+g = harvest.finish(g_base)
 
-xml_output = OUTPUT_FILE.replace(".ttl", ".rdf")
-g.serialize(destination=xml_output, format="pretty-xml")
-
-jsonld_output = OUTPUT_FILE.replace(".ttl", ".jsonld")
-g.serialize(destination=jsonld_output, format="json-ld")
\ No newline at end of file
+# -----------------------------------------------------------------------
+# Speichern
+# -----------------------------------------------------------------------
+mark("Speichern")
+write_outputs(g, OUTPUT_FILE)
\ No newline at end of file